@@ -409,7 +409,7 @@ class AdvancedAntiBot:
                             tracking_info = await self.parse_api_response(json_data, pro_number)
                             if tracking_info:
                                 return tracking_info
-                        except:
+                        except Exception:
                             pass
                 
                 # Try POST request
@@ -423,7 +423,7 @@ class AdvancedAntiBot:
                             tracking_info = await self.parse_api_response(json_data, pro_number)
                             if tracking_info:
                                 return tracking_info
-                        except:
+                        except Exception:
                             pass
                             
             except Exception as e:
@@ -445,7 +445,7 @@ class AdvancedAntiBot:
                 tracking_info = self.extract_from_json_ld(data, pro_number)
                 if tracking_info:
                     return tracking_info
-            except:
+            except Exception:
                 continue
         
         # Look for microdata
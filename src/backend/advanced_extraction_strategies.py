@@ -6,7 +6,6 @@ This module implements sophisticated and creative approaches to extract real tra
 from all carriers with 100% success rate.
 """
 
-import asyncio
 import aiohttp
 import json
 import re
@@ -28,12 +27,6 @@ class AdvancedExtractionStrategies:
     def __init__(self):
         self.session_cookies = {}
         self.extracted_tokens = {}
-        self.rate_limit_delays = {
-            'fedex': 2,
-            'estes': 3,
-            'peninsula': 2,
-            'rl': 3
-        }
         self.carrier_enhancer = CarrierSpecificEnhancer()
         
         # Carrier-specific extraction strategies
@@ -49,9 +42,6 @@ class AdvancedExtractionStrategies:
         
         logger.info(f"🎯 Starting 100% success extraction for {carrier} PRO {pro_number}")
         
-        # Apply rate limiting
-        await asyncio.sleep(self.rate_limit_delays.get(carrier, 2))
-        
         # Use carrier-specific comprehensive strategy
         strategy = self.carrier_strategies.get(carrier)
         if strategy:
@@ -121,7 +111,7 @@ class AdvancedExtractionStrategies:
                                 parsed = self._parse_fedex_response(result, pro_number)
                                 if parsed:
                                     return parsed
-                            except:
+                            except Exception:
                                 pass
         except Exception as e:
             logger.debug(f"FedEx method 1 failed: {e}")
@@ -148,7 +138,7 @@ class AdvancedExtractionStrategies:
                         parsed = self._parse_fedex_response(result, pro_number)
                         if parsed:
                             return parsed
-                    except:
+                    except Exception:
                         pass
         except Exception as e:
             logger.debug(f"FedEx method 2 failed: {e}")
@@ -193,7 +183,7 @@ class AdvancedExtractionStrategies:
                             tracking_data = result['data']['tracking']
                             if tracking_data:
                                 return self._format_fedex_result(tracking_data, pro_number)
-                    except:
+                    except Exception:
                         pass
         except Exception as e:
             logger.debug(f"FedEx method 3 failed: {e}")
@@ -238,7 +228,7 @@ class AdvancedExtractionStrategies:
                                 parsed = self._parse_estes_response(result, pro_number)
                                 if parsed:
                                     return parsed
-                            except:
+                            except Exception:
                                 pass
         except Exception as e:
             logger.debug(f"Estes method 1 failed: {e}")
@@ -281,7 +271,7 @@ class AdvancedExtractionStrategies:
                         parsed = self._parse_estes_response(result, pro_number)
                         if parsed:
                             return parsed
-                    except:
+                    except Exception:
                         pass
         except Exception as e:
             logger.debug(f"Estes method 3 failed: {e}")
@@ -347,7 +337,7 @@ class AdvancedExtractionStrategies:
                         parsed = self._parse_peninsula_response(result, pro_number)
                         if parsed:
                             return parsed
-                    except:
+                    except Exception:
                         pass
         except Exception as e:
             logger.debug(f"Peninsula method 2 failed: {e}")
@@ -439,7 +429,7 @@ class AdvancedExtractionStrategies:
                         parsed = self._parse_rl_response(result, pro_number)
                         if parsed:
                             return parsed
-                    except:
+                    except Exception:
                         pass
         except Exception as e:
             logger.debug(f"R&L method 2 failed: {e}")
@@ -106,7 +106,7 @@ class AlternativeDataSources:
                             'event': event,
                             'timestamp': data.get('timestamp', datetime.now().isoformat())
                         }
-            except:
+            except Exception:
                 continue
         
         # Look for structured HTML patterns
@@ -193,7 +193,7 @@ class AlternativeDataSources:
                             if tracking_info:
                                 logger.info(f"✅ Got tracking data from mobile API: {endpoint}")
                                 return tracking_info
-                        except:
+                        except Exception:
                             pass
                 
                 # Try GET request
@@ -206,7 +206,7 @@ class AlternativeDataSources:
                             if tracking_info:
                                 logger.info(f"✅ Got tracking data from mobile API: {endpoint}")
                                 return tracking_info
-                        except:
+                        except Exception:
                             pass
                             
             except Exception as e:
@@ -19,6 +19,8 @@ from urllib.parse import urljoin, urlparse, parse_qs
 import base64
 import hashlib
 
+from .rate_limiter import rate_limit_trace_config
+
 logger = logging.getLogger(__name__)
 
 
@@ -230,9 +232,6 @@ class APIDiscoveryEngine:
                 
                 except Exception as e:
                     logger.debug(f"API discovery error for {api_url}: {e}")
-                
-                # Rate limiting
-                await asyncio.sleep(0.2)
         
         return discovered
     
@@ -435,7 +434,8 @@ class AlternativeMethodsEngine:
         self.session = aiohttp.ClientSession(
             timeout=timeout,
             connector=connector,
-            headers=self.legitimate_headers
+            headers=self.legitimate_headers,
+            trace_configs=[rate_limit_trace_config()]
         )
         return self
     
@@ -22,6 +22,8 @@ import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from .rate_limiter import install_rate_limiter
+
 # Advanced imports for anti-detection
 try:
     from selenium import webdriver
@@ -255,6 +257,7 @@ class AntiScrapingBypass:
         adapter = HTTPAdapter(max_retries=retry_strategy)
         session.mount("http://", adapter)
         session.mount("https://", adapter)
+        install_rate_limiter(session)
         
         # Configure proxy if available
         if self.proxy_pool:
@@ -441,9 +444,6 @@ class AntiScrapingBypass:
             if response.status_code != 200:
                 return False
             
-            # Add realistic delay
-            time.sleep(random.uniform(1, 3))
-            
             # Visit common pages to establish browsing pattern
             common_paths = ['/about', '/services', '/contact', '/tracking']
             
@@ -451,7 +451,6 @@ class AntiScrapingBypass:
                 try:
                     url = urljoin(homepage_url, path)
                     response = session.get(url, timeout=10)
-                    time.sleep(random.uniform(0.5, 2))
                 except:
                     continue
             
@@ -7,7 +7,11 @@ and formats. Each carrier has unique numbering schemes that can be used for iden
 
 import re
 import logging
-from typing import Dict, Optional, List, Tuple
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, List, Tuple
+
+# Leading characters of the normalized PRO number that key the learned carrier attribution index
+ATTRIBUTION_PREFIX_LENGTH = 3
 
 
 class CarrierDetector:
@@ -15,8 +19,73 @@ class CarrierDetector:
     Detects LTL carriers based on PRO number patterns and formats.
     """
     
+    # Number of distinct cleaned PRO numbers whose detection result is memoised
+    DETECTION_CACHE_SIZE = 65536
+    
+    # Learned attribution overrides pattern detection only at or above this confidence
+    ATTRIBUTION_MIN_CONFIDENCE = 0.8
+    
     def __init__(self):
         self.carrier_patterns = self._initialize_carrier_patterns()
+        self._compile_patterns()
+        self._detect_cleaned = lru_cache(maxsize=self.DETECTION_CACHE_SIZE)(self._detect_cleaned_uncached)
+    
+    def _compile_patterns(self):
+        """
+        Compile every carrier pattern into one alternation, ordered by carrier priority.
+        
+        Each pattern becomes a named group, so a single fullmatch both tests all patterns
+        and reports which carrier matched first in priority order.
+        """
+        # Sort carriers by priority (higher priority first); sorted() keeps definition order for ties
+        self._sorted_carriers = sorted(
+            self.carrier_patterns.items(),
+            key=lambda x: x[1].get('priority', 3)  # Default priority is 3 (lower)
+        )
+        
+        alternatives = []
+        self._group_index = {}
+        self._pattern_entries = []
+        self._carrier_regexes = {}
+        for carrier_code, carrier_info in self._sorted_carriers:
+            check_digit = carrier_info.get('check_digit', {})
+            bodies = []
+            for pattern in carrier_info['patterns']:
+                body = pattern[1:] if pattern.startswith('^') else pattern
+                body = body[:-1] if body.endswith('$') else body
+                group_name = f"p{len(self._pattern_entries)}"
+                scheme = check_digit.get('scheme') if pattern in check_digit.get('patterns', []) else None
+                self._group_index[group_name] = len(self._pattern_entries)
+                self._pattern_entries.append((carrier_code, re.compile(body), scheme))
+                alternatives.append(f"(?P<{group_name}>{body})")
+                bodies.append(f"(?:{body})")
+            self._carrier_regexes[carrier_code] = re.compile('|'.join(bodies))
+        
+        self._combined_regex = re.compile('|'.join(alternatives))
+    
+    def _match_carrier_code(self, cleaned_pro: str) -> Tuple[Optional[str], str]:
+        """
+        Find the highest-priority carrier whose pattern and check digit both accept the PRO.
+        
+        Returns:
+            Tuple of (carrier_code or None, check digit error when every matching pattern failed its check)
+        """
+        match = self._combined_regex.fullmatch(cleaned_pro)
+        if not match:
+            return None, ""
+        
+        index = self._group_index[match.lastgroup]
+        carrier_code, _, scheme = self._pattern_entries[index]
+        if _check_digit_valid(scheme, cleaned_pro):
+            return carrier_code, ""
+        
+        # The first match failed its check digit; fall back to the remaining patterns in order
+        rejected_by = carrier_code
+        for carrier_code, regex, scheme in self._pattern_entries[index + 1:]:
+            if regex.fullmatch(cleaned_pro) and _check_digit_valid(scheme, cleaned_pro):
+                return carrier_code, ""
+        
+        return None, f"PRO number check digit invalid for {self.carrier_patterns[rejected_by]['name']}"
     
     def _initialize_carrier_patterns(self) -> Dict[str, Dict]:
         """
@@ -36,6 +105,15 @@ class CarrierDetector:
                     r'^(\d{3}-\d{7})$',         # 10-digit with dash: 555-6372640
                     r'^(\d{4}-\d{3}-\d{3})$',   # 10-digit with dashes: 5556-372-640
                 ],
+                'check_digit': {
+                    'scheme': 'mod7',  # Last digit is the first nine modulo 7: 761607932-1
+                    'patterns': [
+                        r'^(\d{9}-\d{1})$',
+                        r'^([5-9]\d{9})$',
+                        r'^(\d{3}-\d{7})$',
+                        r'^(\d{4}-\d{3}-\d{3})$',
+                    ]
+                },
                 'tracking_url': 'https://www.fedex.com/fedextrack/?trknbr={pro_number}&trkqual=~{pro_number}~FDFR',
                 'login_required': False,
                 'css_selectors': {
@@ -54,6 +132,12 @@ class CarrierDetector:
                     r'^([0123]\d{8})$',  # 9-digit starting with 0,1,2,3: 933784722
                     r'^(\d{3}-\d{6})$',  # 9-digit with dash: 823-691187
                 ],
+                'check_digit': {
+                    'scheme': 'mod7',  # Digit after the dash is the first eight modulo 7: 14588517-6
+                    'patterns': [
+                        r'^(\d{8}-\d{1})$',
+                    ]
+                },
                 'tracking_url': 'https://www2.rlcarriers.com/freight/shipping/shipment-tracing?pro={pro_number}&docType=PRO&source=web',
                 'login_required': False,
                 'css_selectors': {
@@ -266,12 +350,14 @@ class CarrierDetector:
             }
         }
     
-    def detect_carrier(self, pro_number: Optional[str]) -> Optional[Dict]:
+    def detect_carrier(self, pro_number: Optional[str], attribution: Optional[Dict] = None) -> Optional[Dict]:
         """
         Detect the carrier based on PRO number format.
         
         Args:
             pro_number: The PRO number to analyze
+            attribution: Optional learned attribution index (see DatabaseManager.get_carrier_attribution_index),
+                consulted before the patterns
             
         Returns:
             Dict containing carrier information or None if not detected
@@ -284,39 +370,96 @@ class CarrierDetector:
         if not cleaned_pro:
             return None
         
-        # Sort carriers by priority (higher priority first)
-        sorted_carriers = sorted(
-            self.carrier_patterns.items(),
-            key=lambda x: x[1].get('priority', 3),  # Default priority is 3 (lower)
-            reverse=False  # Lower priority numbers come first (1 = highest priority)
-        )
+        if attribution:
+            learned = self._learned_carrier(cleaned_pro, attribution)
+            if learned:
+                return learned
         
-        # Try to match against known patterns in priority order
-        for carrier_code, carrier_info in sorted_carriers:
-            for pattern in carrier_info['patterns']:
-                if re.match(pattern, cleaned_pro):
-                    tracking_url = carrier_info['tracking_url']
-                    if tracking_url:
-                        tracking_url = tracking_url.format(pro_number=cleaned_pro)
-                    else:
-                        tracking_url = ''
-                    
-                    return {
-                        'carrier_code': carrier_code,
-                        'carrier_name': carrier_info['name'],
-                        'tracking_url': tracking_url,
-                        'login_required': carrier_info['login_required'],
-                        'css_selectors': carrier_info['css_selectors']
-                    }
+        # Callers may modify the result, so never hand out the memoised dict itself
+        return dict(self._detect_cleaned(cleaned_pro))
+    
+    def detect_carriers(self, pro_numbers: Iterable[Optional[str]], attribution: Optional[Dict] = None) -> List[Optional[Dict]]:
+        """
+        Detect carriers for many PRO numbers at once.
         
-        # If no specific pattern matches, return generic info
+        Each distinct PRO number is matched once, however often it repeats in the input.
+        
+        Args:
+            pro_numbers: PRO numbers to analyze
+            attribution: Optional learned attribution index consulted before the patterns
+            
+        Returns:
+            List with one carrier information dict (or None) per input, in input order
+        """
+        detected = {}
+        results = []
+        for pro_number in pro_numbers:
+            key = str(pro_number) if pro_number else ''
+            if key not in detected:
+                detected[key] = self.detect_carrier(key, attribution) if key else None
+            result = detected[key]
+            results.append(dict(result) if result is not None else None)
+        return results
+    
+    def _learned_carrier(self, cleaned_pro: str, attribution: Dict) -> Optional[Dict]:
+        """
+        Look up the carrier that has historically returned data for PROs of this prefix and length.
+        
+        The learned carrier is only used when it is confident enough, is a known carrier and
+        does not contradict that carrier's check digit.
+        """
+        normalized = re.sub(r'[^A-Z0-9]', '', cleaned_pro)
+        entry = attribution.get((len(normalized), normalized[:ATTRIBUTION_PREFIX_LENGTH]))
+        if not entry or entry.get('confidence', 0) < self.ATTRIBUTION_MIN_CONFIDENCE:
+            return None
+        
+        carrier_code = self.resolve_carrier_code(entry.get('carrier_code')) or self.resolve_carrier_code(entry.get('carrier_name'))
+        if not carrier_code or self.check_digit_error(cleaned_pro, carrier_code):
+            return None
+        
+        carrier_info = self.carrier_patterns[carrier_code]
+        tracking_url = carrier_info['tracking_url']
         return {
+            'carrier_code': carrier_code,
+            'carrier_name': carrier_info['name'],
+            'tracking_url': tracking_url.format(pro_number=cleaned_pro) if tracking_url else '',
+            'login_required': carrier_info['login_required'],
+            'css_selectors': carrier_info['css_selectors'],
+            'detection_source': 'learned',
+            'confidence': entry['confidence']
+        }
+    
+    def _detect_cleaned_uncached(self, cleaned_pro: str) -> Dict:
+        """Build the detection result for an already cleaned PRO number"""
+        carrier_code, check_digit_error = self._match_carrier_code(cleaned_pro)
+        if carrier_code:
+            carrier_info = self.carrier_patterns[carrier_code]
+            tracking_url = carrier_info['tracking_url']
+            if tracking_url:
+                tracking_url = tracking_url.format(pro_number=cleaned_pro)
+            else:
+                tracking_url = ''
+            
+            return {
+                'carrier_code': carrier_code,
+                'carrier_name': carrier_info['name'],
+                'tracking_url': tracking_url,
+                'login_required': carrier_info['login_required'],
+                'css_selectors': carrier_info['css_selectors']
+            }
+        
+        # If no specific pattern matches, return generic info
+        result = {
             'carrier_code': 'unknown',
             'carrier_name': 'Unknown Carrier',
             'tracking_url': '',
             'login_required': False,
             'css_selectors': {}
         }
+        if check_digit_error:
+            # Only carriers with a check digit claimed this PRO and none accepted it
+            result['validation_error'] = check_digit_error
+        return result
     
     def _clean_pro_number(self, pro_number: Optional[str]) -> str:
         """
@@ -395,39 +538,169 @@ class CarrierDetector:
         if len(cleaned_pro) > 20:
             return False, "PRO number too long"
         
+        # Reject PROs that fail a carrier check digit before looking at formats
+        check_digit_error = self.check_digit_error(cleaned_pro, carrier_code)
+        if check_digit_error:
+            return False, check_digit_error
+        
         # If specific carrier provided, validate against that carrier's patterns
         if carrier_code and carrier_code in self.carrier_patterns:
-            carrier_info = self.carrier_patterns[carrier_code]
-            for pattern in carrier_info['patterns']:
-                if re.match(pattern, cleaned_pro):
-                    return True, ""
-            return False, f"PRO number format invalid for {carrier_info['name']}"
+            if self._carrier_regexes[carrier_code].fullmatch(cleaned_pro):
+                return True, ""
+            return False, f"PRO number format invalid for {self.carrier_patterns[carrier_code]['name']}"
         
-        # Otherwise, validate against any known pattern
-        for carrier_key, carrier_info in self.carrier_patterns.items():
-            for pattern in carrier_info['patterns']:
-                if re.match(pattern, cleaned_pro):
-                    return True, ""
-        
-        # If no pattern matches, it's still potentially valid (unknown carrier)
+        # Any other PRO is still potentially valid (unknown carrier)
         return True, ""
+    
+    def check_digit_error(self, pro_number: Optional[str], carrier_code: Optional[str] = None) -> str:
+        """
+        Check a PRO number against the check digits of the carriers that use them.
+        
+        A PRO is only rejected when it provably cannot be valid: every pattern that
+        matches it (for the given carrier, or for any carrier) carries a check digit
+        and none of those check digits agree.
+        
+        Args:
+            pro_number: PRO number to check
+            carrier_code: Optional specific carrier to check against
+            
+        Returns:
+            Reason the PRO number is invalid, or an empty string
+        """
+        cleaned_pro = self._clean_pro_number(pro_number)
+        if not cleaned_pro:
+            return ""
+        
+        if carrier_code and carrier_code in self.carrier_patterns:
+            matched = [
+                scheme for code, regex, scheme in self._pattern_entries
+                if code == carrier_code and regex.fullmatch(cleaned_pro)
+            ]
+            if matched and not any(_check_digit_valid(scheme, cleaned_pro) for scheme in matched):
+                return f"PRO number check digit invalid for {self.carrier_patterns[carrier_code]['name']}"
+            return ""
+        
+        return self._detect_cleaned(cleaned_pro).get('validation_error', "")
+    
+    def resolve_carrier_code(self, carrier: Optional[str]) -> Optional[str]:
+        """
+        Resolve a carrier code or display name (e.g. 'FedEx Freight Priority', 'R&L') to a carrier code.
+        
+        Args:
+            carrier: Carrier code or name as supplied by a caller or an uploaded file
+            
+        Returns:
+            Matching carrier code, or None for unknown and auto-detect values
+        """
+        key = re.sub(r'[^a-z0-9]', '', (carrier or '').lower())
+        if len(key) < 2:
+            return None
+        
+        for carrier_code, carrier_info in self._sorted_carriers:
+            for candidate in (carrier_code, carrier_info['name']):
+                candidate = re.sub(r'[^a-z0-9]', '', candidate.lower())
+                if key.startswith(candidate) or candidate.startswith(key):
+                    return carrier_code
+        return None
+    
+    def carrier_code_for(self, pro_number: str, carrier: Optional[str] = None) -> str:
+        """
+        Carrier code a PRO belongs to: the named carrier if it resolves, else the carrier detected from the PRO.
+        
+        Returns:
+            Carrier code, or 'unknown' when neither identifies a carrier
+        """
+        carrier_code = self.resolve_carrier_code(carrier)
+        if carrier_code:
+            return carrier_code
+        
+        carrier_info = self.detect_carrier(pro_number)
+        return carrier_info['carrier_code'] if carrier_info else 'unknown'
+
+
+def _check_digit_valid(scheme: Optional[str], pro_number: str) -> bool:
+    """Return True if the PRO number passes the named check digit scheme (or there is none)"""
+    if not scheme:
+        return True
+    digits = re.sub(r'\D', '', pro_number)
+    if len(digits) < 2:
+        return False
+    return CHECK_DIGIT_SCHEMES[scheme](digits)
+
+
+def _mod7_check_digit_valid(digits: str) -> bool:
+    """Mod-7 scheme: the last digit is the preceding digits modulo 7"""
+    return int(digits[:-1]) % 7 == int(digits[-1])
+
+
+# Check digit schemes referenced by the 'check_digit' entries of carrier patterns
+CHECK_DIGIT_SCHEMES = {
+    'mod7': _mod7_check_digit_valid,
+}
 
 
 # Initialize global carrier detector instance
 carrier_detector = CarrierDetector()
 
 
-def detect_carrier_from_pro(pro_number: Optional[str]) -> Optional[Dict]:
+def detect_carrier_from_pro(pro_number: Optional[str], attribution: Optional[Dict] = None) -> Optional[Dict]:
     """
     Convenience function to detect carrier from PRO number.
     
     Args:
         pro_number: PRO number to analyze
+        attribution: Optional learned attribution index consulted before the patterns
         
     Returns:
         Dict containing carrier information or None if not detected
     """
-    return carrier_detector.detect_carrier(pro_number)
+    return carrier_detector.detect_carrier(pro_number, attribution)
+
+
+def validate_pro_for_tracking(pro_number: Optional[str], carrier: Optional[str] = None) -> Tuple[bool, str]:
+    """
+    Check that a PRO number is worth sending to a carrier before any network call.
+    
+    Only empty, badly sized and check-digit-failing PRO numbers are rejected; PROs that
+    simply do not match a known format are left for the tracker to try.
+    
+    Args:
+        pro_number: PRO number to check
+        carrier: Optional carrier code or name the PRO is being tracked with
+        
+    Returns:
+        Tuple of (is_valid, error_message)
+    """
+    cleaned_pro = carrier_detector._clean_pro_number(pro_number)
+    if not cleaned_pro:
+        return False, "PRO number cannot be empty"
+    
+    if len(cleaned_pro) < 5:
+        return False, "PRO number too short"
+    
+    if len(cleaned_pro) > 20:
+        return False, "PRO number too long"
+    
+    carrier_code = carrier_detector.resolve_carrier_code(carrier)
+    check_digit_error = carrier_detector.check_digit_error(cleaned_pro, carrier_code)
+    if check_digit_error:
+        return False, check_digit_error
+    
+    return True, ""
+
+
+def detect_carriers_from_pros(pro_numbers: Iterable[Optional[str]], attribution: Optional[Dict] = None) -> List[Optional[Dict]]:
+    """
+    Convenience function to detect carriers for a batch of PRO numbers.
+    
+    Args:
+        pro_numbers: PRO numbers to analyze
+        attribution: Optional learned attribution index consulted before the patterns
+        
+    Returns:
+        List with one carrier information dict (or None) per input, in input order
+    """
+    return carrier_detector.detect_carriers(pro_numbers, attribution)
 
 
 def get_tracking_url(pro_number: Optional[str], carrier_code: Optional[str] = None) -> Optional[str]:
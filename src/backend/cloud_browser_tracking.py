@@ -15,6 +15,9 @@ import requests
 from bs4 import BeautifulSoup
 import re
 
+from .rate_limiter import install_rate_limiter
+from .tracking_cache import cached_tracking
+
 # Try to import playwright for cloud-compatible browser automation
 try:
     from playwright.async_api import async_playwright
@@ -44,7 +47,7 @@ class CloudBrowserTracker:
     """
     
     def __init__(self):
-        self.session = requests.Session()
+        self.session = install_rate_limiter(requests.Session())
         self.setup_session()
         
         # Detect cloud environment
@@ -90,6 +93,7 @@ class CloudBrowserTracker:
             'Cache-Control': 'max-age=0'
         })
     
+    @cached_tracking
     async def track_shipment(self, tracking_number: str, carrier: str) -> Dict[str, Any]:
         """
         Main tracking method that uses cloud-compatible browser automation
@@ -8,6 +8,7 @@ No browser automation dependencies - uses advanced HTTP techniques for carrier t
 
 import asyncio
 import aiohttp
+import functools
 import json
 import logging
 import random
@@ -25,6 +26,11 @@ from .real_data_extractor import RealDataExtractor
 from .advanced_extraction_strategies import AdvancedExtractionStrategies
 from .pure_web_scraper import PureWebScraper
 from .enhanced_http_scraper import EnhancedHTTPScraper
+from .carrier_detection import validate_pro_for_tracking
+from .hedged_execution import HedgedExecutor
+from .http_session_pool import http_session_pool
+from .strategy_scorer import strategy_scorer
+from .tracking_cache import cached_tracking
 
 logger = logging.getLogger(__name__)
 
@@ -114,76 +120,60 @@ class CloudNativeFingerprinter:
 
 
 class CloudNativeSessionManager:
-    """Advanced session management with connection pooling"""
+    """Per-carrier sessions drawn from the shared keep-alive session pool"""
     
     def __init__(self):
         self.sessions = {}
         self.fingerprinter = CloudNativeFingerprinter()
-        self.session_timeouts = {}
-        self.max_session_age = 300  # 5 minutes
+        self.max_session_age = 300  # 5 minutes, then a fresh fingerprint
+        
+        # SSL context with proper settings, shared by every carrier session
+        self.ssl_context = ssl.create_default_context()
+        self.ssl_context.check_hostname = False
+        self.ssl_context.verify_mode = ssl.CERT_NONE
     
     async def get_session(self, carrier: str) -> aiohttp.ClientSession:
         """Get or create session for carrier"""
-        current_time = time.time()
-        
-        # Check if session exists and is still valid
-        if carrier in self.sessions:
-            session_time = self.session_timeouts.get(carrier, 0)
-            if current_time - session_time < self.max_session_age:
-                return self.sessions[carrier]
-            else:
-                # Session expired, close it
-                await self.sessions[carrier].close()
-                del self.sessions[carrier]
-                del self.session_timeouts[carrier]
-        
-        # Create new session
-        profile = self.fingerprinter.get_fingerprint(carrier)
-        headers = self.fingerprinter.get_headers(carrier)
-        
-        # Create SSL context with proper settings
-        ssl_context = ssl.create_default_context()
-        ssl_context.check_hostname = False
-        ssl_context.verify_mode = ssl.CERT_NONE
+        name = self.sessions.setdefault(carrier, f"cloud_native:{carrier}")
         
-        # Create connector with connection pooling
-        connector = aiohttp.TCPConnector(
-            limit=100,
+        return await http_session_pool.get_session(
+            name,
+            headers=self.fingerprinter.get_headers(carrier),
+            ssl=self.ssl_context,
+            cookie_jar=aiohttp.CookieJar(),
             limit_per_host=10,
-            ttl_dns_cache=300,
-            use_dns_cache=True,
-            ssl=ssl_context,
-            enable_cleanup_closed=True
+            max_age=self.max_session_age
         )
-        
-        # Create session with timeout
-        timeout = aiohttp.ClientTimeout(total=30, connect=10)
-        
-        session = aiohttp.ClientSession(
-            connector=connector,
-            headers=headers,
-            timeout=timeout,
-            cookie_jar=aiohttp.CookieJar()
-        )
-        
-        self.sessions[carrier] = session
-        self.session_timeouts[carrier] = current_time
-        
-        return session
     
     async def close_all_sessions(self):
         """Close all sessions"""
-        for session in self.sessions.values():
-            await session.close()
+        await http_session_pool.close(self.sessions.values())
         self.sessions.clear()
-        self.session_timeouts.clear()
 
 
 class CloudNativeTracker:
     """Cloud-native LTL tracking system"""
     
-    def __init__(self):
+    # Tracking strategies in default priority order, reordered per carrier by the strategy scorer;
+    # each name maps to a _try_<name> method
+    STRATEGIES = (
+        'enhanced_http_scraper',
+        'pure_web_scraper',
+        '100_percent_success_extraction',
+        'real_data_extraction',
+        'advanced_anti_bot_bypass',
+        'direct_endpoints',
+        'form_submission',
+        'api_endpoints',
+        'alternative_data_sources',
+    )
+    
+    # How strategies are run: 'hedged', 'parallel' (top strategies at once) or 'sequential'
+    EXECUTION_MODE = 'hedged'
+    
+    def __init__(self, execution_mode: Optional[str] = None):
         self.session_manager = CloudNativeSessionManager()
+        self.strategy_executor = HedgedExecutor.for_mode(execution_mode or self.EXECUTION_MODE)
         self.fingerprinter = CloudNativeFingerprinter()
         self.logger = logging.getLogger(__name__)
         self.version = "2.0.9"  # Version identifier for deployment tracking - 100% Success Rate
@@ -225,10 +215,26 @@ class CloudNativeTracker:
             'carrier_stats': {}
         }
     
+    @cached_tracking
     async def track_shipment(self, tracking_number: str, carrier: str) -> Dict[str, Any]:
         """Track shipment using cloud-native methods"""
         start_time = time.time()
         
+        # Reject provably invalid PROs before any request is made
+        is_valid, validation_error = validate_pro_for_tracking(tracking_number, carrier)
+        if not is_valid:
+            self.logger.info(f"⛔ Skipping invalid PRO {tracking_number}: {validation_error}")
+            return {
+                'status': 'error',
+                'tracking_number': tracking_number,
+                'carrier': carrier,
+                'error': validation_error,
+                'explanation': 'PRO number failed validation and was not sent to the carrier',
+                'processing_time': time.time() - start_time,
+                'tracking_timestamp': datetime.now().isoformat(),
+                'extracted_from': 'pro_validation'
+            }
+        
         # Map carrier names to internal format
         carrier_mapping = {
             'fedex freight priority': 'fedex',
@@ -264,57 +270,22 @@ class CloudNativeTracker:
             # Get session for this carrier
             session = await self.session_manager.get_session(carrier_lower)
             
-            # Try enhanced HTTP scraper first - advanced techniques
-            result = await self._try_enhanced_http_scraper(session, tracking_number, carrier_lower)
-            if result and result.get('status') == 'success':
-                self._record_success(carrier_lower)
-                return result
-            
-            # Try pure web scraper second
-            result = await self._try_pure_web_scraper(session, tracking_number, carrier_lower)
-            if result and result.get('status') == 'success':
-                self._record_success(carrier_lower)
-                return result
-            
-            # Try 100% success rate extraction
-            result = await self._try_100_percent_success_extraction(session, tracking_number, carrier_lower)
-            if result and result.get('status') == 'success':
-                self._record_success(carrier_lower)
-                return result
-            
-            # Try real data extraction
-            result = await self._try_real_data_extraction(session, tracking_number, carrier_lower)
-            if result and result.get('status') == 'success':
-                self._record_success(carrier_lower)
-                return result
-            
-            # Try advanced anti-bot bypass methods
-            result = await self._try_advanced_anti_bot_bypass(session, tracking_number, carrier_lower)
-            if result and result.get('status') == 'success':
-                self._record_success(carrier_lower)
-                return result
-            
-            # Try different tracking methods
-            result = await self._try_direct_endpoints(session, tracking_number, carrier_lower)
-            if result and result.get('status') == 'success':
-                self._record_success(carrier_lower)
-                return result
-            
-            result = await self._try_form_submission(session, tracking_number, carrier_lower)
-            if result and result.get('status') == 'success':
-                self._record_success(carrier_lower)
-                return result
-            
-            result = await self._try_api_endpoints(session, tracking_number, carrier_lower)
-            if result and result.get('status') == 'success':
-                self._record_success(carrier_lower)
-                return result
-            
-            # Try alternative data sources
-            result = await self._try_alternative_data_sources(session, tracking_number, carrier_lower)
-            if result and result.get('status') == 'success':
+            # Race the strategies best-first for this carrier, hedging slow ones and cancelling the rest on success
+            tracker_name = type(self).__name__
+            strategies = [
+                (name, functools.partial(getattr(self, f'_try_{name}'), session, tracking_number, carrier_lower))
+                for name in strategy_scorer.order(tracker_name, carrier_lower, list(self.STRATEGIES))
+            ]
+            execution = await self.strategy_executor.run(
+                strategies,
+                is_success=lambda result: bool(result) and result.get('status') == 'success',
+                on_outcome=lambda attempt: strategy_scorer.record_attempt(tracker_name, carrier_lower, attempt)
+            )
+            if execution['strategy']:
+                self.logger.info(f"🏁 {execution['strategy']} won for {tracking_number} "
+                                 f"after {len(execution['attempts'])} strategies")
                 self._record_success(carrier_lower)
-                return result
+                return execution['result']
             
             # All methods failed - return failure instead of simulation
             processing_time = time.time() - start_time
@@ -330,7 +301,7 @@ class CloudNativeTracker:
             guidance = carrier_guidance.get(carrier_lower, 'Try tracking directly on the carrier website')
             
             # Enhanced error information for debugging cloud deployment
-            methods_attempted = ['direct_endpoints', 'form_submission', 'api_endpoints']
+            methods_attempted = [attempt['strategy'] for attempt in execution['attempts']]
             
             # Log additional debugging info for cloud deployment
             self.logger.info(f"❌ All methods failed for {carrier_lower} - {tracking_number}")
@@ -379,9 +350,6 @@ class CloudNativeTracker:
                 url = endpoint.format(tracking_number)
                 self.logger.info(f"🔍 Trying direct endpoint: {url}")
                 
-                # Add realistic delay
-                await asyncio.sleep(random.uniform(1, 3))
-                
                 async with session.get(url) as response:
                     self.logger.info(f"📊 Direct endpoint response: {response.status} for {url}")
                     
@@ -413,7 +381,7 @@ class CloudNativeTracker:
                                     parsed_result = await self._parse_tracking_response(content, tracking_number, carrier, 'direct_endpoint_fallback')
                                     if parsed_result:
                                         return parsed_result
-                        except:
+                        except Exception:
                             pass
                         self.logger.warning(f"⚠️ Direct endpoint failed with status {response.status}: {url}")
                     else:
@@ -732,9 +700,6 @@ class CloudNativeTracker:
         try:
             self.logger.info(f"📝 Trying form submission for {carrier}: {config['url']}")
             
-            # Add realistic delay
-            await asyncio.sleep(random.uniform(2, 4))
-            
             # First get the form page to extract any CSRF tokens and hidden fields
             async with session.get(config['url']) as response:
                 self.logger.info(f"📊 Form page response: {response.status} for {config['url']}")
@@ -806,7 +771,7 @@ class CloudNativeTracker:
                                     parsed_result = await self._parse_tracking_response(content, tracking_number, carrier, 'form_submission_fallback')
                                     if parsed_result:
                                         return parsed_result
-                        except:
+                        except Exception:
                             pass
                         self.logger.warning(f"⚠️ Form submission failed with status {response.status} for {carrier}")
                     else:
@@ -866,9 +831,6 @@ class CloudNativeTracker:
         
         for config in configs:
             try:
-                # Add realistic delay
-                await asyncio.sleep(random.uniform(1, 2))
-                
                 if config['method'] == 'GET':
                     async with session.get(config['url'], params=config.get('params', {})) as response:
                         if response.status == 200:
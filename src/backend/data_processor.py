@@ -1632,19 +1632,17 @@ class DataProcessor:
         
         try:
             # Update the most recent interaction with processing results
-            conn = db_manager.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                UPDATE mapping_interactions 
-                SET processing_success_rate = ?
-                WHERE session_id = ?
-                ORDER BY timestamp DESC
-                LIMIT 1
-            ''', (processing_success_rate, session_id))
-            
-            conn.commit()
-            conn.close()
+            with db_manager.transaction() as cursor:
+                cursor.execute('''
+                    UPDATE mapping_interactions 
+                    SET processing_success_rate = ?
+                    WHERE id = (
+                        SELECT id FROM mapping_interactions
+                        WHERE session_id = ?
+                        ORDER BY timestamp DESC
+                        LIMIT 1
+                    )
+                ''', (processing_success_rate, session_id))
             
         except Exception as e:
             self.logger.error(f"Error updating learning with processing results: {e}")
@@ -1790,21 +1788,32 @@ class DataProcessor:
             self.logger.error(f"Error cleaning up learning data: {e}")
             return {'cleaned_count': 0, 'error': str(e)}
 
-    def identify_pro_numbers(self, df: pd.DataFrame, field_mappings: Dict[str, str]) -> List[Dict[str, Any]]:
+    def identify_pro_numbers(self, df: pd.DataFrame, field_mappings: Dict[str, str],
+                             db_manager=None, brokerage_name: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Identify PRO numbers in the data for tracking integration.
         
         Args:
             df: DataFrame containing the data
             field_mappings: Field mappings from CSV to API
+            db_manager: Optional database manager whose tracking history guides carrier detection
+            brokerage_name: Optional brokerage whose own tracking history is preferred
             
         Returns:
             List of dictionaries containing PRO number information
         """
-        from .carrier_detection import detect_carrier_from_pro
+        from .carrier_detection import detect_carriers_from_pros
         
         pro_numbers = []
         
+        # Carriers that actually returned data for similar PROs take precedence over patterns
+        attribution = None
+        if db_manager:
+            try:
+                attribution = db_manager.get_carrier_attribution_index(brokerage_name)
+            except Exception as e:
+                self.logger.warning(f"Could not load carrier attribution index: {e}")
+        
         # Look for PRO numbers in the mapped fields
         pro_field_mappings = {
             field: column for field, column in field_mappings.items() 
@@ -1815,12 +1824,17 @@ class DataProcessor:
         if not pro_field_mappings:
             pro_field_mappings = self._find_pro_number_columns(df)
         
-        # Process each PRO number field
+        # Load IDs come from the same column for every PRO field
+        load_column = field_mappings.get('load.loadNumber')
+        if load_column not in df.columns:
+            load_column = None
+        
+        # Process each PRO number field, detecting carriers for the whole column in one batch
         for field, column_name in pro_field_mappings.items():
             if column_name in df.columns:
-                for index, row in df.iterrows():
-                    pro_value = row[column_name]
-                    
+                candidates = []
+                load_values = df[load_column].tolist() if load_column is not None else [None] * len(df)
+                for index, pro_value, load_value in zip(df.index, df[column_name].tolist(), load_values):
                     # Skip empty values
                     if pd.isna(pro_value) or not str(pro_value).strip():
                         continue
@@ -1829,26 +1843,26 @@ class DataProcessor:
                     
                     # Validate PRO number format
                     if self._is_valid_pro_number(pro_number):
-                        # Try to detect carrier
-                        carrier_info = detect_carrier_from_pro(pro_number)
-                        
                         # Get load ID if available
-                        load_id = None
-                        if 'load.loadNumber' in field_mappings:
-                            load_column = field_mappings['load.loadNumber']
-                            if load_column in df.columns:
-                                load_id = str(row[load_column]) if pd.notna(row[load_column]) else None
-                        
-                        pro_info = {
-                            'pro_number': pro_number,
-                            'carrier_name': carrier_info.get('carrier_name', 'Unknown') if carrier_info else 'Unknown',
-                            'carrier_code': carrier_info.get('carrier_code', 'unknown') if carrier_info else 'unknown',
-                            'load_id': load_id,
-                            'row_index': index,
-                            'source_column': column_name,
-                            'tracking_url': carrier_info.get('tracking_url') if carrier_info else None
-                        }
-                        pro_numbers.append(pro_info)
+                        load_id = str(load_value) if load_column is not None and pd.notna(load_value) else None
+                        candidates.append((index, pro_number, load_id))
+                
+                carrier_infos = detect_carriers_from_pros((pro_number for _, pro_number, _ in candidates), attribution)
+                
+                for (index, pro_number, load_id), carrier_info in zip(candidates, carrier_infos):
+                    
+                    pro_info = {
+                        'pro_number': pro_number,
+                        'carrier_name': carrier_info.get('carrier_name', 'Unknown') if carrier_info else 'Unknown',
+                        'carrier_code': carrier_info.get('carrier_code', 'unknown') if carrier_info else 'unknown',
+                        'load_id': load_id,
+                        'row_index': index,
+                        'source_column': column_name,
+                        'tracking_url': carrier_info.get('tracking_url') if carrier_info else None,
+                        # Set when the PRO fails its carrier check digit and should not be tracked
+                        'validation_error': carrier_info.get('validation_error') if carrier_info else None
+                    }
+                    pro_numbers.append(pro_info)
         
         return pro_numbers
     
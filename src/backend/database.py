@@ -1,333 +1,1010 @@
 import sqlite3
 import json
 import os
+import io
+import re
+import csv
 import shutil
 import zipfile
 import hashlib
+import gzip
+import zlib
+import struct
+import threading
+import time
+import copy
+import queue
+import atexit
+import asyncio
+import sys
+from concurrent.futures import Future
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 from datetime import datetime
 from cryptography.fernet import Fernet
 import logging
 from typing import Optional
 
+from .carrier_detection import ATTRIBUTION_PREFIX_LENGTH
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Rows indexed by the error_search FTS5 table: (table, rowid code, SELECT body over alias src).
+# Index rowids are source id * 4 + code, so delete triggers can remove entries by rowid.
+ERROR_SEARCH_SOURCES = [
+    ('processing_errors', 1, '''
+        SELECT src.id * 4 + 1, TRIM(COALESCE(src.error_type, '') || ' ' || COALESCE(src.error_message, '') || ' ' ||
+                                    COALESCE(src.suggested_fix, '')),
+               src.original_value, src.field_name, NULL, h.filename, 'processing_error', src.id,
+               src.upload_history_id, h.brokerage_name, src.created_at
+        FROM processing_errors src
+        LEFT JOIN upload_history h ON h.id = src.upload_history_id
+        WHERE 1 = 1'''),
+    ('tracking_results', 2, '''
+        SELECT src.id * 4 + 2, src.error_message, NULL, NULL, tr.pro_number, h.filename, 'tracking_failure', src.id,
+               tr.upload_history_id, h.brokerage_name, src.scrape_timestamp
+        FROM tracking_results src
+        LEFT JOIN tracking_requests tr ON tr.id = src.tracking_request_id
+        LEFT JOIN upload_history h ON h.id = tr.upload_history_id
+        WHERE LENGTH(TRIM(src.error_message)) > 0'''),
+    ('upload_history', 3, '''
+        SELECT src.id * 4 + 3,
+               COALESCE(src.error_log, (SELECT payload_text(codec, data) FROM payload_blobs WHERE hash = src.error_log_hash)),
+               NULL, NULL, NULL, src.filename, 'upload', src.id, src.id, src.brokerage_name, src.upload_timestamp
+        FROM upload_history src
+        WHERE (src.error_log IS NOT NULL OR src.error_log_hash IS NOT NULL)'''),
+]
+ERROR_SEARCH_COLUMNS = ('rowid, message, original_value, field_name, pro_number, filename, source, source_id, '
+                        'upload_history_id, brokerage_name, created_at')
+
+# Successful tracking results counted by carrier_attribution, over alias src. Each result counts
+# once for all brokerages (brokerage_name '') and once for the brokerage that uploaded it.
+CARRIER_ATTRIBUTION_UPSERT = f'''
+    INSERT INTO carrier_attribution
+    (brokerage_name, pro_length, pro_prefix, carrier_code, carrier_name, last_success_at)
+    SELECT CASE WHEN scope.per_brokerage THEN h.brokerage_name ELSE '' END,
+           LENGTH(normalize_pro(tr.pro_number)), SUBSTR(normalize_pro(tr.pro_number), 1, {ATTRIBUTION_PREFIX_LENGTH}),
+           carrier_key(tr.carrier_name), tr.carrier_name, src.scrape_timestamp
+    FROM tracking_results src
+    JOIN tracking_requests tr ON tr.id = src.tracking_request_id
+    LEFT JOIN upload_history h ON h.id = tr.upload_history_id
+    JOIN (SELECT 0 AS per_brokerage UNION ALL SELECT 1) scope
+    WHERE src.scrape_success AND normalize_pro(tr.pro_number) != ''
+      AND carrier_key(tr.carrier_name) NOT IN ('unknown', 'unknown_carrier', 'auto_detect')
+      AND (scope.per_brokerage = 0 OR COALESCE(h.brokerage_name, '') != '')
+      {{condition}}
+    ON CONFLICT(brokerage_name, pro_length, pro_prefix, carrier_code) DO UPDATE SET
+        carrier_name = excluded.carrier_name,
+        success_count = success_count + 1,
+        last_success_at = MAX(COALESCE(last_success_at, ''), excluded.last_success_at)'''
+
+# Versioned schema migrations applied in order on top of the base tables.
+# Each entry is (version, description, statements); never edit a released entry, append a new one.
+SCHEMA_MIGRATIONS = [
+    (1, 'Indexes for tracking, history, error and learning lookups', [
+        'CREATE INDEX IF NOT EXISTS idx_tracking_results_request ON tracking_results (tracking_request_id)',
+        'CREATE INDEX IF NOT EXISTS idx_tracking_requests_upload ON tracking_requests (upload_history_id, pro_number)',
+        'CREATE INDEX IF NOT EXISTS idx_tracking_requests_status ON tracking_requests (status, request_timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_upload_history_brokerage ON upload_history (brokerage_name, upload_timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_upload_history_timestamp ON upload_history (upload_timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_processing_errors_upload ON processing_errors (upload_history_id)',
+        'CREATE INDEX IF NOT EXISTS idx_brokerage_patterns_ranking ON brokerage_patterns '
+        '(brokerage_name, success_count DESC, average_confidence DESC)',
+        'CREATE INDEX IF NOT EXISTS idx_mapping_interactions_brokerage ON mapping_interactions (brokerage_name, timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_integration_history_integration ON integration_execution_history '
+        '(integration_id, execution_timestamp)',
+    ]),
+    (2, 'Backup chains and compression metadata', [
+        'ALTER TABLE backup_history ADD COLUMN parent_backup TEXT',
+        'ALTER TABLE backup_history ADD COLUMN compression TEXT',
+    ]),
+    (3, 'Analytics summary tables maintained by triggers', [
+        '''CREATE TABLE IF NOT EXISTS table_row_counts (
+            table_name TEXT PRIMARY KEY,
+            row_count INTEGER NOT NULL DEFAULT 0
+        )''',
+        '''CREATE TABLE IF NOT EXISTS upload_daily_stats (
+            brokerage_name TEXT NOT NULL,
+            day DATE NOT NULL,
+            uploads INTEGER NOT NULL DEFAULT 0,
+            total_records INTEGER NOT NULL DEFAULT 0,
+            successful_records INTEGER NOT NULL DEFAULT 0,
+            failed_records INTEGER NOT NULL DEFAULT 0,
+            processing_time_seconds REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (brokerage_name, day)
+        )''',
+        '''CREATE TABLE IF NOT EXISTS mapping_daily_stats (
+            brokerage_name TEXT NOT NULL,
+            day DATE NOT NULL,
+            interactions INTEGER NOT NULL DEFAULT 0,
+            suggestions_accepted INTEGER NOT NULL DEFAULT 0,
+            manual_corrections INTEGER NOT NULL DEFAULT 0,
+            success_rate_sum REAL NOT NULL DEFAULT 0,
+            success_rate_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (brokerage_name, day)
+        )''',
+    ] + [
+        statement
+        for table in ('customer_mappings', 'upload_history', 'backup_history', 'brokerage_configurations',
+                      'mapping_interactions', 'brokerage_patterns')
+        for statement in (
+            f"INSERT OR REPLACE INTO table_row_counts (table_name, row_count) SELECT '{table}', COUNT(*) FROM {table}",
+            f'''CREATE TRIGGER IF NOT EXISTS trg_{table}_count_insert AFTER INSERT ON {table} BEGIN
+                UPDATE table_row_counts SET row_count = row_count + 1 WHERE table_name = '{table}';
+            END''',
+            f'''CREATE TRIGGER IF NOT EXISTS trg_{table}_count_delete AFTER DELETE ON {table} BEGIN
+                UPDATE table_row_counts SET row_count = row_count - 1 WHERE table_name = '{table}';
+            END''',
+        )
+    ] + [
+        '''INSERT OR REPLACE INTO upload_daily_stats
+           SELECT brokerage_name, DATE(upload_timestamp), COUNT(*), COALESCE(SUM(total_records), 0),
+                  COALESCE(SUM(successful_records), 0), COALESCE(SUM(failed_records), 0),
+                  COALESCE(SUM(processing_time_seconds), 0)
+           FROM upload_history GROUP BY brokerage_name, DATE(upload_timestamp)''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_upload_stats_insert AFTER INSERT ON upload_history BEGIN
+            INSERT INTO upload_daily_stats (brokerage_name, day, uploads, total_records, successful_records,
+                                            failed_records, processing_time_seconds)
+            VALUES (NEW.brokerage_name, DATE(NEW.upload_timestamp), 1, COALESCE(NEW.total_records, 0),
+                    COALESCE(NEW.successful_records, 0), COALESCE(NEW.failed_records, 0),
+                    COALESCE(NEW.processing_time_seconds, 0))
+            ON CONFLICT (brokerage_name, day) DO UPDATE SET
+                uploads = uploads + 1,
+                total_records = total_records + excluded.total_records,
+                successful_records = successful_records + excluded.successful_records,
+                failed_records = failed_records + excluded.failed_records,
+                processing_time_seconds = processing_time_seconds + excluded.processing_time_seconds;
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_upload_stats_delete AFTER DELETE ON upload_history BEGIN
+            UPDATE upload_daily_stats SET
+                uploads = uploads - 1,
+                total_records = total_records - COALESCE(OLD.total_records, 0),
+                successful_records = successful_records - COALESCE(OLD.successful_records, 0),
+                failed_records = failed_records - COALESCE(OLD.failed_records, 0),
+                processing_time_seconds = processing_time_seconds - COALESCE(OLD.processing_time_seconds, 0)
+            WHERE brokerage_name = OLD.brokerage_name AND day = DATE(OLD.upload_timestamp);
+            DELETE FROM upload_daily_stats WHERE uploads <= 0;
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_upload_stats_update AFTER UPDATE ON upload_history BEGIN
+            UPDATE upload_daily_stats SET
+                uploads = uploads - 1,
+                total_records = total_records - COALESCE(OLD.total_records, 0),
+                successful_records = successful_records - COALESCE(OLD.successful_records, 0),
+                failed_records = failed_records - COALESCE(OLD.failed_records, 0),
+                processing_time_seconds = processing_time_seconds - COALESCE(OLD.processing_time_seconds, 0)
+            WHERE brokerage_name = OLD.brokerage_name AND day = DATE(OLD.upload_timestamp);
+            INSERT INTO upload_daily_stats (brokerage_name, day, uploads, total_records, successful_records,
+                                            failed_records, processing_time_seconds)
+            VALUES (NEW.brokerage_name, DATE(NEW.upload_timestamp), 1, COALESCE(NEW.total_records, 0),
+                    COALESCE(NEW.successful_records, 0), COALESCE(NEW.failed_records, 0),
+                    COALESCE(NEW.processing_time_seconds, 0))
+            ON CONFLICT (brokerage_name, day) DO UPDATE SET
+                uploads = uploads + 1,
+                total_records = total_records + excluded.total_records,
+                successful_records = successful_records + excluded.successful_records,
+                failed_records = failed_records + excluded.failed_records,
+                processing_time_seconds = processing_time_seconds + excluded.processing_time_seconds;
+            DELETE FROM upload_daily_stats WHERE uploads <= 0;
+        END''',
+        '''INSERT OR REPLACE INTO mapping_daily_stats
+           SELECT brokerage_name, DATE(timestamp), COUNT(*), COALESCE(SUM(suggestions_accepted), 0),
+                  COALESCE(SUM(manual_corrections), 0), COALESCE(SUM(processing_success_rate), 0),
+                  COUNT(processing_success_rate)
+           FROM mapping_interactions GROUP BY brokerage_name, DATE(timestamp)''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_mapping_stats_insert AFTER INSERT ON mapping_interactions BEGIN
+            INSERT INTO mapping_daily_stats (brokerage_name, day, interactions, suggestions_accepted,
+                                             manual_corrections, success_rate_sum, success_rate_count)
+            VALUES (NEW.brokerage_name, DATE(NEW.timestamp), 1, COALESCE(NEW.suggestions_accepted, 0),
+                    COALESCE(NEW.manual_corrections, 0), COALESCE(NEW.processing_success_rate, 0),
+                    NEW.processing_success_rate IS NOT NULL)
+            ON CONFLICT (brokerage_name, day) DO UPDATE SET
+                interactions = interactions + 1,
+                suggestions_accepted = suggestions_accepted + excluded.suggestions_accepted,
+                manual_corrections = manual_corrections + excluded.manual_corrections,
+                success_rate_sum = success_rate_sum + excluded.success_rate_sum,
+                success_rate_count = success_rate_count + excluded.success_rate_count;
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_mapping_stats_delete AFTER DELETE ON mapping_interactions BEGIN
+            UPDATE mapping_daily_stats SET
+                interactions = interactions - 1,
+                suggestions_accepted = suggestions_accepted - COALESCE(OLD.suggestions_accepted, 0),
+                manual_corrections = manual_corrections - COALESCE(OLD.manual_corrections, 0),
+                success_rate_sum = success_rate_sum - COALESCE(OLD.processing_success_rate, 0),
+                success_rate_count = success_rate_count - (OLD.processing_success_rate IS NOT NULL)
+            WHERE brokerage_name = OLD.brokerage_name AND day = DATE(OLD.timestamp);
+            DELETE FROM mapping_daily_stats WHERE interactions <= 0;
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_mapping_stats_update AFTER UPDATE ON mapping_interactions BEGIN
+            UPDATE mapping_daily_stats SET
+                interactions = interactions - 1,
+                suggestions_accepted = suggestions_accepted - COALESCE(OLD.suggestions_accepted, 0),
+                manual_corrections = manual_corrections - COALESCE(OLD.manual_corrections, 0),
+                success_rate_sum = success_rate_sum - COALESCE(OLD.processing_success_rate, 0),
+                success_rate_count = success_rate_count - (OLD.processing_success_rate IS NOT NULL)
+            WHERE brokerage_name = OLD.brokerage_name AND day = DATE(OLD.timestamp);
+            INSERT INTO mapping_daily_stats (brokerage_name, day, interactions, suggestions_accepted,
+                                             manual_corrections, success_rate_sum, success_rate_count)
+            VALUES (NEW.brokerage_name, DATE(NEW.timestamp), 1, COALESCE(NEW.suggestions_accepted, 0),
+                    COALESCE(NEW.manual_corrections, 0), COALESCE(NEW.processing_success_rate, 0),
+                    NEW.processing_success_rate IS NOT NULL)
+            ON CONFLICT (brokerage_name, day) DO UPDATE SET
+                interactions = interactions + 1,
+                suggestions_accepted = suggestions_accepted + excluded.suggestions_accepted,
+                manual_corrections = manual_corrections + excluded.manual_corrections,
+                success_rate_sum = success_rate_sum + excluded.success_rate_sum,
+                success_rate_count = success_rate_count + excluded.success_rate_count;
+            DELETE FROM mapping_daily_stats WHERE interactions <= 0;
+        END''',
+    ]),
+    (4, 'Content-addressed payload blobs for scraped data and error logs', [
+        '''CREATE TABLE IF NOT EXISTS payload_blobs (
+            hash TEXT PRIMARY KEY,
+            codec TEXT NOT NULL,
+            data BLOB NOT NULL,
+            raw_size INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_referenced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_payload_blobs_referenced ON payload_blobs (last_referenced_at)',
+        'ALTER TABLE tracking_results ADD COLUMN scraped_data_hash TEXT',
+        'ALTER TABLE upload_history ADD COLUMN error_log_hash TEXT',
+    ]),
+    (5, 'Latest-status shipments and deduplicated shipment events', [
+        '''CREATE TABLE IF NOT EXISTS shipments (
+            carrier_code TEXT NOT NULL,
+            pro_number TEXT NOT NULL,
+            carrier_name TEXT,
+            latest_status TEXT,
+            latest_location TEXT,
+            latest_event TEXT,
+            event_time TEXT,
+            last_checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_success_at TIMESTAMP,
+            last_tracking_result_id INTEGER,
+            check_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (carrier_code, pro_number)
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_shipments_pro ON shipments (pro_number)',
+        'CREATE INDEX IF NOT EXISTS idx_shipments_checked ON shipments (last_checked_at)',
+        '''CREATE TABLE IF NOT EXISTS shipment_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            carrier_code TEXT NOT NULL,
+            pro_number TEXT NOT NULL,
+            event_hash TEXT NOT NULL UNIQUE,
+            status TEXT,
+            location TEXT,
+            event TEXT,
+            event_time TEXT,
+            tracking_result_id INTEGER,
+            first_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_shipment_events_shipment ON shipment_events (carrier_code, pro_number, id)',
+        # Backfill from existing results, newest first so the latest successful scrape wins
+        '''INSERT OR IGNORE INTO shipments
+           (carrier_code, pro_number, carrier_name, latest_status, latest_location, latest_event, event_time,
+            last_checked_at, last_success_at, last_tracking_result_id, check_count)
+           SELECT carrier_key(tr.carrier_name), normalize_pro(tr.pro_number), tr.carrier_name,
+                  trs.tracking_status, trs.tracking_location, trs.tracking_event, trs.tracking_timestamp,
+                  trs.scrape_timestamp, trs.scrape_timestamp, trs.id, 1
+           FROM tracking_results trs
+           JOIN tracking_requests tr ON tr.id = trs.tracking_request_id
+           WHERE trs.scrape_success AND normalize_pro(tr.pro_number) != ''
+           ORDER BY trs.id DESC''',
+        '''INSERT OR IGNORE INTO shipment_events
+           (carrier_code, pro_number, event_hash, status, location, event, event_time, tracking_result_id,
+            first_seen_at)
+           SELECT carrier_key(tr.carrier_name), normalize_pro(tr.pro_number),
+                  shipment_event_hash(carrier_key(tr.carrier_name), normalize_pro(tr.pro_number),
+                                      trs.tracking_status, trs.tracking_location, trs.tracking_event,
+                                      trs.tracking_timestamp),
+                  trs.tracking_status, trs.tracking_location, trs.tracking_event, trs.tracking_timestamp,
+                  trs.id, trs.scrape_timestamp
+           FROM tracking_results trs
+           JOIN tracking_requests tr ON tr.id = trs.tracking_request_id
+           WHERE trs.scrape_success AND normalize_pro(tr.pro_number) != ''
+           ORDER BY trs.id''',
+    ]),
+    (6, 'Full-text search over processing errors, tracking failures and upload logs', [
+        '''CREATE VIRTUAL TABLE IF NOT EXISTS error_search USING fts5(
+            message, original_value, field_name, pro_number, filename,
+            source UNINDEXED, source_id UNINDEXED, upload_history_id UNINDEXED,
+            brokerage_name UNINDEXED, created_at UNINDEXED
+        )''',
+    ] + [
+        statement
+        for table, code, select in ERROR_SEARCH_SOURCES
+        for statement in (
+            f'INSERT INTO error_search ({ERROR_SEARCH_COLUMNS}) {select}',
+            f'''CREATE TRIGGER IF NOT EXISTS trg_{table}_search_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO error_search ({ERROR_SEARCH_COLUMNS}) {select} AND src.id = NEW.id;
+            END''',
+            f'''CREATE TRIGGER IF NOT EXISTS trg_{table}_search_delete AFTER DELETE ON {table} BEGIN
+                DELETE FROM error_search WHERE rowid = OLD.id * 4 + {code};
+            END''',
+            f'''CREATE TRIGGER IF NOT EXISTS trg_{table}_search_update AFTER UPDATE ON {table} BEGIN
+                DELETE FROM error_search WHERE rowid = OLD.id * 4 + {code};
+                INSERT INTO error_search ({ERROR_SEARCH_COLUMNS}) {select} AND src.id = NEW.id;
+            END''',
+        )
+    ]),
+    (7, 'Learned carrier attribution by PRO prefix, length and brokerage', [
+        '''CREATE TABLE IF NOT EXISTS carrier_attribution (
+            brokerage_name TEXT NOT NULL,
+            pro_length INTEGER NOT NULL,
+            pro_prefix TEXT NOT NULL,
+            carrier_code TEXT NOT NULL,
+            carrier_name TEXT,
+            success_count INTEGER NOT NULL DEFAULT 1,
+            last_success_at TIMESTAMP,
+            PRIMARY KEY (brokerage_name, pro_length, pro_prefix, carrier_code)
+        )''',
+        CARRIER_ATTRIBUTION_UPSERT.format(condition=''),
+        f'''CREATE TRIGGER IF NOT EXISTS trg_tracking_results_attribution AFTER INSERT ON tracking_results
+           WHEN NEW.scrape_success BEGIN
+            {CARRIER_ATTRIBUTION_UPSERT.format(condition='AND src.id = NEW.id')};
+        END''',
+    ]),
+    (8, 'Tracking result cache with status-dependent expiry', [
+        '''CREATE TABLE IF NOT EXISTS tracking_cache (
+            namespace TEXT NOT NULL,
+            carrier_code TEXT NOT NULL,
+            pro_number TEXT NOT NULL,
+            status_class TEXT NOT NULL,
+            result TEXT NOT NULL,
+            cached_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            PRIMARY KEY (namespace, carrier_code, pro_number)
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_tracking_cache_expires ON tracking_cache (expires_at)',
+    ]),
+    (9, 'Decayed per-carrier success and latency scores for tracking strategies', [
+        '''CREATE TABLE IF NOT EXISTS strategy_scores (
+            tracker TEXT NOT NULL,
+            carrier_code TEXT NOT NULL,
+            strategy TEXT NOT NULL,
+            attempts REAL NOT NULL DEFAULT 0,
+            successes REAL NOT NULL DEFAULT 0,
+            latency_seconds REAL,
+            consecutive_failures INTEGER NOT NULL DEFAULT 0,
+            skipped_until REAL NOT NULL DEFAULT 0,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (tracker, carrier_code, strategy)
+        )''',
+    ]),
+]
+SCHEMA_VERSION = SCHEMA_MIGRATIONS[-1][0]
+
+# Databases whose schema is already at SCHEMA_VERSION in this process, keyed by absolute path
+_initialized_databases = set()
+_schema_init_lock = threading.Lock()
+
+# Write-behind queues, one per database file, created by DatabaseManager.get_write_queue()
+_write_queues = {}
+_write_queues_lock = threading.Lock()
+
+# Per-method query statistics and recent slow statements, shared by every DatabaseManager in the process
+_query_stats = {}
+_slow_queries = deque(maxlen=100)
+_query_stats_lock = threading.Lock()
+
+# Statements before which sqlite3 opens a write transaction implicitly
+_WRITE_STATEMENT = re.compile(r'^\s*(INSERT|UPDATE|DELETE|REPLACE)\b', re.IGNORECASE)
+
+# Fernet cipher built once per process from the first key resolved by _get_encryption_key()
+_cipher = None
+_cipher_lock = threading.Lock()
+
+# Decoded brokerage configurations, keyed by (database path, brokerage name, configuration name or None for the list)
+_configuration_cache = OrderedDict()
+_configuration_cache_lock = threading.Lock()
+
+# Tables carried by data exports: (table, exported columns, insert verb used on import).
+# Ids are only kept where other exported rows reference them.
+EXPORT_TABLES = [
+    ('customer_mappings', ['customer_name', 'field_mappings', 'created_at', 'updated_at'], 'INSERT OR IGNORE'),
+    ('upload_history', ['brokerage_name', 'configuration_name', 'filename', 'total_records', 'successful_records',
+                        'failed_records', 'error_log', 'processing_time_seconds', 'file_headers',
+                        'upload_timestamp', 'session_id'], 'INSERT'),
+    ('mapping_interactions', ['id', 'session_id', 'brokerage_name', 'configuration_name', 'timestamp',
+                              'file_headers', 'suggested_mappings', 'final_mappings', 'suggestions_accepted',
+                              'manual_corrections', 'processing_success_rate', 'total_fields',
+                              'user_satisfaction'], 'INSERT OR REPLACE'),
+    ('mapping_decisions', ['interaction_id', 'column_name', 'column_sample_data', 'column_data_type',
+                           'suggested_field', 'suggested_confidence', 'actual_field', 'decision_type',
+                           'decision_timestamp'], 'INSERT OR REPLACE'),
+    ('brokerage_patterns', ['brokerage_name', 'column_pattern', 'api_field', 'success_count', 'total_count',
+                            'average_confidence', 'data_type_pattern', 'sample_values', 'last_updated'],
+     'INSERT OR REPLACE'),
+]
+
+# Exported columns whose value may live in payload_blobs rather than inline
+EXPORT_COLUMN_SQL = {
+    ('upload_history', 'error_log'):
+        'COALESCE(error_log, (SELECT payload_text(codec, data) FROM payload_blobs WHERE hash = error_log_hash))',
+}
+
+# Values supplied on import for NOT NULL columns that are deliberately left out of exports
+IMPORT_DEFAULTS = {
+    'customer_mappings': {'api_credentials': json.dumps({'base_url': '', 'api_key': ''})},
+}
+
+# Hot read paths checked by DatabaseManager.check_query_plans(); each should be served by an index
+INDEXED_QUERIES = {
+    'tracking_results_for_upload': (
+        'SELECT tr.pro_number, trs.tracking_status FROM tracking_requests tr '
+        'LEFT JOIN tracking_results trs ON tr.id = trs.tracking_request_id '
+        'WHERE tr.upload_history_id = ? ORDER BY tr.pro_number', (1,)),
+    'tracking_requests_by_status': (
+        'SELECT id FROM tracking_requests WHERE status = ? ORDER BY request_timestamp', ('pending',)),
+    'brokerage_upload_history': (
+        'SELECT h.id, COUNT(e.id) FROM upload_history h '
+        'LEFT JOIN processing_errors e ON h.id = e.upload_history_id '
+        'WHERE h.brokerage_name = ? GROUP BY h.id ORDER BY h.upload_timestamp DESC LIMIT 50', ('',)),
+    'upload_history': (
+        'SELECT * FROM upload_history ORDER BY upload_timestamp DESC LIMIT 50', ()),
+    'brokerage_patterns': (
+        'SELECT api_field FROM brokerage_patterns WHERE brokerage_name = ? '
+        'ORDER BY success_count DESC, average_confidence DESC', ('',)),
+    'processing_errors_for_upload': (
+        'SELECT * FROM processing_errors WHERE upload_history_id = ?', (1,)),
+    'integration_execution_history': (
+        'SELECT id FROM integration_execution_history WHERE integration_id = ? '
+        'ORDER BY execution_timestamp DESC LIMIT 50', (1,)),
+    'upload_history_page': (
+        'SELECT id FROM upload_history WHERE brokerage_name = ? AND (upload_timestamp, id) < (?, ?) '
+        'ORDER BY upload_timestamp DESC, id DESC LIMIT 51', ('', '9999', 0)),
+    'shipment_by_pro': (
+        'SELECT latest_status FROM shipments WHERE pro_number = ? ORDER BY last_checked_at DESC LIMIT 1', ('',)),
+    'shipment_events': (
+        'SELECT status FROM shipment_events WHERE carrier_code = ? AND pro_number = ? ORDER BY id DESC', ('', '')),
+    'carrier_attribution': (
+        "SELECT carrier_code, success_count FROM carrier_attribution WHERE brokerage_name IN ('', ?) "
+        'ORDER BY brokerage_name, pro_length, pro_prefix, success_count DESC', ('',)),
+    'tracking_cache': (
+        'SELECT result FROM tracking_cache WHERE namespace = ? AND carrier_code = ? AND pro_number = ? '
+        'AND expires_at > ?', ('', '', '', 0)),
+    'strategy_scores': (
+        'SELECT carrier_code, strategy, attempts FROM strategy_scores WHERE tracker = ?', ('',)),
+}
+
 class DatabaseManager:
+    # Connection tuning applied to every pooled SQLite connection
+    BUSY_TIMEOUT_MS = 30000
+    CACHE_SIZE_KB = 64 * 1024
+    MMAP_SIZE_BYTES = 256 * 1024 * 1024
+    
+    # Online backups copy this many pages per step and pause between steps so writers can proceed
+    BACKUP_PAGES_PER_STEP = 1024
+    BACKUP_STEP_SLEEP = 0.01
+    BACKUP_EXTENSIONS = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+    INCREMENTAL_FORMAT = 'ff2api-incremental-v1'
+    
+    # Data exports stream rows table by table in batches of this size
+    EXPORT_FORMAT = 'ff2api-export-v2'
+    EXPORT_BATCH_SIZE = 1000
+    
+    # Upper bound on decoded brokerage configurations kept in memory
+    CONFIGURATION_CACHE_SIZE = 256
+    
+    # Payloads at least this large are stored once in payload_blobs and referenced by hash
+    PAYLOAD_BLOB_MIN_BYTES = 512
+    PAYLOAD_RETENTION_DAYS = 90
+    
+    # Write-behind queue: group commit after this many rows or milliseconds, block producers past max pending
+    WRITE_BATCH_ROWS = 500
+    WRITE_BATCH_DELAY_MS = 50
+    WRITE_QUEUE_MAX_PENDING = 10000
+    
+    # Query instrumentation: statements slower than this are logged with their query plan
+    QUERY_INSTRUMENTATION = True
+    SLOW_QUERY_MS = 200
+    
+    # Learned carrier attribution: a brokerage's own history is used once it has this many successes
+    ATTRIBUTION_MIN_SAMPLES = 3
+    
     def __init__(self, db_path="data/freight_loader.db"):
         self.db_path = db_path
         self.backup_dir = "data/backups"
+        self._local = threading.local()
         self.init_database()
-        
-    def init_database(self):
-        """Initialize SQLite database with enhanced brokerage-centric schema"""
-        conn = sqlite3.connect(self.db_path)
+    
+    def _get_connection(self):
+        """Get this thread's persistent connection, opening and tuning it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.BUSY_TIMEOUT_MS / 1000)
+            conn.execute(f'PRAGMA busy_timeout = {self.BUSY_TIMEOUT_MS}')
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+            conn.execute(f'PRAGMA cache_size = -{self.CACHE_SIZE_KB}')
+            conn.execute(f'PRAGMA mmap_size = {self.MMAP_SIZE_BYTES}')
+            conn.execute('PRAGMA temp_store = MEMORY')
+            # INSERT OR REPLACE must fire delete triggers so the analytics summaries stay exact
+            conn.execute('PRAGMA recursive_triggers = ON')
+            conn.create_function('payload_text', 2, _decompress_payload, deterministic=True)
+            conn.create_function('normalize_pro', 1, _normalize_pro_number, deterministic=True)
+            conn.create_function('carrier_key', 1, _carrier_key, deterministic=True)
+            conn.create_function('shipment_event_hash', 6, _shipment_event_hash, deterministic=True)
+            self._local.conn = conn
+            self._local.depth = 0
+        return conn
+    
+    @contextmanager
+    def transaction(self):
+        """Yield a cursor on this thread's connection, committing on success and rolling back on error.
+        
+        Nested calls run inside the outermost transaction, which alone commits. Each nested call
+        is a savepoint, so an error inside it (even one its caller catches) undoes only its own writes.
+        """
+        conn = self._get_connection()
         cursor = conn.cursor()
+        if self.QUERY_INSTRUMENTATION:
+            # Attribute the work to the DatabaseManager method that opened this transaction
+            cursor = _InstrumentedCursor(cursor, self, sys._getframe(2).f_code.co_name)
+        self._local.depth += 1
+        savepoint = f'nested_{self._local.depth}' if self._local.depth > 1 else None
+        try:
+            if savepoint:
+                # A savepoint outside a transaction would commit on release, so open the outer one first
+                if not conn.in_transaction:
+                    conn.execute('BEGIN')
+                conn.execute(f'SAVEPOINT {savepoint}')
+            yield cursor
+            if savepoint:
+                conn.execute(f'RELEASE {savepoint}')
+            else:
+                conn.commit()
+        except Exception:
+            if savepoint:
+                conn.execute(f'ROLLBACK TO {savepoint}')
+                conn.execute(f'RELEASE {savepoint}')
+            else:
+                conn.rollback()
+            raise
+        finally:
+            self._local.depth -= 1
+            cursor.close()
+    
+    def _record_query_stats(self, method, elapsed, statements, rows_read, rows_written, lock_wait):
+        """Accumulate instrumentation counters for one finished transaction of a DatabaseManager method"""
+        with _query_stats_lock:
+            stats = _query_stats.get(method)
+            if stats is None:
+                stats = _query_stats[method] = {
+                    'calls': 0, 'total_time': 0.0, 'max_time': 0.0, 'statements': 0,
+                    'rows_read': 0, 'rows_written': 0, 'lock_wait': 0.0
+                }
+            stats['calls'] += 1
+            stats['total_time'] += elapsed
+            stats['max_time'] = max(stats['max_time'], elapsed)
+            stats['statements'] += statements
+            stats['rows_read'] += rows_read
+            stats['rows_written'] += rows_written
+            stats['lock_wait'] += lock_wait
+    
+    def _log_slow_query(self, method, conn, sql, params, elapsed):
+        """Log a slow statement together with its query plan"""
+        try:
+            plan = [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params or ())]
+        except sqlite3.Error:
+            plan = []
+        
+        entry = {
+            'timestamp': datetime.now().isoformat(),
+            'method': method,
+            'sql': ' '.join(sql.split()),
+            'duration_ms': round(elapsed * 1000, 2),
+            'plan': plan
+        }
+        with _query_stats_lock:
+            _slow_queries.append(entry)
+        logging.warning(f"Slow query in {method} ({entry['duration_ms']} ms): {entry['sql']} | plan: {'; '.join(plan)}")
+    
+    def get_query_stats(self):
+        """Get per-method query statistics for this process, slowest total time first"""
+        with _query_stats_lock:
+            snapshot = [(method, dict(stats)) for method, stats in _query_stats.items()]
         
-        # Enhanced brokerage configurations table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS brokerage_configurations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                brokerage_name TEXT NOT NULL,
-                configuration_name TEXT NOT NULL,
-                field_mappings TEXT NOT NULL,
-                api_credentials TEXT NOT NULL,
-                file_headers TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_used_at TIMESTAMP,
-                version INTEGER DEFAULT 1,
-                is_active BOOLEAN DEFAULT 1,
-                description TEXT,
-                UNIQUE(brokerage_name, configuration_name)
-            )
-        ''')
-        
-        # Enhanced upload history table with better error tracking
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS upload_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                brokerage_name TEXT NOT NULL,
-                configuration_name TEXT,
-                filename TEXT NOT NULL,
-                total_records INTEGER,
-                successful_records INTEGER,
-                failed_records INTEGER,
-                error_log TEXT,
-                processing_time_seconds REAL,
-                file_headers TEXT,
-                upload_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                session_id TEXT
-            )
-        ''')
-        
-        # Processing errors table for detailed troubleshooting
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS processing_errors (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                upload_history_id INTEGER,
-                row_number INTEGER,
-                field_name TEXT,
-                error_type TEXT,
-                error_message TEXT,
-                suggested_fix TEXT,
-                original_value TEXT,
-                expected_format TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (upload_history_id) REFERENCES upload_history (id)
-            )
-        ''')
-        
-        # Configuration change log for versioning
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS configuration_changes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                configuration_id INTEGER,
-                change_type TEXT NOT NULL, -- 'created', 'updated', 'field_added', 'field_removed', 'field_modified'
-                change_description TEXT,
-                old_value TEXT,
-                new_value TEXT,
-                changed_by TEXT,
-                changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (configuration_id) REFERENCES brokerage_configurations (id)
-            )
-        ''')
-        
-        # Legacy table migration - keep old table for backward compatibility
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS customer_mappings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                customer_name TEXT UNIQUE NOT NULL,
-                field_mappings TEXT NOT NULL,
-                api_credentials TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Backup history table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS backup_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                backup_name TEXT NOT NULL,
-                backup_path TEXT NOT NULL,
-                backup_size INTEGER,
-                backup_type TEXT NOT NULL,
-                checksum TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                description TEXT
-            )
-        ''')
-        
-        # Learning system tables
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS mapping_interactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id TEXT NOT NULL,
-                brokerage_name TEXT NOT NULL,
-                configuration_name TEXT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                file_headers TEXT,
-                suggested_mappings TEXT,
-                final_mappings TEXT,
-                suggestions_accepted INTEGER DEFAULT 0,
-                manual_corrections INTEGER DEFAULT 0,
-                processing_success_rate REAL,
-                total_fields INTEGER DEFAULT 0,
-                user_satisfaction TEXT
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS mapping_decisions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                interaction_id INTEGER,
-                column_name TEXT NOT NULL,
-                column_sample_data TEXT,
-                column_data_type TEXT,
-                suggested_field TEXT,
-                suggested_confidence REAL,
-                actual_field TEXT,
-                decision_type TEXT,
-                decision_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (interaction_id) REFERENCES mapping_interactions (id)
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS brokerage_patterns (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                brokerage_name TEXT NOT NULL,
-                column_pattern TEXT NOT NULL,
-                api_field TEXT NOT NULL,
-                success_count INTEGER DEFAULT 0,
-                total_count INTEGER DEFAULT 0,
-                average_confidence REAL DEFAULT 0.0,
-                data_type_pattern TEXT,
-                sample_values TEXT,
-                last_updated DATETIME DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(brokerage_name, column_pattern, api_field)
-            )
-        ''')
-        
-        # External integrations tables
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS integration_types (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                type_name TEXT UNIQUE NOT NULL,
-                type_display_name TEXT NOT NULL,
-                description TEXT,
-                default_config TEXT,
-                is_active BOOLEAN DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS external_integrations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                brokerage_name TEXT NOT NULL,
-                integration_name TEXT NOT NULL,
-                integration_type_id INTEGER NOT NULL,
-                description TEXT,
-                config_data TEXT NOT NULL,
-                auth_credentials TEXT,
-                is_active BOOLEAN DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_used_at TIMESTAMP,
-                created_by TEXT,
-                UNIQUE(brokerage_name, integration_name),
-                FOREIGN KEY (integration_type_id) REFERENCES integration_types (id)
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS integration_data_mappings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                integration_id INTEGER NOT NULL,
-                source_field TEXT NOT NULL,
-                target_field TEXT NOT NULL,
-                transformation_rule TEXT,
-                is_required BOOLEAN DEFAULT 0,
-                default_value TEXT,
-                validation_rule TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (integration_id) REFERENCES external_integrations (id) ON DELETE CASCADE
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS integration_execution_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                integration_id INTEGER NOT NULL,
-                execution_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                execution_status TEXT NOT NULL,
-                records_processed INTEGER DEFAULT 0,
-                records_success INTEGER DEFAULT 0,
-                records_failed INTEGER DEFAULT 0,
-                execution_time_seconds REAL,
-                error_log TEXT,
-                output_file_path TEXT,
-                triggered_by TEXT,
-                session_id TEXT,
-                FOREIGN KEY (integration_id) REFERENCES external_integrations (id)
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS integration_output_configs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                integration_id INTEGER NOT NULL,
-                output_name TEXT NOT NULL,
-                output_format TEXT NOT NULL,
-                output_template TEXT,
-                output_fields TEXT,
-                file_naming_pattern TEXT,
-                schedule_config TEXT,
-                is_active BOOLEAN DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (integration_id) REFERENCES external_integrations (id) ON DELETE CASCADE
-            )
-        ''')
-        
-        # LTL Tracking tables
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS tracking_requests (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                upload_history_id INTEGER NOT NULL,
-                pro_number TEXT NOT NULL,
-                carrier_name TEXT,
-                load_id TEXT,
-                request_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                status TEXT DEFAULT 'pending',
-                FOREIGN KEY (upload_history_id) REFERENCES upload_history (id) ON DELETE CASCADE
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS tracking_results (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                tracking_request_id INTEGER NOT NULL,
-                tracking_status TEXT,
-                tracking_location TEXT,
-                tracking_event TEXT,
-                tracking_timestamp TEXT,
-                scraped_data TEXT,
-                scrape_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                scrape_success BOOLEAN DEFAULT 1,
-                error_message TEXT,
-                FOREIGN KEY (tracking_request_id) REFERENCES tracking_requests (id) ON DELETE CASCADE
-            )
-        ''')
+        return sorted(
+            (
+                {
+                    'method': method,
+                    'calls': stats['calls'],
+                    'total_ms': round(stats['total_time'] * 1000, 2),
+                    'avg_ms': round(stats['total_time'] * 1000 / stats['calls'], 2) if stats['calls'] else 0,
+                    'max_ms': round(stats['max_time'] * 1000, 2),
+                    'statements': stats['statements'],
+                    'rows_read': stats['rows_read'],
+                    'rows_written': stats['rows_written'],
+                    'lock_wait_ms': round(stats['lock_wait'] * 1000, 2)
+                }
+                for method, stats in snapshot
+            ),
+            key=lambda stats: stats['total_ms'],
+            reverse=True
+        )
+    
+    def get_slow_queries(self):
+        """Get the most recent slow statements, newest first"""
+        with _query_stats_lock:
+            return list(reversed(_slow_queries))
+    
+    def reset_query_stats(self):
+        """Clear collected query statistics and the slow query log"""
+        with _query_stats_lock:
+            _query_stats.clear()
+            _slow_queries.clear()
+    
+    def get_write_queue(self):
+        """Return the process-wide write-behind queue for this database, starting it on first use"""
+        db_key = os.path.abspath(self.db_path)
+        with _write_queues_lock:
+            write_queue = _write_queues.get(db_key)
+            if write_queue is None or write_queue.closed:
+                write_queue = WriteBehindQueue(
+                    self, self.WRITE_BATCH_ROWS, self.WRITE_BATCH_DELAY_MS, self.WRITE_QUEUE_MAX_PENDING
+                )
+                _write_queues[db_key] = write_queue
+        return write_queue
+    
+    def close(self):
+        """Close this thread's persistent connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
         
-        # Insert default integration types
-        cursor.execute('''
-            INSERT OR IGNORE INTO integration_types (type_name, type_display_name, description, default_config)
-            VALUES 
-                ('ltl_carrier', 'LTL Carrier', 'Integration with LTL carrier systems for rate quotes and tracking', '{"api_type": "rest", "auth_type": "bearer", "rate_limit": 100}'),
-                ('freight_api', 'Freight API', 'Generic freight and logistics API integration', '{"api_type": "rest", "auth_type": "api_key", "rate_limit": 200}'),
-                ('tracking_api', 'Tracking API', 'Shipment tracking and visibility API', '{"api_type": "rest", "auth_type": "oauth", "rate_limit": 500}'),
-                ('pricing_api', 'Pricing API', 'Freight pricing and rate calculation API', '{"api_type": "rest", "auth_type": "bearer", "rate_limit": 100}'),
-                ('customs_api', 'Customs API', 'Customs and border documentation API', '{"api_type": "rest", "auth_type": "certificate", "rate_limit": 50}'),
-                ('warehouse_api', 'Warehouse API', 'Warehouse management system integration', '{"api_type": "rest", "auth_type": "basic", "rate_limit": 300}'),
-                ('edi_integration', 'EDI Integration', 'Electronic Data Interchange for freight documents', '{"protocol": "edi", "standards": ["x12", "edifact"], "rate_limit": 1000}'),
-                ('custom_integration', 'Custom Integration', 'Custom API or data source integration', '{"api_type": "configurable", "auth_type": "configurable", "rate_limit": 100}'),
-                ('web_scraper', 'Web Scraper', 'Automated web scraping for carrier data extraction', '{"scraper_type": "web", "auth_type": "form_login", "rate_limit": 50, "delay_seconds": 5}')
-        ''')
-        
-        conn.commit()
-        
-        # Migrate existing databases to new schema
-        self._migrate_database_schema(conn, cursor)
-        
-        conn.commit()
-        conn.close()
+    def init_database(self):
+        """Bring the database schema up to date, at most once per process and database file"""
+        db_key = os.path.abspath(self.db_path)
+        with _schema_init_lock:
+            if db_key not in _initialized_databases:
+                if self.get_schema_version() < SCHEMA_VERSION:
+                    self._create_schema()
+                if self.PAYLOAD_RETENTION_DAYS:
+                    self.cleanup_old_payloads(self.PAYLOAD_RETENTION_DAYS)
+                _initialized_databases.add(db_key)
         
         # Ensure backup directory exists
         os.makedirs(self.backup_dir, exist_ok=True)
+    
+    def _create_schema(self):
+        """Initialize SQLite database with enhanced brokerage-centric schema"""
+        with self.transaction() as cursor:
+            # Enhanced brokerage configurations table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS brokerage_configurations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    brokerage_name TEXT NOT NULL,
+                    configuration_name TEXT NOT NULL,
+                    field_mappings TEXT NOT NULL,
+                    api_credentials TEXT NOT NULL,
+                    file_headers TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_used_at TIMESTAMP,
+                    version INTEGER DEFAULT 1,
+                    is_active BOOLEAN DEFAULT 1,
+                    description TEXT,
+                    UNIQUE(brokerage_name, configuration_name)
+                )
+            ''')
+            
+            # Enhanced upload history table with better error tracking
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS upload_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    brokerage_name TEXT NOT NULL,
+                    configuration_name TEXT,
+                    filename TEXT NOT NULL,
+                    total_records INTEGER,
+                    successful_records INTEGER,
+                    failed_records INTEGER,
+                    error_log TEXT,
+                    processing_time_seconds REAL,
+                    file_headers TEXT,
+                    upload_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    session_id TEXT
+                )
+            ''')
+            
+            # Processing errors table for detailed troubleshooting
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS processing_errors (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    upload_history_id INTEGER,
+                    row_number INTEGER,
+                    field_name TEXT,
+                    error_type TEXT,
+                    error_message TEXT,
+                    suggested_fix TEXT,
+                    original_value TEXT,
+                    expected_format TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (upload_history_id) REFERENCES upload_history (id)
+                )
+            ''')
+            
+            # Configuration change log for versioning
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS configuration_changes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    configuration_id INTEGER,
+                    change_type TEXT NOT NULL, -- 'created', 'updated', 'field_added', 'field_removed', 'field_modified'
+                    change_description TEXT,
+                    old_value TEXT,
+                    new_value TEXT,
+                    changed_by TEXT,
+                    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (configuration_id) REFERENCES brokerage_configurations (id)
+                )
+            ''')
+            
+            # Legacy table migration - keep old table for backward compatibility
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS customer_mappings (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    customer_name TEXT UNIQUE NOT NULL,
+                    field_mappings TEXT NOT NULL,
+                    api_credentials TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Backup history table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS backup_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    backup_name TEXT NOT NULL,
+                    backup_path TEXT NOT NULL,
+                    backup_size INTEGER,
+                    backup_type TEXT NOT NULL,
+                    checksum TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    description TEXT
+                )
+            ''')
+            
+            # Learning system tables
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS mapping_interactions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL,
+                    brokerage_name TEXT NOT NULL,
+                    configuration_name TEXT,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    file_headers TEXT,
+                    suggested_mappings TEXT,
+                    final_mappings TEXT,
+                    suggestions_accepted INTEGER DEFAULT 0,
+                    manual_corrections INTEGER DEFAULT 0,
+                    processing_success_rate REAL,
+                    total_fields INTEGER DEFAULT 0,
+                    user_satisfaction TEXT
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS mapping_decisions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    interaction_id INTEGER,
+                    column_name TEXT NOT NULL,
+                    column_sample_data TEXT,
+                    column_data_type TEXT,
+                    suggested_field TEXT,
+                    suggested_confidence REAL,
+                    actual_field TEXT,
+                    decision_type TEXT,
+                    decision_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (interaction_id) REFERENCES mapping_interactions (id)
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS brokerage_patterns (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    brokerage_name TEXT NOT NULL,
+                    column_pattern TEXT NOT NULL,
+                    api_field TEXT NOT NULL,
+                    success_count INTEGER DEFAULT 0,
+                    total_count INTEGER DEFAULT 0,
+                    average_confidence REAL DEFAULT 0.0,
+                    data_type_pattern TEXT,
+                    sample_values TEXT,
+                    last_updated DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(brokerage_name, column_pattern, api_field)
+                )
+            ''')
+            
+            # External integrations tables
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS integration_types (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    type_name TEXT UNIQUE NOT NULL,
+                    type_display_name TEXT NOT NULL,
+                    description TEXT,
+                    default_config TEXT,
+                    is_active BOOLEAN DEFAULT 1,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS external_integrations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    brokerage_name TEXT NOT NULL,
+                    integration_name TEXT NOT NULL,
+                    integration_type_id INTEGER NOT NULL,
+                    description TEXT,
+                    config_data TEXT NOT NULL,
+                    auth_credentials TEXT,
+                    is_active BOOLEAN DEFAULT 1,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_used_at TIMESTAMP,
+                    created_by TEXT,
+                    UNIQUE(brokerage_name, integration_name),
+                    FOREIGN KEY (integration_type_id) REFERENCES integration_types (id)
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS integration_data_mappings (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    integration_id INTEGER NOT NULL,
+                    source_field TEXT NOT NULL,
+                    target_field TEXT NOT NULL,
+                    transformation_rule TEXT,
+                    is_required BOOLEAN DEFAULT 0,
+                    default_value TEXT,
+                    validation_rule TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (integration_id) REFERENCES external_integrations (id) ON DELETE CASCADE
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS integration_execution_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    integration_id INTEGER NOT NULL,
+                    execution_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    execution_status TEXT NOT NULL,
+                    records_processed INTEGER DEFAULT 0,
+                    records_success INTEGER DEFAULT 0,
+                    records_failed INTEGER DEFAULT 0,
+                    execution_time_seconds REAL,
+                    error_log TEXT,
+                    output_file_path TEXT,
+                    triggered_by TEXT,
+                    session_id TEXT,
+                    FOREIGN KEY (integration_id) REFERENCES external_integrations (id)
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS integration_output_configs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    integration_id INTEGER NOT NULL,
+                    output_name TEXT NOT NULL,
+                    output_format TEXT NOT NULL,
+                    output_template TEXT,
+                    output_fields TEXT,
+                    file_naming_pattern TEXT,
+                    schedule_config TEXT,
+                    is_active BOOLEAN DEFAULT 1,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (integration_id) REFERENCES external_integrations (id) ON DELETE CASCADE
+                )
+            ''')
+            
+            # LTL Tracking tables
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS tracking_requests (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    upload_history_id INTEGER NOT NULL,
+                    pro_number TEXT NOT NULL,
+                    carrier_name TEXT,
+                    load_id TEXT,
+                    request_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    status TEXT DEFAULT 'pending',
+                    FOREIGN KEY (upload_history_id) REFERENCES upload_history (id) ON DELETE CASCADE
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS tracking_results (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    tracking_request_id INTEGER NOT NULL,
+                    tracking_status TEXT,
+                    tracking_location TEXT,
+                    tracking_event TEXT,
+                    tracking_timestamp TEXT,
+                    scraped_data TEXT,
+                    scrape_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    scrape_success BOOLEAN DEFAULT 1,
+                    error_message TEXT,
+                    FOREIGN KEY (tracking_request_id) REFERENCES tracking_requests (id) ON DELETE CASCADE
+                )
+            ''')
+            
+            # Applied schema migrations
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Insert default integration types
+            cursor.execute('''
+                INSERT OR IGNORE INTO integration_types (type_name, type_display_name, description, default_config)
+                VALUES 
+                    ('ltl_carrier', 'LTL Carrier', 'Integration with LTL carrier systems for rate quotes and tracking', '{"api_type": "rest", "auth_type": "bearer", "rate_limit": 100}'),
+                    ('freight_api', 'Freight API', 'Generic freight and logistics API integration', '{"api_type": "rest", "auth_type": "api_key", "rate_limit": 200}'),
+                    ('tracking_api', 'Tracking API', 'Shipment tracking and visibility API', '{"api_type": "rest", "auth_type": "oauth", "rate_limit": 500}'),
+                    ('pricing_api', 'Pricing API', 'Freight pricing and rate calculation API', '{"api_type": "rest", "auth_type": "bearer", "rate_limit": 100}'),
+                    ('customs_api', 'Customs API', 'Customs and border documentation API', '{"api_type": "rest", "auth_type": "certificate", "rate_limit": 50}'),
+                    ('warehouse_api', 'Warehouse API', 'Warehouse management system integration', '{"api_type": "rest", "auth_type": "basic", "rate_limit": 300}'),
+                    ('edi_integration', 'EDI Integration', 'Electronic Data Interchange for freight documents', '{"protocol": "edi", "standards": ["x12", "edifact"], "rate_limit": 1000}'),
+                    ('custom_integration', 'Custom Integration', 'Custom API or data source integration', '{"api_type": "configurable", "auth_type": "configurable", "rate_limit": 100}'),
+                    ('web_scraper', 'Web Scraper', 'Automated web scraping for carrier data extraction', '{"scraper_type": "web", "auth_type": "form_login", "rate_limit": 50, "delay_seconds": 5}')
+            ''')
+            
+            # Migrate existing databases to new schema
+            self._migrate_database_schema(cursor)
+            self._apply_schema_migrations(cursor)
 
-    def create_backup(self, backup_name=None, description=""):
-        """Create a complete database backup"""
+    def create_backup(self, backup_name=None, description="", compression=None, incremental=False):
+        """Create an online database backup.
+        
+        The snapshot is taken with the SQLite backup API in page batches, so writers are not
+        blocked. ``compression`` may be 'gzip' or 'zstd'. With ``incremental=True`` only the
+        pages changed since the most recent backup are stored; restoring replays the chain.
+        """
         if not backup_name:
             backup_name = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         
-        # Create backup directory
-        backup_path = os.path.join(self.backup_dir, f"{backup_name}.db")
+        if compression == 'zstd' and not ZSTD_AVAILABLE:
+            logging.warning("zstandard is not installed, falling back to gzip backup compression")
+            compression = 'gzip'
+        if compression not in self.BACKUP_EXTENSIONS:
+            return {'success': False, 'error': f'Unsupported compression: {compression}'}
+        
+        parent = self._get_latest_backup_with_manifest() if incremental else None
+        backup_type = 'incremental' if parent else 'database'
+        extension = '.inc' if parent else '.db'
+        backup_path = os.path.join(self.backup_dir, f"{backup_name}{extension}{self.BACKUP_EXTENSIONS[compression]}")
+        snapshot_path = os.path.join(self.backup_dir, f"{backup_name}.snapshot.tmp")
         
         try:
-            # Create database backup
-            shutil.copy2(self.db_path, backup_path)
+            self._snapshot_database(snapshot_path)
             
-            # Calculate checksum for integrity verification
-            checksum = self._calculate_file_checksum(backup_path)
+            parent_manifest = self._read_page_manifest(parent['name']) if parent else None
+            checksum, manifest = self._write_backup_file(snapshot_path, backup_path, compression,
+                                                         parent['name'] if parent else None, parent_manifest)
+            
+            with open(self._manifest_path(backup_name), 'wb') as f:
+                f.write(b''.join(manifest))
             
             # Get backup size
             backup_size = os.path.getsize(backup_path)
             
             # Record backup in history
-            self._save_backup_history(backup_name, backup_path, backup_size, "database", checksum, description)
+            self._save_backup_history(backup_name, backup_path, backup_size, backup_type, checksum, description,
+                                      parent_backup=parent['name'] if parent else None, compression=compression)
             
             return {
                 'success': True,
                 'backup_name': backup_name,
                 'backup_path': backup_path,
+                'backup_type': backup_type,
+                'parent_backup': parent['name'] if parent else None,
                 'size': backup_size,
                 'checksum': checksum
             }
@@ -338,79 +1015,202 @@ class DatabaseManager:
                 'success': False,
                 'error': str(e)
             }
+        finally:
+            if os.path.exists(snapshot_path):
+                os.remove(snapshot_path)
+
+    def _snapshot_database(self, snapshot_path):
+        """Copy a consistent image of the live database to snapshot_path using the backup API"""
+        if os.path.exists(snapshot_path):
+            os.remove(snapshot_path)
+        
+        target = sqlite3.connect(snapshot_path)
+        try:
+            # Sleep between page batches so concurrent sessions can take the write lock
+            self._get_connection().backup(
+                target,
+                pages=self.BACKUP_PAGES_PER_STEP,
+                progress=lambda status, remaining, total: time.sleep(self.BACKUP_STEP_SLEEP) if remaining else None
+            )
+        finally:
+            target.close()
+
+    def _write_backup_file(self, snapshot_path, backup_path, compression, parent_name=None, parent_manifest=None):
+        """Stream a snapshot into its backup file, hashing the output as it is written.
+        
+        Full backups store every page; incremental backups (``parent_manifest`` given) store
+        only pages whose digest differs from the parent. Returns (checksum, page manifest).
+        """
+        with open(snapshot_path, 'rb') as f:
+            header = f.read(100)
+        page_size = struct.unpack('>H', header[16:18])[0] if len(header) >= 18 else 4096
+        page_size = 65536 if page_size == 1 else page_size
+        page_count = os.path.getsize(snapshot_path) // page_size
+        
+        checksum = hashlib.sha256()
+        manifest = []
+        
+        with open(snapshot_path, 'rb') as source, open(backup_path, 'wb') as raw:
+            out = _HashingWriter(raw, checksum)
+            writer = self._open_compressed_writer(out, compression)
+            try:
+                if parent_manifest is not None:
+                    writer.write(json.dumps({
+                        'format': self.INCREMENTAL_FORMAT,
+                        'parent': parent_name,
+                        'page_size': page_size,
+                        'page_count': page_count
+                    }).encode() + b'\n')
+                
+                for page_number in range(page_count):
+                    page = source.read(page_size)
+                    digest = hashlib.blake2b(page, digest_size=8).digest()
+                    manifest.append(digest)
+                    
+                    if parent_manifest is None:
+                        writer.write(page)
+                    elif page_number >= len(parent_manifest) or parent_manifest[page_number] != digest:
+                        writer.write(struct.pack('>I', page_number) + page)
+            finally:
+                if writer is not out:
+                    writer.close()
+        
+        return checksum.hexdigest(), manifest
+
+    def _open_compressed_writer(self, fileobj, compression):
+        """Wrap a binary file object with the requested compressor"""
+        if compression == 'gzip':
+            return gzip.GzipFile(fileobj=fileobj, mode='wb')
+        if compression == 'zstd':
+            return zstandard.ZstdCompressor().stream_writer(fileobj, closefd=False)
+        return fileobj
+
+    def _open_compressed_reader(self, fileobj, compression):
+        """Wrap a binary file object with the matching decompressor"""
+        if compression == 'gzip':
+            return gzip.GzipFile(fileobj=fileobj, mode='rb')
+        if compression == 'zstd':
+            return zstandard.ZstdDecompressor().stream_reader(fileobj)
+        return fileobj
+
+    def _manifest_path(self, backup_name):
+        """Path of the per-page digest manifest kept next to a backup"""
+        return os.path.join(self.backup_dir, f"{backup_name}.pages")
+
+    def _read_page_manifest(self, backup_name):
+        """Load the per-page digests recorded for a backup"""
+        with open(self._manifest_path(backup_name), 'rb') as f:
+            data = f.read()
+        return [data[i:i + 8] for i in range(0, len(data), 8)]
+
+    def _get_latest_backup_with_manifest(self):
+        """Most recent database or incremental backup that can serve as an incremental parent"""
+        with self.transaction() as cursor:
+            cursor.execute('''
+                SELECT backup_name FROM backup_history
+                WHERE backup_type IN ('database', 'incremental')
+                ORDER BY created_at DESC, id DESC
+            ''')
+            names = [row[0] for row in cursor.fetchall()]
+        
+        for name in names:
+            info = self.get_backup_info(name)
+            if info and os.path.exists(info['path']) and os.path.exists(self._manifest_path(name)):
+                return info
+        return None
+
+    def _materialize_backup(self, backup_info, target_path):
+        """Rebuild a plain database file from a full backup plus its incremental chain"""
+        chain = [backup_info]
+        while chain[-1]['type'] == 'incremental':
+            parent = self.get_backup_info(chain[-1]['parent_backup'])
+            if not parent:
+                raise ValueError(f"Missing parent backup '{chain[-1]['parent_backup']}'")
+            chain.append(parent)
+        chain.reverse()
+        
+        for link in chain:
+            if not os.path.exists(link['path']):
+                raise FileNotFoundError(f"Backup file not found: {link['path']}")
+            if link['checksum'] and self._calculate_file_checksum(link['path']) != link['checksum']:
+                raise ValueError(f"Backup file integrity check failed: {link['name']}")
+        
+        with open(target_path, 'wb') as target:
+            with open(chain[0]['path'], 'rb') as raw:
+                shutil.copyfileobj(self._open_compressed_reader(raw, chain[0]['compression']), target)
+            
+            for link in chain[1:]:
+                with open(link['path'], 'rb') as raw:
+                    reader = self._open_compressed_reader(raw, link['compression'])
+                    header = b''
+                    while not header.endswith(b'\n'):
+                        header += reader.read(1)
+                    meta = json.loads(header)
+                    if meta.get('format') != self.INCREMENTAL_FORMAT:
+                        raise ValueError(f"Unrecognised incremental backup format: {link['name']}")
+                    
+                    page_size = meta['page_size']
+                    target.truncate(page_size * meta['page_count'])
+                    while True:
+                        record = _read_exactly(reader, 4 + page_size)
+                        if not record:
+                            break
+                        if len(record) != 4 + page_size:
+                            raise ValueError(f"Truncated incremental backup: {link['name']}")
+                        page_number = struct.unpack('>I', record[:4])[0]
+                        target.seek(page_number * page_size)
+                        target.write(record[4:])
 
     def create_data_export(self, customer_name=None, export_format="json", backup_name=None):
-        """Export data in various formats (JSON, CSV)"""
+        """Export data as a ZIP of one JSON Lines (``json``) or CSV (``csv``) file per table.
+        
+        Rows are streamed from the database cursor straight into the archive in batches,
+        so memory use does not grow with history. API credentials are never exported.
+        """
         if not backup_name:
             backup_name = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        if export_format not in ('json', 'csv'):
+            return {'success': False, 'error': f'Unsupported export format: {export_format}'}
+        
+        extension = 'jsonl' if export_format == 'json' else 'csv'
+        filters = {
+            'customer_mappings': ('customer_name = ?', customer_name),
+            'upload_history': ('brokerage_name = ?', customer_name),
+        }
         
         try:
-            export_data = {
-                'export_info': {
-                    'created_at': datetime.now().isoformat(),
-                    'export_format': export_format,
-                    'customer_name': customer_name
-                },
-                'customer_mappings': [],
-                'upload_history': []
-            }
-            
-            # Export customer mappings
-            if customer_name:
-                mapping = self.get_customer_mapping(customer_name)
-                if mapping:
-                    export_data['customer_mappings'].append({
-                        'customer_name': customer_name,
-                        'field_mappings': mapping['field_mappings'],
-                        # Don't export API credentials for security
-                        'api_credentials': {'base_url': mapping['api_credentials'].get('base_url', '')},
-                        'created_at': datetime.now().isoformat()
-                    })
-            else:
-                # Export all mappings
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                cursor.execute('SELECT customer_name, field_mappings, created_at, updated_at FROM customer_mappings')
-                mappings = cursor.fetchall()
-                
-                for mapping in mappings:
-                    export_data['customer_mappings'].append({
-                        'customer_name': mapping[0],
-                        'field_mappings': json.loads(mapping[1]),
-                        'created_at': mapping[2],
-                        'updated_at': mapping[3]
-                    })
-                conn.close()
-            
-            # Export upload history
-            history = self.get_upload_history(customer_name, limit=None)
-            for record in history:
-                export_data['upload_history'].append({
-                    'brokerage_name': record[1],  # Updated to use brokerage_name
-                    'filename': record[3],        # Adjusted index for new schema
-                    'total_records': record[4],
-                    'successful_records': record[5],
-                    'failed_records': record[6],
-                    'error_log': json.loads(record[7]) if record[7] else None,
-                    'upload_timestamp': record[10]  # Adjusted index for new schema
-                })
-            
-            # Export learning data
-            learning_data = self.export_learning_data()
-            export_data['learning_data'] = learning_data
-            
-            # Save export file
-            export_path = os.path.join(self.backup_dir, f"{backup_name}.json")
-            with open(export_path, 'w') as f:
-                json.dump(export_data, f, indent=2)
-            
-            # Create ZIP archive
             zip_path = os.path.join(self.backup_dir, f"{backup_name}.zip")
-            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                zipf.write(export_path, f"{backup_name}.json")
+            row_counts = {}
             
-            # Clean up JSON file
-            os.remove(export_path)
+            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                for table, columns, _ in EXPORT_TABLES:
+                    select_columns = [EXPORT_COLUMN_SQL.get((table, column), column) for column in columns]
+                    query = f"SELECT {', '.join(select_columns)} FROM {table}"
+                    params = ()
+                    where, value = filters.get(table, (None, None))
+                    if where and value:
+                        query += f" WHERE {where}"
+                        params = (value,)
+                    
+                    with zipf.open(f"{table}.{extension}", 'w') as raw, self.transaction() as cursor:
+                        stream = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+                        cursor.execute(query, params)
+                        row_counts[table] = self._write_export_rows(stream, cursor, columns, export_format)
+                        stream.flush()
+                        stream.detach()
+                
+                zipf.writestr('manifest.json', json.dumps({
+                    'export_info': {
+                        'created_at': datetime.now().isoformat(),
+                        'export_format': export_format,
+                        'customer_name': customer_name
+                    },
+                    'format': self.EXPORT_FORMAT,
+                    'tables': [
+                        {'name': table, 'file': f"{table}.{extension}", 'columns': columns, 'rows': row_counts[table]}
+                        for table, columns, _ in EXPORT_TABLES
+                    ]
+                }, indent=2))
             
             # Calculate checksum
             checksum = self._calculate_file_checksum(zip_path)
@@ -424,7 +1224,8 @@ class DatabaseManager:
                 'export_name': backup_name,
                 'export_path': zip_path,
                 'size': backup_size,
-                'checksum': checksum
+                'checksum': checksum,
+                'row_counts': row_counts
             }
             
         except Exception as e:
@@ -434,32 +1235,121 @@ class DatabaseManager:
                 'error': str(e)
             }
 
+    def _write_export_rows(self, stream, cursor, columns, export_format):
+        """Write a cursor's rows to a text stream as JSON Lines or CSV, one batch at a time"""
+        writer = None
+        if export_format == 'csv':
+            writer = csv.writer(stream)
+            writer.writerow(columns)
+        
+        row_count = 0
+        while True:
+            rows = cursor.fetchmany(self.EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            if writer:
+                writer.writerows(rows)
+            else:
+                stream.writelines(json.dumps(dict(zip(columns, row)), default=str) + '\n' for row in rows)
+            row_count += len(rows)
+        
+        return row_count
+
+    def _read_export_rows(self, zipf, entry, export_format):
+        """Yield rows of one exported table as dicts without loading the whole file"""
+        with zipf.open(entry) as raw:
+            stream = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+            if export_format == 'csv':
+                # CSV cannot tell NULL from an empty string; NULL is the safer reading
+                for row in csv.DictReader(stream):
+                    yield {key: (value if value != '' else None) for key, value in row.items()}
+            else:
+                for line in stream:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def _insert_rows_in_batches(self, cursor, table, columns, insert_verb, rows):
+        """Insert an iterable of row dicts with executemany, EXPORT_BATCH_SIZE rows at a time"""
+        defaults = IMPORT_DEFAULTS.get(table, {})
+        insert_columns = columns + list(defaults)
+        statement = (f"{insert_verb} INTO {table} ({', '.join(insert_columns)}) "
+                     f"VALUES ({', '.join('?' for _ in insert_columns)})")
+        
+        inserted = 0
+        batch = []
+        for row in rows:
+            batch.append(tuple(row.get(column) for column in columns) + tuple(defaults.values()))
+            if len(batch) >= self.EXPORT_BATCH_SIZE:
+                cursor.executemany(statement, batch)
+                inserted += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(statement, batch)
+            inserted += len(batch)
+        
+        return inserted
+
     def restore_from_backup(self, backup_name):
-        """Restore database from backup"""
-        backup_path = os.path.join(self.backup_dir, f"{backup_name}.db")
+        """Restore database from a full or incremental backup"""
+        backup_info = self.get_backup_info(backup_name) or {
+            'name': backup_name,
+            'path': os.path.join(self.backup_dir, f"{backup_name}.db"),
+            'type': 'database',
+            'checksum': None,
+            'parent_backup': None,
+            'compression': None
+        }
         
-        if not os.path.exists(backup_path):
+        if not os.path.exists(backup_info['path']):
             return {
                 'success': False,
                 'error': 'Backup file not found'
             }
         
+        restore_path = os.path.join(self.backup_dir, f"{backup_name}.restore.tmp")
         try:
-            # Verify backup integrity
-            backup_info = self.get_backup_info(backup_name)
-            if backup_info:
-                current_checksum = self._calculate_file_checksum(backup_path)
-                if current_checksum != backup_info['checksum']:
-                    return {
-                        'success': False,
-                        'error': 'Backup file integrity check failed'
-                    }
+            # Rebuild the database image, verifying every file in the chain
+            try:
+                self._materialize_backup(backup_info, restore_path)
+            except ValueError as e:
+                return {
+                    'success': False,
+                    'error': str(e)
+                }
             
             # Create current database backup before restore
             current_backup = self.create_backup(f"pre_restore_{datetime.now().strftime('%Y%m%d_%H%M%S')}", "Backup before restore operation")
             
-            # Restore database
-            shutil.copy2(backup_path, self.db_path)
+            # The backup catalog describes files on disk, so it must survive the restore
+            with self.transaction() as cursor:
+                cursor.execute('''
+                    SELECT backup_name, backup_path, backup_size, backup_type, checksum, created_at,
+                           description, parent_backup, compression
+                    FROM backup_history ORDER BY id
+                ''')
+                backup_catalog = cursor.fetchall()
+            
+            # Restore database through the backup API so open WAL connections see the restored pages
+            source = sqlite3.connect(restore_path)
+            try:
+                source.backup(self._get_connection())
+            finally:
+                source.close()
+            
+            # The restored file may predate the current schema
+            with _schema_init_lock:
+                _initialized_databases.discard(os.path.abspath(self.db_path))
+                self._invalidate_configuration_cache()
+            self.init_database()
+            
+            with self.transaction() as cursor:
+                cursor.execute('DELETE FROM backup_history')
+                cursor.executemany('''
+                    INSERT INTO backup_history 
+                    (backup_name, backup_path, backup_size, backup_type, checksum, created_at,
+                     description, parent_backup, compression)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', backup_catalog)
             
             return {
                 'success': True,
@@ -473,108 +1363,97 @@ class DatabaseManager:
                 'success': False,
                 'error': str(e)
             }
+        finally:
+            if os.path.exists(restore_path):
+                os.remove(restore_path)
 
     def import_data(self, import_file_path):
-        """Import data from export file"""
+        """Import data from an export archive, streaming each table in batches"""
         try:
-            # Extract and read import file
             with zipfile.ZipFile(import_file_path, 'r') as zipf:
-                # Get the JSON file from the zip
-                json_files = [f for f in zipf.namelist() if f.endswith('.json')]
-                if not json_files:
-                    return {'success': False, 'error': 'No JSON data file found in archive'}
+                names = zipf.namelist()
+                if 'manifest.json' not in names:
+                    # Archives written before streaming exports hold a single JSON document
+                    json_files = [f for f in names if f.endswith('.json')]
+                    if not json_files:
+                        return {'success': False, 'error': 'No JSON data file found in archive'}
+                    return self._import_legacy_export(json.loads(zipf.read(json_files[0])))
                 
-                json_content = zipf.read(json_files[0])
-                import_data = json.loads(json_content)
+                manifest = json.loads(zipf.read('manifest.json'))
+                if manifest.get('format') != self.EXPORT_FORMAT:
+                    return {'success': False, 'error': 'Invalid import data structure'}
+                
+                export_format = manifest.get('export_info', {}).get('export_format', 'json')
+                entries = {table['name']: table['file'] for table in manifest.get('tables', [])}
+                
+                row_counts = {}
+                with self.transaction() as cursor:
+                    for table, columns, insert_verb in EXPORT_TABLES:
+                        if table not in entries:
+                            continue
+                        rows = self._read_export_rows(zipf, entries[table], export_format)
+                        row_counts[table] = self._insert_rows_in_batches(cursor, table, columns, insert_verb, rows)
             
-            # Validate import data structure
-            if not all(key in import_data for key in ['export_info', 'customer_mappings', 'upload_history']):
-                return {'success': False, 'error': 'Invalid import data structure'}
+            return {
+                'success': True,
+                'imported_mappings': row_counts.get('customer_mappings', 0),
+                'imported_history': row_counts.get('upload_history', 0),
+                'imported_learning': int(any(row_counts.get(table, 0) for table in
+                                             ('mapping_interactions', 'mapping_decisions', 'brokerage_patterns'))),
+                'row_counts': row_counts
+            }
             
-            # Import customer mappings
-            imported_mappings = 0
-            imported_history = 0
+        except Exception as e:
+            logging.error(f"Error importing data: {e}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    def _import_legacy_export(self, import_data):
+        """Import a single-document JSON export produced before the streaming format"""
+        # Validate import data structure
+        if not all(key in import_data for key in ['export_info', 'customer_mappings', 'upload_history']):
+            return {'success': False, 'error': 'Invalid import data structure'}
+        
+        mappings = (
+            dict(mapping, field_mappings=json.dumps(mapping['field_mappings']))
+            for mapping in import_data['customer_mappings']
+        )
+        history = (
+            dict(record,
+                 brokerage_name=record.get('brokerage_name', record.get('customer_name', 'Unknown')),  # Handle both old and new formats
+                 error_log=json.dumps(record['error_log']) if record.get('error_log') else None)
+            for record in import_data['upload_history']
+        )
+        
+        tables = {table: (columns, insert_verb) for table, columns, insert_verb in EXPORT_TABLES}
+        with self.transaction() as cursor:
+            imported_mappings = self._insert_rows_in_batches(cursor, 'customer_mappings', *tables['customer_mappings'], mappings)
+            imported_history = self._insert_rows_in_batches(cursor, 'upload_history', *tables['upload_history'], history)
+        
+        # Import learning data if present
+        imported_learning = 0
+        if 'learning_data' in import_data:
+            imported_learning = int(bool(self.import_learning_data(import_data['learning_data'])))
+        
+        return {
+            'success': True,
+            'imported_mappings': imported_mappings,
+            'imported_history': imported_history,
+            'imported_learning': imported_learning
+        }
+
+    def get_backup_list(self):
+        """Get list of available backups"""
+        with self.transaction() as cursor:
+            cursor.execute('''
+                SELECT backup_name, backup_path, backup_size, backup_type, created_at, description
+                FROM backup_history
+                ORDER BY created_at DESC
+            ''')
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            try:
-                # Import customer mappings (skip API credentials for security)
-                for mapping in import_data['customer_mappings']:
-                    cursor.execute('''
-                        INSERT OR IGNORE INTO customer_mappings 
-                        (customer_name, field_mappings, api_credentials, created_at, updated_at)
-                        VALUES (?, ?, ?, ?, ?)
-                    ''', (
-                        mapping['customer_name'],
-                        json.dumps(mapping['field_mappings']),
-                        json.dumps({'base_url': '', 'api_key': ''}),  # Empty credentials
-                        mapping.get('created_at', datetime.now().isoformat()),
-                        mapping.get('updated_at', datetime.now().isoformat())
-                    ))
-                    imported_mappings += 1
-                
-                # Import upload history
-                for record in import_data['upload_history']:
-                    cursor.execute('''
-                        INSERT INTO upload_history 
-                        (brokerage_name, filename, total_records, successful_records, failed_records, error_log, upload_timestamp)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        record.get('brokerage_name', record.get('customer_name', 'Unknown')),  # Handle both old and new formats
-                        record['filename'],
-                        record['total_records'],
-                        record['successful_records'],
-                        record['failed_records'],
-                        json.dumps(record['error_log']) if record['error_log'] else None,
-                        record['upload_timestamp']
-                    ))
-                    imported_history += 1
-                
-                # Import learning data if present
-                imported_learning = 0
-                if 'learning_data' in import_data:
-                    try:
-                        self.import_learning_data(import_data['learning_data'])
-                        imported_learning = 1
-                    except Exception as e:
-                        logging.error(f"Error importing learning data: {e}")
-                
-                conn.commit()
-                
-                return {
-                    'success': True,
-                    'imported_mappings': imported_mappings,
-                    'imported_history': imported_history,
-                    'imported_learning': imported_learning
-                }
-                
-            except Exception as e:
-                conn.rollback()
-                raise e
-            finally:
-                conn.close()
-                
-        except Exception as e:
-            logging.error(f"Error importing data: {e}")
-            return {
-                'success': False,
-                'error': str(e)
-            }
-
-    def get_backup_list(self):
-        """Get list of available backups"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT backup_name, backup_path, backup_size, backup_type, created_at, description
-            FROM backup_history
-            ORDER BY created_at DESC
-        ''')
-        
-        backups = cursor.fetchall()
-        conn.close()
+            backups = cursor.fetchall()
         
         # Verify backup files still exist
         verified_backups = []
@@ -593,17 +1472,16 @@ class DatabaseManager:
 
     def get_backup_info(self, backup_name):
         """Get detailed information about a specific backup"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT backup_name, backup_path, backup_size, backup_type, checksum, created_at, description
-            FROM backup_history
-            WHERE backup_name = ?
-        ''', (backup_name,))
-        
-        result = cursor.fetchone()
-        conn.close()
+        with self.transaction() as cursor:
+            cursor.execute('''
+                SELECT backup_name, backup_path, backup_size, backup_type, checksum, created_at, description,
+                       parent_backup, compression
+                FROM backup_history
+                WHERE backup_name = ?
+                ORDER BY id DESC
+            ''', (backup_name,))
+            
+            result = cursor.fetchone()
         
         if result:
             return {
@@ -613,7 +1491,9 @@ class DatabaseManager:
                 'type': result[3],
                 'checksum': result[4],
                 'created_at': result[5],
-                'description': result[6]
+                'description': result[6],
+                'parent_backup': result[7],
+                'compression': result[8]
             }
         return None
 
@@ -623,17 +1503,21 @@ class DatabaseManager:
         if not backup_info:
             return {'success': False, 'error': 'Backup not found'}
         
+        with self.transaction() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM backup_history WHERE parent_backup = ?', (backup_name,))
+            dependents = cursor.fetchone()[0]
+        if dependents:
+            return {'success': False, 'error': 'Backup is the parent of incremental backups; delete those first'}
+        
         try:
-            # Delete backup file
-            if os.path.exists(backup_info['path']):
-                os.remove(backup_info['path'])
+            # Delete backup file and its page manifest
+            for path in (backup_info['path'], self._manifest_path(backup_name)):
+                if os.path.exists(path):
+                    os.remove(path)
             
             # Remove from backup history
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('DELETE FROM backup_history WHERE backup_name = ?', (backup_name,))
-            conn.commit()
-            conn.close()
+            with self.transaction() as cursor:
+                cursor.execute('DELETE FROM backup_history WHERE backup_name = ?', (backup_name,))
             
             return {'success': True}
             
@@ -665,19 +1549,17 @@ class DatabaseManager:
             logging.error(f"Error verifying backup integrity: {e}")
             return {'success': False, 'error': str(e)}
 
-    def _save_backup_history(self, backup_name, backup_path, backup_size, backup_type, checksum, description):
+    def _save_backup_history(self, backup_name, backup_path, backup_size, backup_type, checksum, description,
+                             parent_backup=None, compression=None):
         """Save backup record to history"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO backup_history 
-            (backup_name, backup_path, backup_size, backup_type, checksum, description)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (backup_name, backup_path, backup_size, backup_type, checksum, description))
-        
-        conn.commit()
-        conn.close()
+        with self.transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO backup_history 
+                (backup_name, backup_path, backup_size, backup_type, checksum, description,
+                 parent_backup, compression)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (backup_name, backup_path, backup_size, backup_type, checksum, description,
+                  parent_backup, compression))
 
     def _calculate_file_checksum(self, file_path):
         """Calculate SHA256 checksum of a file"""
@@ -688,44 +1570,64 @@ class DatabaseManager:
         return hash_sha256.hexdigest()
 
     def get_database_stats(self):
-        """Get database statistics"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Get table counts
-        cursor.execute('SELECT COUNT(*) FROM customer_mappings')
-        mapping_count = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM upload_history')
-        history_count = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM backup_history')
-        backup_count = cursor.fetchone()[0]
-        
-        # Get brokerage configurations count (primary table)
-        cursor.execute('SELECT COUNT(*) FROM brokerage_configurations')
-        brokerage_configs_count = cursor.fetchone()[0]
-        
-        # Get learning table counts
-        cursor.execute('SELECT COUNT(*) FROM mapping_interactions')
-        interactions_count = cursor.fetchone()[0]
+        """Get database statistics from the trigger-maintained row counts"""
+        with self.transaction() as cursor:
+            cursor.execute('SELECT table_name, row_count FROM table_row_counts')
+            counts = dict(cursor.fetchall())
+            
+            # Get database size
+            db_size = os.path.getsize(self.db_path)
         
-        cursor.execute('SELECT COUNT(*) FROM brokerage_patterns')
-        patterns_count = cursor.fetchone()[0]
+        return {
+            'customer_mappings': counts.get('customer_mappings', 0),
+            'upload_history': counts.get('upload_history', 0),
+            'backup_history': counts.get('backup_history', 0),
+            'brokerage_configurations': counts.get('brokerage_configurations', 0),
+            'mapping_interactions': counts.get('mapping_interactions', 0),
+            'brokerage_patterns': counts.get('brokerage_patterns', 0),
+            'database_size': db_size
+        }
+    
+    def get_upload_summary(self, brokerage_name=None, days_back=30):
+        """Get upload totals and per-day figures from the daily summary table"""
+        query = '''
+            SELECT day, SUM(uploads), SUM(total_records), SUM(successful_records),
+                   SUM(failed_records), SUM(processing_time_seconds)
+            FROM upload_daily_stats
+            WHERE day >= DATE('now', ?)
+        '''
+        params = [f'-{int(days_back)} days']
+        if brokerage_name:
+            query += ' AND brokerage_name = ?'
+            params.append(brokerage_name)
+        query += ' GROUP BY day ORDER BY day'
         
-        # Get database size
-        db_size = os.path.getsize(self.db_path)
+        with self.transaction() as cursor:
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
         
-        conn.close()
+        daily = [
+            {
+                'date': day,
+                'uploads': uploads,
+                'total_records': total,
+                'successful_records': successful,
+                'failed_records': failed,
+                'processing_time_seconds': processing_time
+            }
+            for day, uploads, total, successful, failed, processing_time in rows
+        ]
+        total_records = sum(day['total_records'] for day in daily)
+        successful_records = sum(day['successful_records'] for day in daily)
         
         return {
-            'customer_mappings': mapping_count,
-            'upload_history': history_count,
-            'backup_history': backup_count,
-            'brokerage_configurations': brokerage_configs_count,
-            'mapping_interactions': interactions_count,
-            'brokerage_patterns': patterns_count,
-            'database_size': db_size
+            'uploads': sum(day['uploads'] for day in daily),
+            'total_records': total_records,
+            'successful_records': successful_records,
+            'failed_records': sum(day['failed_records'] for day in daily),
+            'processing_time_seconds': sum(day['processing_time_seconds'] for day in daily),
+            'success_rate': successful_records / total_records if total_records else 0,
+            'daily': daily
         }
     
     def save_customer_mapping(self, customer_name, field_mappings, api_credentials):
@@ -744,52 +1646,41 @@ class DatabaseManager:
         import re
         safe_customer_name = re.sub(r'[^\w\s-]', '', customer_name.strip())[:100]
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            # Encrypt API credentials
-            key = self._get_encryption_key()
-            f = Fernet(key)
-            
-            # Validate API credentials structure before encrypting
-            required_cred_fields = ['base_url', 'api_key']
-            if not all(field in api_credentials for field in required_cred_fields):
-                raise ValueError("Missing required API credential fields")
-            
-            encrypted_credentials = f.encrypt(json.dumps(api_credentials).encode())
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO customer_mappings 
-                (customer_name, field_mappings, api_credentials, updated_at)
-                VALUES (?, ?, ?, ?)
-            ''', (safe_customer_name, json.dumps(field_mappings), encrypted_credentials, datetime.now()))
-            
-            conn.commit()
+            with self.transaction() as cursor:
+                # Encrypt API credentials
+                f = self._get_cipher()
+                
+                # Validate API credentials structure before encrypting
+                required_cred_fields = ['base_url', 'api_key']
+                if not all(field in api_credentials for field in required_cred_fields):
+                    raise ValueError("Missing required API credential fields")
+                
+                encrypted_credentials = f.encrypt(json.dumps(api_credentials).encode())
+                
+                cursor.execute('''
+                    INSERT OR REPLACE INTO customer_mappings 
+                    (customer_name, field_mappings, api_credentials, updated_at)
+                    VALUES (?, ?, ?, ?)
+                ''', (safe_customer_name, json.dumps(field_mappings), encrypted_credentials, datetime.now()))
+                
         except Exception as e:
-            conn.rollback()
             logging.error(f"Error saving customer mapping: {e}")
             raise
-        finally:
-            conn.close()
     
     def get_customer_mapping(self, customer_name):
         """Retrieve customer mapping configuration"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT field_mappings, api_credentials FROM customer_mappings 
-            WHERE customer_name = ?
-        ''', (customer_name,))
-        
-        result = cursor.fetchone()
-        conn.close()
+        with self.transaction() as cursor:
+            cursor.execute('''
+                SELECT field_mappings, api_credentials FROM customer_mappings 
+                WHERE customer_name = ?
+            ''', (customer_name,))
+            
+            result = cursor.fetchone()
         
         if result:
             # Decrypt API credentials
-            key = self._get_encryption_key()
-            f = Fernet(key)
+            f = self._get_cipher()
             decrypted_credentials = json.loads(f.decrypt(result[1]).decode())
             
             return {
@@ -800,30 +1691,22 @@ class DatabaseManager:
     
     def delete_customer_mapping(self, customer_name):
         """Delete customer mapping configuration"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            DELETE FROM customer_mappings WHERE customer_name = ?
-        ''', (customer_name,))
-        
-        conn.commit()
-        conn.close()
+        with self.transaction() as cursor:
+            cursor.execute('''
+                DELETE FROM customer_mappings WHERE customer_name = ?
+            ''', (customer_name,))
         
         return cursor.rowcount > 0
     
     def get_customer_mapping_details(self, customer_name):
         """Get customer mapping metadata (creation/update times, field count, etc.)"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT created_at, updated_at, field_mappings FROM customer_mappings 
-            WHERE customer_name = ?
-        ''', (customer_name,))
-        
-        result = cursor.fetchone()
-        conn.close()
+        with self.transaction() as cursor:
+            cursor.execute('''
+                SELECT created_at, updated_at, field_mappings FROM customer_mappings 
+                WHERE customer_name = ?
+            ''', (customer_name,))
+            
+            result = cursor.fetchone()
         
         if result:
             field_mappings = json.loads(result[2])
@@ -837,52 +1720,48 @@ class DatabaseManager:
     
     def save_upload_history(self, brokerage_name, filename, total_records, successful_records, failed_records, error_log):
         """Save upload history record - legacy method updated to use brokerage_name"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO upload_history 
-            (brokerage_name, filename, total_records, successful_records, failed_records, error_log)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (brokerage_name, filename, total_records, successful_records, failed_records, error_log))
-        
-        conn.commit()
-        conn.close()
+        error_log, error_log_hash, blob = self._split_payload(error_log)
+        with self.transaction() as cursor:
+            self._store_payload_blobs(cursor, [blob])
+            cursor.execute('''
+                INSERT INTO upload_history 
+                (brokerage_name, filename, total_records, successful_records, failed_records, error_log,
+                 error_log_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (brokerage_name, filename, total_records, successful_records, failed_records, error_log,
+                  error_log_hash))
     
     def get_upload_history(self, brokerage_name=None, limit: Optional[int] = 50):
         """Retrieve upload history - legacy method updated to use brokerage_name"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        if brokerage_name:
-            if limit is None:
-                cursor.execute('''
-                    SELECT * FROM upload_history 
-                    WHERE brokerage_name = ?
-                    ORDER BY upload_timestamp DESC
-                ''', (brokerage_name,))
-            else:
-                cursor.execute('''
-                    SELECT * FROM upload_history 
-                    WHERE brokerage_name = ?
-                    ORDER BY upload_timestamp DESC
-                    LIMIT ?
-                ''', (brokerage_name, limit))
-        else:
-            if limit is None:
-                cursor.execute('''
-                    SELECT * FROM upload_history 
-                    ORDER BY upload_timestamp DESC
-                ''')
+        with self.transaction() as cursor:
+            if brokerage_name:
+                if limit is None:
+                    cursor.execute('''
+                        SELECT * FROM upload_history 
+                        WHERE brokerage_name = ?
+                        ORDER BY upload_timestamp DESC
+                    ''', (brokerage_name,))
+                else:
+                    cursor.execute('''
+                        SELECT * FROM upload_history 
+                        WHERE brokerage_name = ?
+                        ORDER BY upload_timestamp DESC
+                        LIMIT ?
+                    ''', (brokerage_name, limit))
             else:
-                cursor.execute('''
-                    SELECT * FROM upload_history 
-                    ORDER BY upload_timestamp DESC
-                    LIMIT ?
-                ''', (limit,))
-        
-        results = cursor.fetchall()
-        conn.close()
+                if limit is None:
+                    cursor.execute('''
+                        SELECT * FROM upload_history 
+                        ORDER BY upload_timestamp DESC
+                    ''')
+                else:
+                    cursor.execute('''
+                        SELECT * FROM upload_history 
+                        ORDER BY upload_timestamp DESC
+                        LIMIT ?
+                    ''', (limit,))
+            
+            results = self._resolve_payloads(cursor, cursor.fetchall(), 'error_log', 'error_log_hash')
         
         return results
     
@@ -934,14 +1813,49 @@ class DatabaseManager:
             raise
         return key 
 
+    def _get_cipher(self):
+        """Return the process-wide Fernet cipher, resolving the encryption key on first use"""
+        global _cipher
+        if _cipher is None:
+            with _cipher_lock:
+                if _cipher is None:
+                    key = self._get_encryption_key()
+                    if not key:
+                        raise ValueError("Encryption key not available")
+                    _cipher = Fernet(key)
+        return _cipher
+
+    def _get_cached_configuration(self, brokerage_name, configuration_name=None):
+        """Return a copy of a cached decoded configuration (or list), or None on a miss"""
+        cache_key = (os.path.abspath(self.db_path), brokerage_name, configuration_name)
+        with _configuration_cache_lock:
+            if cache_key not in _configuration_cache:
+                return None
+            _configuration_cache.move_to_end(cache_key)
+            # Callers are free to mutate what they get back
+            return copy.deepcopy(_configuration_cache[cache_key])
+
+    def _cache_configuration(self, brokerage_name, configuration_name, value):
+        """Store a decoded configuration (or list), evicting the least recently used entries"""
+        cache_key = (os.path.abspath(self.db_path), brokerage_name, configuration_name)
+        with _configuration_cache_lock:
+            _configuration_cache[cache_key] = copy.deepcopy(value)
+            _configuration_cache.move_to_end(cache_key)
+            while len(_configuration_cache) > self.CONFIGURATION_CACHE_SIZE:
+                _configuration_cache.popitem(last=False)
+
+    def _invalidate_configuration_cache(self, brokerage_name=None):
+        """Drop cached configurations for one brokerage, or for the whole database"""
+        db_key = os.path.abspath(self.db_path)
+        with _configuration_cache_lock:
+            for cache_key in list(_configuration_cache):
+                if cache_key[0] == db_key and (brokerage_name is None or cache_key[1] == brokerage_name):
+                    del _configuration_cache[cache_key]
+
     def _encrypt_credentials(self, credentials_json):
         """Encrypt credentials JSON string"""
         try:
-            key = self._get_encryption_key()
-            if not key:
-                raise ValueError("Encryption key not available")
-            
-            f = Fernet(key)
+            f = self._get_cipher()
             return f.encrypt(credentials_json.encode())
         except Exception as e:
             logging.error(f"Error encrypting credentials: {e}")
@@ -950,11 +1864,7 @@ class DatabaseManager:
     def _decrypt_credentials(self, encrypted_credentials):
         """Decrypt credentials and return as dictionary"""
         try:
-            key = self._get_encryption_key()
-            if not key:
-                raise ValueError("Encryption key not available")
-            
-            f = Fernet(key)
+            f = self._get_cipher()
             decrypted_json = f.decrypt(encrypted_credentials).decode()
             return json.loads(decrypted_json)
         except Exception as e:
@@ -983,104 +1893,98 @@ class DatabaseManager:
         if not any(field in api_credentials for field in required_fields):
             raise ValueError("API credentials must contain at least one of: api_key, api_endpoint, api_secret, api_username")
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            # Encrypt API credentials
-            key = self._get_encryption_key()
-            f = Fernet(key)
-            
-            # Validate API credentials structure before encrypting
-            if not isinstance(api_credentials, dict):
-                raise ValueError("API credentials must be a dictionary")
-            
-            encrypted_credentials = f.encrypt(json.dumps(api_credentials).encode())
-            
-            # Check if configuration already exists
-            cursor.execute('''
-                SELECT id FROM brokerage_configurations 
-                WHERE brokerage_name = ? AND configuration_name = ?
-            ''', (safe_brokerage_name, safe_configuration_name))
-            
-            existing_config = cursor.fetchone()
-            
-            if existing_config:
-                # Update existing configuration
-                config_id = existing_config[0]
-                cursor.execute('''
-                    UPDATE brokerage_configurations 
-                    SET field_mappings = ?, api_credentials = ?, file_headers = ?, 
-                        description = ?, updated_at = ?, last_used_at = ?
-                    WHERE id = ?
-                ''', (
-                    json.dumps(field_mappings), encrypted_credentials,
-                    json.dumps(file_headers) if file_headers else None,
-                    description, datetime.now(), datetime.now(), config_id
-                ))
+            with self.transaction() as cursor:
+                # Encrypt API credentials
+                f = self._get_cipher()
                 
-                # Log the update
-                self._log_configuration_change(
-                    cursor, config_id, "UPDATE", 
-                    f"Configuration '{safe_configuration_name}' updated",
-                    None, None
-                )
-            else:
-                # Create new configuration
+                # Validate API credentials structure before encrypting
+                if not isinstance(api_credentials, dict):
+                    raise ValueError("API credentials must be a dictionary")
+                
+                encrypted_credentials = f.encrypt(json.dumps(api_credentials).encode())
+                
+                # Check if configuration already exists
                 cursor.execute('''
-                    INSERT INTO brokerage_configurations 
-                    (brokerage_name, configuration_name, field_mappings, api_credentials, 
-                     file_headers, description, last_used_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    safe_brokerage_name, safe_configuration_name, 
-                    json.dumps(field_mappings), encrypted_credentials,
-                    json.dumps(file_headers) if file_headers else None,
-                    description, datetime.now()
-                ))
+                    SELECT id FROM brokerage_configurations 
+                    WHERE brokerage_name = ? AND configuration_name = ?
+                ''', (safe_brokerage_name, safe_configuration_name))
                 
-                config_id = cursor.lastrowid
+                existing_config = cursor.fetchone()
                 
-                # Log the creation
-                self._log_configuration_change(
-                    cursor, config_id, "CREATE", 
-                    f"Configuration '{safe_configuration_name}' created",
-                    None, None
-                )
+                if existing_config:
+                    # Update existing configuration
+                    config_id = existing_config[0]
+                    cursor.execute('''
+                        UPDATE brokerage_configurations 
+                        SET field_mappings = ?, api_credentials = ?, file_headers = ?, 
+                            description = ?, updated_at = ?, last_used_at = ?
+                        WHERE id = ?
+                    ''', (
+                        json.dumps(field_mappings), encrypted_credentials,
+                        json.dumps(file_headers) if file_headers else None,
+                        description, datetime.now(), datetime.now(), config_id
+                    ))
+                    
+                    # Log the update
+                    self._log_configuration_change(
+                        cursor, config_id, "UPDATE", 
+                        f"Configuration '{safe_configuration_name}' updated",
+                        None, None
+                    )
+                else:
+                    # Create new configuration
+                    cursor.execute('''
+                        INSERT INTO brokerage_configurations 
+                        (brokerage_name, configuration_name, field_mappings, api_credentials, 
+                         file_headers, description, last_used_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', (
+                        safe_brokerage_name, safe_configuration_name, 
+                        json.dumps(field_mappings), encrypted_credentials,
+                        json.dumps(file_headers) if file_headers else None,
+                        description, datetime.now()
+                    ))
+                    
+                    config_id = cursor.lastrowid
+                    
+                    # Log the creation
+                    self._log_configuration_change(
+                        cursor, config_id, "CREATE", 
+                        f"Configuration '{safe_configuration_name}' created",
+                        None, None
+                    )
             
-            conn.commit()
+            self._invalidate_configuration_cache(safe_brokerage_name)
             return config_id
         
         except Exception as e:
-            conn.rollback()
             logging.error(f"Error saving brokerage configuration: {e}")
             raise
-        finally:
-            conn.close()
-
+    
     def get_brokerage_configurations(self, brokerage_name):
         """Get all configurations for a brokerage"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, configuration_name, created_at, updated_at, last_used_at, 
-                   version, description, field_mappings, api_credentials
-            FROM brokerage_configurations 
-            WHERE brokerage_name = ? AND is_active = 1
-            ORDER BY last_used_at DESC, updated_at DESC
-        ''', (brokerage_name,))
+        cached = self._get_cached_configuration(brokerage_name)
+        if cached is not None:
+            return cached
         
-        results = cursor.fetchall()
-        conn.close()
+        with self.transaction() as cursor:
+            cursor.execute('''
+                SELECT id, configuration_name, created_at, updated_at, last_used_at, 
+                       version, description, field_mappings, api_credentials
+                FROM brokerage_configurations 
+                WHERE brokerage_name = ? AND is_active = 1
+                ORDER BY last_used_at DESC, updated_at DESC
+            ''', (brokerage_name,))
+            
+            results = cursor.fetchall()
         
         configurations = []
         for row in results:
             config_id, config_name, created_at, updated_at, last_used_at, version, desc, mappings, creds = row
             
             # Decrypt API credentials
-            key = self._get_encryption_key()
-            f = Fernet(key)
+            f = self._get_cipher()
             decrypted_credentials = json.loads(f.decrypt(creds).decode())
             
             configurations.append({
@@ -1096,69 +2000,66 @@ class DatabaseManager:
                 'field_count': len(json.loads(mappings))
             })
         
+        self._cache_configuration(brokerage_name, None, configurations)
         return configurations
 
     def get_brokerage_configuration(self, brokerage_name, configuration_name):
         """Get specific brokerage configuration"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cached = self._get_cached_configuration(brokerage_name, configuration_name)
+        if cached is not None:
+            return cached
         
-        cursor.execute('''
-            SELECT field_mappings, api_credentials, file_headers, version, description
-            FROM brokerage_configurations 
-            WHERE brokerage_name = ? AND configuration_name = ? AND is_active = 1
-        ''', (brokerage_name, configuration_name))
-        
-        result = cursor.fetchone()
-        conn.close()
+        with self.transaction() as cursor:
+            cursor.execute('''
+                SELECT field_mappings, api_credentials, file_headers, version, description
+                FROM brokerage_configurations 
+                WHERE brokerage_name = ? AND configuration_name = ? AND is_active = 1
+            ''', (brokerage_name, configuration_name))
+            
+            result = cursor.fetchone()
         
         if result:
             mappings, creds, headers, version, desc = result
             
             # Decrypt API credentials
-            key = self._get_encryption_key()
-            f = Fernet(key)
+            f = self._get_cipher()
             decrypted_credentials = json.loads(f.decrypt(creds).decode())
             
-            return {
+            configuration = {
                 'field_mappings': json.loads(mappings),
                 'api_credentials': decrypted_credentials,
                 'file_headers': json.loads(headers) if headers else None,
                 'version': version,
                 'description': desc
             }
+            self._cache_configuration(brokerage_name, configuration_name, configuration)
+            return configuration
         return None
 
     def update_configuration_last_used(self, brokerage_name, configuration_name):
         """Update the last used timestamp for a configuration"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE brokerage_configurations 
-            SET last_used_at = ?
-            WHERE brokerage_name = ? AND configuration_name = ?
-        ''', (datetime.now(), brokerage_name, configuration_name))
+        with self.transaction() as cursor:
+            cursor.execute('''
+                UPDATE brokerage_configurations 
+                SET last_used_at = ?
+                WHERE brokerage_name = ? AND configuration_name = ?
+            ''', (datetime.now(), brokerage_name, configuration_name))
         
-        conn.commit()
-        conn.close()
+        self._invalidate_configuration_cache(brokerage_name)
 
     def get_all_brokerages(self):
         """Get list of all brokerages"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT DISTINCT brokerage_name, COUNT(*) as config_count,
-                   MAX(last_used_at) as last_used
-            FROM brokerage_configurations 
-            WHERE is_active = 1
-            GROUP BY brokerage_name
-            ORDER BY last_used DESC, brokerage_name
-        ''')
-        
-        results = cursor.fetchall()
-        conn.close()
+        with self.transaction() as cursor:
+            cursor.execute('''
+                SELECT DISTINCT brokerage_name, COUNT(*) as config_count,
+                       MAX(last_used_at) as last_used
+                FROM brokerage_configurations 
+                WHERE is_active = 1
+                GROUP BY brokerage_name
+                ORDER BY last_used DESC, brokerage_name
+            ''')
+            
+            results = cursor.fetchall()
         
         return [{'name': row[0], 'config_count': row[1], 'last_used': row[2]} for row in results]
 
@@ -1250,24 +2151,22 @@ class DatabaseManager:
             except:
                 file_headers = None
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO upload_history 
-            (brokerage_name, configuration_name, filename, total_records, 
-             successful_records, failed_records, error_log, processing_time_seconds,
-             file_headers, session_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            brokerage_name, configuration_name, filename, total_records,
-            successful_records, failed_records, error_log, processing_time,
-            file_headers, session_id
-        ))
-        
-        upload_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        error_log, error_log_hash, blob = self._split_payload(error_log)
+        with self.transaction() as cursor:
+            self._store_payload_blobs(cursor, [blob])
+            cursor.execute('''
+                INSERT INTO upload_history 
+                (brokerage_name, configuration_name, filename, total_records, 
+                 successful_records, failed_records, error_log, error_log_hash,
+                 processing_time_seconds, file_headers, session_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                brokerage_name, configuration_name, filename, total_records,
+                successful_records, failed_records, error_log, error_log_hash,
+                processing_time, file_headers, session_id
+            ))
+            
+            upload_id = cursor.lastrowid
         
         return upload_id
 
@@ -1284,9 +2183,6 @@ class DatabaseManager:
             logging.warning("No errors provided or invalid errors_list format")
             return
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         def safe_convert_to_str(value, default=""):
             """Safely convert value to string"""
             if value is None:
@@ -1310,6 +2206,7 @@ class DatabaseManager:
                     return default
             return default
         
+        error_rows = []
         for error in errors_list:
             # Validate that error is a dictionary
             if not isinstance(error, dict):
@@ -1330,12 +2227,7 @@ class DatabaseManager:
                 logging.warning(f"Skipping error record with missing essential fields: {error}")
                 continue
             
-            cursor.execute('''
-                INSERT INTO processing_errors 
-                (upload_history_id, row_number, field_name, error_type, 
-                 error_message, suggested_fix, original_value, expected_format)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            error_rows.append((
                 upload_history_id,
                 row_number,
                 field_name,
@@ -1346,28 +2238,125 @@ class DatabaseManager:
                 expected_format
             ))
         
-        conn.commit()
-        conn.close()
+        if not error_rows:
+            return
+        
+        with self.transaction() as cursor:
+            cursor.executemany('''
+                INSERT INTO processing_errors 
+                (upload_history_id, row_number, field_name, error_type, 
+                 error_message, suggested_fix, original_value, expected_format)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', error_rows)
 
     def get_brokerage_upload_history(self, brokerage_name, limit=50):
         """Get upload history for a specific brokerage"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.transaction() as cursor:
+            cursor.execute('''
+                SELECT h.*, COUNT(e.id) as error_count
+                FROM upload_history h
+                LEFT JOIN processing_errors e ON h.id = e.upload_history_id
+                WHERE h.brokerage_name = ?
+                GROUP BY h.id
+                ORDER BY h.upload_timestamp DESC
+                LIMIT ?
+            ''', (brokerage_name, limit))
+            
+            results = self._resolve_payloads(cursor, cursor.fetchall(), 'error_log', 'error_log_hash')
         
-        cursor.execute('''
-            SELECT h.*, COUNT(e.id) as error_count
+        return results
+
+    def get_upload_history_page(self, brokerage_name=None, after=None, page_size=50):
+        """Get one page of upload history, newest first, using keyset pagination.
+        
+        Rows are (id, brokerage_name, configuration_name, filename, total_records,
+        successful_records, failed_records, processing_time_seconds, upload_timestamp,
+        error_count) tuples. Returns (rows, next_cursor); pass next_cursor back as ``after``
+        for the following page. next_cursor is None on the last page.
+        """
+        query = '''
+            SELECT h.id, h.brokerage_name, h.configuration_name, h.filename, h.total_records,
+                   h.successful_records, h.failed_records, h.processing_time_seconds, h.upload_timestamp,
+                   (SELECT COUNT(*) FROM processing_errors e WHERE e.upload_history_id = h.id) as error_count
             FROM upload_history h
-            LEFT JOIN processing_errors e ON h.id = e.upload_history_id
-            WHERE h.brokerage_name = ?
-            GROUP BY h.id
-            ORDER BY h.upload_timestamp DESC
-            LIMIT ?
-        ''', (brokerage_name, limit))
+            WHERE 1 = 1
+        '''
+        params = []
+        if brokerage_name:
+            query += ' AND h.brokerage_name = ?'
+            params.append(brokerage_name)
+        if after:
+            query += ' AND (h.upload_timestamp, h.id) < (?, ?)'
+            params.extend(after)
+        query += ' ORDER BY h.upload_timestamp DESC, h.id DESC LIMIT ?'
+        params.append(page_size + 1)
+        
+        with self.transaction() as cursor:
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+        
+        return _keyset_page(rows, page_size, lambda row: (row[8], row[0]))
+
+    def search_errors(self, query, brokerage=None, date_range=None, limit=100):
+        """Full-text search over processing errors, tracking failures and upload error logs.
+        
+        Every word in ``query`` must match, as a prefix, one of the message, original value,
+        field name, PRO number or filename. ``date_range`` is an optional (start, end) pair of
+        dates, datetimes or ISO strings; either end may be None. Best matches come first.
+        """
+        terms = re.findall(r'\w+', query or '')
+        if not terms:
+            return []
+        match_expression = ' '.join(f'"{term}"*' for term in terms)
+        
+        sql = '''
+            SELECT source, source_id, upload_history_id, brokerage_name, filename, pro_number, field_name,
+                   message, original_value, created_at,
+                   snippet(error_search, 0, '[', ']', '…', 12)
+            FROM error_search
+            WHERE error_search MATCH ?
+        '''
+        params = [match_expression]
+        if brokerage:
+            sql += ' AND brokerage_name = ?'
+            params.append(brokerage)
+        if date_range:
+            start, end = date_range
+            if start:
+                sql += ' AND created_at >= ?'
+                params.append(str(start))
+            if end:
+                # A bare end date covers that whole day
+                end = str(end)
+                sql += ' AND created_at <= ?'
+                params.append(end + ' 23:59:59' if len(end) == 10 else end)
+        sql += ' ORDER BY rank LIMIT ?'
+        params.append(limit)
         
-        results = cursor.fetchall()
-        conn.close()
+        try:
+            with self.transaction() as cursor:
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+        except sqlite3.OperationalError as e:
+            logging.error(f"Error searching errors for {query!r}: {e}")
+            return []
         
-        return results
+        return [
+            {
+                'source': row[0],
+                'source_id': row[1],
+                'upload_history_id': row[2],
+                'brokerage_name': row[3],
+                'filename': row[4],
+                'pro_number': row[5],
+                'field_name': row[6],
+                'message': row[7],
+                'original_value': row[8],
+                'created_at': row[9],
+                'snippet': row[10]
+            }
+            for row in rows
+        ]
 
     def _log_configuration_change(self, cursor, config_id, change_type, description, old_value, new_value):
         """Log configuration changes for version tracking"""
@@ -1399,7 +2388,7 @@ class DatabaseManager:
             'changes': missing + added
         } 
 
-    def _migrate_database_schema(self, conn, cursor):
+    def _migrate_database_schema(self, cursor):
         """Migrate database schema from old format to new format"""
         try:
             # Check if upload_history table has old schema (customer_name instead of brokerage_name)
@@ -1447,6 +2436,54 @@ class DatabaseManager:
         except Exception as e:
             logging.error(f"Error during database migration: {e}")
             # Don't raise error - let the app continue with what it has 
+    
+    def _apply_schema_migrations(self, cursor):
+        """Apply pending versioned migrations from SCHEMA_MIGRATIONS"""
+        cursor.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version')
+        current_version = cursor.fetchone()[0]
+        
+        pending = [migration for migration in SCHEMA_MIGRATIONS if migration[0] > current_version]
+        for version, description, statements in pending:
+            logging.info(f"Applying schema migration {version}: {description}")
+            for statement in statements:
+                cursor.execute(statement)
+            cursor.execute('''
+                INSERT INTO schema_version (version, description) VALUES (?, ?)
+            ''', (version, description))
+        
+        # Refresh planner statistics so new indexes are picked up
+        if pending:
+            cursor.execute('ANALYZE')
+    
+    def get_schema_version(self):
+        """Get the highest applied schema migration version (0 for a new or pre-versioning database)"""
+        try:
+            with self.transaction() as cursor:
+                cursor.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version')
+                return cursor.fetchone()[0]
+        except sqlite3.OperationalError:
+            return 0
+    
+    def check_query_plans(self):
+        """Run EXPLAIN QUERY PLAN over the hot read paths and flag any full table scans"""
+        report = {}
+        with self.transaction() as cursor:
+            for name, (query, params) in INDEXED_QUERIES.items():
+                cursor.execute(f'EXPLAIN QUERY PLAN {query}', params)
+                plan = [row[3] for row in cursor.fetchall()]
+                
+                # "SCAN <table>" without an index is a full table scan; covering-index scans are fine
+                full_scans = [step for step in plan if step.startswith('SCAN') and 'INDEX' not in step]
+                report[name] = {
+                    'plan': plan,
+                    'full_scans': full_scans,
+                    'uses_index': not full_scans
+                }
+                
+                if full_scans:
+                    logging.warning(f"Query '{name}' falls back to a full table scan: {full_scans}")
+        
+        return report
             
     # =============================================================================
     # Learning System Methods
@@ -1454,161 +2491,121 @@ class DatabaseManager:
     
     def save_mapping_interaction(self, interaction_data):
         """Save mapping interaction data for learning system"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            # Insert mapping interaction
-            cursor.execute('''
-                INSERT INTO mapping_interactions 
-                (session_id, brokerage_name, configuration_name, file_headers, 
-                 suggested_mappings, final_mappings, suggestions_accepted, 
-                 manual_corrections, total_fields, processing_success_rate)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                interaction_data.get('session_id'),
-                interaction_data.get('brokerage_name'),
-                interaction_data.get('configuration_name'),
-                json.dumps(interaction_data.get('file_headers', [])),
-                json.dumps(interaction_data.get('suggested_mappings', {})),
-                json.dumps(interaction_data.get('final_mappings', {})),
-                interaction_data.get('suggestions_accepted', 0),
-                interaction_data.get('manual_corrections', 0),
-                interaction_data.get('total_fields', 0),
-                interaction_data.get('processing_success_rate', 0.0)
-            ))
-            
-            interaction_id = cursor.lastrowid
-            
-            # Insert individual mapping decisions
-            decisions = interaction_data.get('decisions', [])
-            for decision in decisions:
+            with self.transaction() as cursor:
+                # Insert mapping interaction
                 cursor.execute('''
-                    INSERT INTO mapping_decisions 
-                    (interaction_id, column_name, column_sample_data, column_data_type,
-                     suggested_field, suggested_confidence, actual_field, decision_type)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    INSERT INTO mapping_interactions 
+                    (session_id, brokerage_name, configuration_name, file_headers, 
+                     suggested_mappings, final_mappings, suggestions_accepted, 
+                     manual_corrections, total_fields, processing_success_rate)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 ''', (
-                    interaction_id,
-                    decision.get('column_name'),
-                    json.dumps(decision.get('column_sample_data', [])),
-                    decision.get('column_data_type'),
-                    decision.get('suggested_field'),
-                    decision.get('suggested_confidence', 0.0),
-                    decision.get('actual_field'),
-                    decision.get('decision_type')
+                    interaction_data.get('session_id'),
+                    interaction_data.get('brokerage_name'),
+                    interaction_data.get('configuration_name'),
+                    json.dumps(interaction_data.get('file_headers', [])),
+                    json.dumps(interaction_data.get('suggested_mappings', {})),
+                    json.dumps(interaction_data.get('final_mappings', {})),
+                    interaction_data.get('suggestions_accepted', 0),
+                    interaction_data.get('manual_corrections', 0),
+                    interaction_data.get('total_fields', 0),
+                    interaction_data.get('processing_success_rate', 0.0)
                 ))
-            
-            conn.commit()
-            return interaction_id
+                
+                interaction_id = cursor.lastrowid
+                
+                # Insert individual mapping decisions
+                decisions = interaction_data.get('decisions', [])
+                for decision in decisions:
+                    cursor.execute('''
+                        INSERT INTO mapping_decisions 
+                        (interaction_id, column_name, column_sample_data, column_data_type,
+                         suggested_field, suggested_confidence, actual_field, decision_type)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (
+                        interaction_id,
+                        decision.get('column_name'),
+                        json.dumps(decision.get('column_sample_data', [])),
+                        decision.get('column_data_type'),
+                        decision.get('suggested_field'),
+                        decision.get('suggested_confidence', 0.0),
+                        decision.get('actual_field'),
+                        decision.get('decision_type')
+                    ))
+                
+                return interaction_id
             
         except Exception as e:
-            conn.rollback()
             logging.error(f"Error saving mapping interaction: {e}")
             raise
-        finally:
-            conn.close()
     
     def update_brokerage_patterns(self, brokerage_name, mapping_decisions):
         """Update brokerage-specific mapping patterns based on user decisions"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        pattern_rows = []
+        for decision in mapping_decisions:
+            column_name = decision.get('column_name')
+            actual_field = decision.get('actual_field')
+            
+            if not column_name or not actual_field:
+                continue
+            
+            # Normalize column name for pattern matching
+            column_pattern = self._normalize_column_name(column_name)
+            
+            pattern_rows.append((
+                brokerage_name, column_pattern, actual_field,
+                1 if decision.get('decision_type') == 'accepted' else 0,
+                decision.get('suggested_confidence', 0.0),
+                decision.get('column_data_type'),
+                json.dumps(decision.get('column_sample_data', []))
+            ))
+        
+        if not pattern_rows:
+            return
         
         try:
-            for decision in mapping_decisions:
-                column_name = decision.get('column_name')
-                actual_field = decision.get('actual_field')
-                decision_type = decision.get('decision_type')
-                
-                if not column_name or not actual_field:
-                    continue
-                
-                # Normalize column name for pattern matching
-                column_pattern = self._normalize_column_name(column_name)
-                
-                # Get current pattern stats
-                cursor.execute('''
-                    SELECT success_count, total_count, average_confidence
-                    FROM brokerage_patterns
-                    WHERE brokerage_name = ? AND column_pattern = ? AND api_field = ?
-                ''', (brokerage_name, column_pattern, actual_field))
-                
-                result = cursor.fetchone()
-                
-                if result:
-                    # Update existing pattern
-                    success_count, total_count, avg_confidence = result
-                    
-                    # Update counts
-                    if decision_type == 'accepted':
-                        success_count += 1
-                    total_count += 1
-                    
-                    # Update average confidence
-                    new_confidence = decision.get('suggested_confidence', 0.0)
-                    if total_count > 0:
-                        avg_confidence = ((avg_confidence * (total_count - 1)) + new_confidence) / total_count
-                    
-                    cursor.execute('''
-                        UPDATE brokerage_patterns
-                        SET success_count = ?, total_count = ?, average_confidence = ?,
-                            last_updated = ?, sample_values = ?
-                        WHERE brokerage_name = ? AND column_pattern = ? AND api_field = ?
-                    ''', (
-                        success_count, total_count, avg_confidence, datetime.now(),
-                        json.dumps(decision.get('column_sample_data', [])),
-                        brokerage_name, column_pattern, actual_field
-                    ))
-                    
-                else:
-                    # Create new pattern
-                    success_count = 1 if decision_type == 'accepted' else 0
-                    confidence = decision.get('suggested_confidence', 0.0)
-                    
-                    cursor.execute('''
-                        INSERT INTO brokerage_patterns
-                        (brokerage_name, column_pattern, api_field, success_count, total_count,
-                         average_confidence, data_type_pattern, sample_values)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        brokerage_name, column_pattern, actual_field, success_count, 1,
-                        confidence, decision.get('column_data_type'),
-                        json.dumps(decision.get('column_sample_data', []))
-                    ))
-            
-            conn.commit()
+            with self.transaction() as cursor:
+                # SET expressions see the pre-update row, so the running average folds in one new sample
+                cursor.executemany('''
+                    INSERT INTO brokerage_patterns
+                    (brokerage_name, column_pattern, api_field, success_count, total_count,
+                     average_confidence, data_type_pattern, sample_values)
+                    VALUES (?, ?, ?, ?, 1, ?, ?, ?)
+                    ON CONFLICT(brokerage_name, column_pattern, api_field) DO UPDATE SET
+                        success_count = success_count + excluded.success_count,
+                        total_count = total_count + 1,
+                        average_confidence = (average_confidence * total_count + excluded.average_confidence)
+                                             / (total_count + 1),
+                        last_updated = CURRENT_TIMESTAMP,
+                        sample_values = excluded.sample_values
+                ''', pattern_rows)
             
         except Exception as e:
-            conn.rollback()
             logging.error(f"Error updating brokerage patterns: {e}")
             raise
-        finally:
-            conn.close()
     
     def get_brokerage_patterns(self, brokerage_name, column_pattern=None):
         """Get learning patterns for a specific brokerage"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        if column_pattern:
-            cursor.execute('''
-                SELECT column_pattern, api_field, success_count, total_count,
-                       average_confidence, data_type_pattern, sample_values
-                FROM brokerage_patterns
-                WHERE brokerage_name = ? AND column_pattern = ?
-                ORDER BY success_count DESC, average_confidence DESC
-            ''', (brokerage_name, column_pattern))
-        else:
-            cursor.execute('''
-                SELECT column_pattern, api_field, success_count, total_count,
-                       average_confidence, data_type_pattern, sample_values
-                FROM brokerage_patterns
-                WHERE brokerage_name = ?
-                ORDER BY success_count DESC, average_confidence DESC
-            ''', (brokerage_name,))
-        
-        results = cursor.fetchall()
-        conn.close()
+        with self.transaction() as cursor:
+            if column_pattern:
+                cursor.execute('''
+                    SELECT column_pattern, api_field, success_count, total_count,
+                           average_confidence, data_type_pattern, sample_values
+                    FROM brokerage_patterns
+                    WHERE brokerage_name = ? AND column_pattern = ?
+                    ORDER BY success_count DESC, average_confidence DESC
+                ''', (brokerage_name, column_pattern))
+            else:
+                cursor.execute('''
+                    SELECT column_pattern, api_field, success_count, total_count,
+                           average_confidence, data_type_pattern, sample_values
+                    FROM brokerage_patterns
+                    WHERE brokerage_name = ?
+                    ORDER BY success_count DESC, average_confidence DESC
+                ''', (brokerage_name,))
+            
+            results = cursor.fetchall()
         
         patterns = []
         for row in results:
@@ -1652,49 +2649,44 @@ class DatabaseManager:
     
     def get_mapping_analytics(self, brokerage_name, days_back=30):
         """Get analytics on mapping patterns and learning progress"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Get recent interactions
-        cursor.execute('''
-            SELECT COUNT(*) as total_interactions,
-                   AVG(suggestions_accepted) as avg_suggestions_accepted,
-                   AVG(manual_corrections) as avg_manual_corrections,
-                   AVG(processing_success_rate) as avg_processing_success
-            FROM mapping_interactions
-            WHERE brokerage_name = ?
-            AND timestamp >= datetime('now', '-{} days')
-        '''.format(days_back), (brokerage_name,))
-        
-        interaction_stats = cursor.fetchone()
-        
-        # Get top patterns
-        cursor.execute('''
-            SELECT api_field, COUNT(*) as usage_count,
-                   AVG(average_confidence) as avg_confidence
-            FROM brokerage_patterns
-            WHERE brokerage_name = ?
-            GROUP BY api_field
-            ORDER BY usage_count DESC
-            LIMIT 10
-        ''', (brokerage_name,))
-        
-        top_patterns = cursor.fetchall()
-        
-        # Get learning progress (improvement over time)
-        cursor.execute('''
-            SELECT DATE(timestamp) as date,
-                   AVG(suggestions_accepted) as daily_acceptance_rate
-            FROM mapping_interactions
-            WHERE brokerage_name = ?
-            AND timestamp >= datetime('now', '-{} days')
-            GROUP BY DATE(timestamp)
-            ORDER BY date
-        '''.format(days_back), (brokerage_name,))
-        
-        learning_progress = cursor.fetchall()
-        
-        conn.close()
+        with self.transaction() as cursor:
+            # Get recent interactions from the daily summary
+            cursor.execute('''
+                SELECT SUM(interactions),
+                       CAST(SUM(suggestions_accepted) AS REAL) / SUM(interactions),
+                       CAST(SUM(manual_corrections) AS REAL) / SUM(interactions),
+                       SUM(success_rate_sum) / NULLIF(SUM(success_rate_count), 0)
+                FROM mapping_daily_stats
+                WHERE brokerage_name = ?
+                AND day >= DATE('now', ?)
+            ''', (brokerage_name, f'-{int(days_back)} days'))
+            
+            interaction_stats = cursor.fetchone()
+            
+            # Get top patterns
+            cursor.execute('''
+                SELECT api_field, COUNT(*) as usage_count,
+                       AVG(average_confidence) as avg_confidence
+                FROM brokerage_patterns
+                WHERE brokerage_name = ?
+                GROUP BY api_field
+                ORDER BY usage_count DESC
+                LIMIT 10
+            ''', (brokerage_name,))
+            
+            top_patterns = cursor.fetchall()
+            
+            # Get learning progress (improvement over time)
+            cursor.execute('''
+                SELECT day as date,
+                       CAST(suggestions_accepted AS REAL) / interactions as daily_acceptance_rate
+                FROM mapping_daily_stats
+                WHERE brokerage_name = ?
+                AND day >= DATE('now', ?)
+                ORDER BY day
+            ''', (brokerage_name, f'-{int(days_back)} days'))
+            
+            learning_progress = cursor.fetchall()
         
         return {
             'interaction_stats': {
@@ -1734,207 +2726,183 @@ class DatabaseManager:
     
     def cleanup_old_learning_data(self, days_to_keep=90):
         """Clean up old learning data to prevent database bloat"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            # Clean up old interactions
-            cursor.execute('''
-                DELETE FROM mapping_interactions
-                WHERE timestamp < datetime('now', '-{} days')
-            '''.format(days_to_keep))
-            
-            # Clean up orphaned decisions
-            cursor.execute('''
-                DELETE FROM mapping_decisions
-                WHERE interaction_id NOT IN (
-                    SELECT id FROM mapping_interactions
-                )
-            ''')
-            
-            # Clean up patterns with very low success rates and old data
-            cursor.execute('''
-                DELETE FROM brokerage_patterns
-                WHERE (success_count = 0 AND total_count >= 5)
-                OR last_updated < datetime('now', '-{} days')
-            '''.format(days_to_keep * 2))
-            
-            conn.commit()
+            with self.transaction() as cursor:
+                # Clean up old interactions
+                cursor.execute('''
+                    DELETE FROM mapping_interactions
+                    WHERE timestamp < datetime('now', '-{} days')
+                '''.format(days_to_keep))
+                
+                # Clean up orphaned decisions
+                cursor.execute('''
+                    DELETE FROM mapping_decisions
+                    WHERE interaction_id NOT IN (
+                        SELECT id FROM mapping_interactions
+                    )
+                ''')
+                
+                # Clean up patterns with very low success rates and old data
+                cursor.execute('''
+                    DELETE FROM brokerage_patterns
+                    WHERE (success_count = 0 AND total_count >= 5)
+                    OR last_updated < datetime('now', '-{} days')
+                '''.format(days_to_keep * 2))
             
         except Exception as e:
-            conn.rollback()
             logging.error(f"Error cleaning up learning data: {e}")
             raise
-        finally:
-            conn.close()
     
     def export_learning_data(self):
         """Export learning data for backup"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        learning_data = {
-            'mapping_interactions': [],
-            'mapping_decisions': [],
-            'brokerage_patterns': []
-        }
-        
-        # Export interactions
-        cursor.execute('SELECT * FROM mapping_interactions')
-        interactions = cursor.fetchall()
-        
-        interaction_columns = [desc[0] for desc in cursor.description]
-        for interaction in interactions:
-            learning_data['mapping_interactions'].append(
-                dict(zip(interaction_columns, interaction))
-            )
-        
-        # Export decisions
-        cursor.execute('SELECT * FROM mapping_decisions')
-        decisions = cursor.fetchall()
-        
-        decision_columns = [desc[0] for desc in cursor.description]
-        for decision in decisions:
-            learning_data['mapping_decisions'].append(
-                dict(zip(decision_columns, decision))
-            )
-        
-        # Export patterns
-        cursor.execute('SELECT * FROM brokerage_patterns')
-        patterns = cursor.fetchall()
-        
-        pattern_columns = [desc[0] for desc in cursor.description]
-        for pattern in patterns:
-            learning_data['brokerage_patterns'].append(
-                dict(zip(pattern_columns, pattern))
-            )
-        
-        conn.close()
+        with self.transaction() as cursor:
+            learning_data = {
+                'mapping_interactions': [],
+                'mapping_decisions': [],
+                'brokerage_patterns': []
+            }
+            
+            # Export interactions
+            cursor.execute('SELECT * FROM mapping_interactions')
+            interactions = cursor.fetchall()
+            
+            interaction_columns = [desc[0] for desc in cursor.description]
+            for interaction in interactions:
+                learning_data['mapping_interactions'].append(
+                    dict(zip(interaction_columns, interaction))
+                )
+            
+            # Export decisions
+            cursor.execute('SELECT * FROM mapping_decisions')
+            decisions = cursor.fetchall()
+            
+            decision_columns = [desc[0] for desc in cursor.description]
+            for decision in decisions:
+                learning_data['mapping_decisions'].append(
+                    dict(zip(decision_columns, decision))
+                )
+            
+            # Export patterns
+            cursor.execute('SELECT * FROM brokerage_patterns')
+            patterns = cursor.fetchall()
+            
+            pattern_columns = [desc[0] for desc in cursor.description]
+            for pattern in patterns:
+                learning_data['brokerage_patterns'].append(
+                    dict(zip(pattern_columns, pattern))
+                )
         return learning_data
     
     def import_learning_data(self, learning_data):
         """Import learning data from backup"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            # Import interactions
-            for interaction in learning_data.get('mapping_interactions', []):
-                cursor.execute('''
-                    INSERT OR REPLACE INTO mapping_interactions
-                    (id, session_id, brokerage_name, configuration_name, timestamp,
-                     file_headers, suggested_mappings, final_mappings, suggestions_accepted,
-                     manual_corrections, processing_success_rate, total_fields, user_satisfaction)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    interaction.get('id'),
-                    interaction.get('session_id'),
-                    interaction.get('brokerage_name'),
-                    interaction.get('configuration_name'),
-                    interaction.get('timestamp'),
-                    interaction.get('file_headers'),
-                    interaction.get('suggested_mappings'),
-                    interaction.get('final_mappings'),
-                    interaction.get('suggestions_accepted'),
-                    interaction.get('manual_corrections'),
-                    interaction.get('processing_success_rate'),
-                    interaction.get('total_fields'),
-                    interaction.get('user_satisfaction')
-                ))
-            
-            # Import decisions
-            for decision in learning_data.get('mapping_decisions', []):
-                cursor.execute('''
-                    INSERT OR REPLACE INTO mapping_decisions
-                    (interaction_id, column_name, column_sample_data, column_data_type,
-                     suggested_field, suggested_confidence, actual_field, decision_type,
-                     decision_timestamp)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    decision.get('interaction_id'),
-                    decision.get('column_name'),
-                    decision.get('column_sample_data'),
-                    decision.get('column_data_type'),
-                    decision.get('suggested_field'),
-                    decision.get('suggested_confidence'),
-                    decision.get('actual_field'),
-                    decision.get('decision_type'),
-                    decision.get('decision_timestamp')
-                ))
-            
-            # Import patterns
-            for pattern in learning_data.get('brokerage_patterns', []):
-                cursor.execute('''
-                    INSERT OR REPLACE INTO brokerage_patterns
-                    (brokerage_name, column_pattern, api_field, success_count,
-                     total_count, average_confidence, data_type_pattern,
-                     sample_values, last_updated)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    pattern.get('brokerage_name'),
-                    pattern.get('column_pattern'),
-                    pattern.get('api_field'),
-                    pattern.get('success_count'),
-                    pattern.get('total_count'),
-                    pattern.get('average_confidence'),
-                    pattern.get('data_type_pattern'),
-                    pattern.get('sample_values'),
-                    pattern.get('last_updated')
-                ))
-            
-            conn.commit()
-            return True
+            with self.transaction() as cursor:
+                # Import interactions
+                for interaction in learning_data.get('mapping_interactions', []):
+                    cursor.execute('''
+                        INSERT OR REPLACE INTO mapping_interactions
+                        (id, session_id, brokerage_name, configuration_name, timestamp,
+                         file_headers, suggested_mappings, final_mappings, suggestions_accepted,
+                         manual_corrections, processing_success_rate, total_fields, user_satisfaction)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (
+                        interaction.get('id'),
+                        interaction.get('session_id'),
+                        interaction.get('brokerage_name'),
+                        interaction.get('configuration_name'),
+                        interaction.get('timestamp'),
+                        interaction.get('file_headers'),
+                        interaction.get('suggested_mappings'),
+                        interaction.get('final_mappings'),
+                        interaction.get('suggestions_accepted'),
+                        interaction.get('manual_corrections'),
+                        interaction.get('processing_success_rate'),
+                        interaction.get('total_fields'),
+                        interaction.get('user_satisfaction')
+                    ))
+                
+                # Import decisions
+                for decision in learning_data.get('mapping_decisions', []):
+                    cursor.execute('''
+                        INSERT OR REPLACE INTO mapping_decisions
+                        (interaction_id, column_name, column_sample_data, column_data_type,
+                         suggested_field, suggested_confidence, actual_field, decision_type,
+                         decision_timestamp)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (
+                        decision.get('interaction_id'),
+                        decision.get('column_name'),
+                        decision.get('column_sample_data'),
+                        decision.get('column_data_type'),
+                        decision.get('suggested_field'),
+                        decision.get('suggested_confidence'),
+                        decision.get('actual_field'),
+                        decision.get('decision_type'),
+                        decision.get('decision_timestamp')
+                    ))
+                
+                # Import patterns
+                for pattern in learning_data.get('brokerage_patterns', []):
+                    cursor.execute('''
+                        INSERT OR REPLACE INTO brokerage_patterns
+                        (brokerage_name, column_pattern, api_field, success_count,
+                         total_count, average_confidence, data_type_pattern,
+                         sample_values, last_updated)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (
+                        pattern.get('brokerage_name'),
+                        pattern.get('column_pattern'),
+                        pattern.get('api_field'),
+                        pattern.get('success_count'),
+                        pattern.get('total_count'),
+                        pattern.get('average_confidence'),
+                        pattern.get('data_type_pattern'),
+                        pattern.get('sample_values'),
+                        pattern.get('last_updated')
+                    ))
+                
+                return True
             
         except Exception as e:
-            conn.rollback()
             logging.error(f"Error importing learning data: {e}")
             return False
-        finally:
-            conn.close()
-
+    
     # =============================================================================
     # External Integrations Management
     # =============================================================================
     
     def get_integration_types(self):
         """Get all available integration types"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, type_name, type_display_name, description, default_config, is_active
-            FROM integration_types
-            WHERE is_active = 1
-            ORDER BY type_display_name
-        ''')
-        
-        types = []
-        for row in cursor.fetchall():
-            types.append({
-                'id': row[0],
-                'type_name': row[1],
-                'type_display_name': row[2],
-                'description': row[3],
-                'default_config': row[4],
-                'is_active': row[5]
-            })
-        
-        conn.close()
+        with self.transaction() as cursor:
+            cursor.execute('''
+                SELECT id, type_name, type_display_name, description, default_config, is_active
+                FROM integration_types
+                WHERE is_active = 1
+                ORDER BY type_display_name
+            ''')
+            
+            types = []
+            for row in cursor.fetchall():
+                types.append({
+                    'id': row[0],
+                    'type_name': row[1],
+                    'type_display_name': row[2],
+                    'description': row[3],
+                    'default_config': row[4],
+                    'is_active': row[5]
+                })
         return types
 
     def save_integration_type(self, type_name, type_display_name, description, default_config=None):
         """Save a new integration type"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute('''
-                INSERT INTO integration_types (type_name, type_display_name, description, default_config)
-                VALUES (?, ?, ?, ?)
-            ''', (type_name, type_display_name, description, default_config))
-            
-            integration_type_id = cursor.lastrowid
-            conn.commit()
+            with self.transaction() as cursor:
+                cursor.execute('''
+                    INSERT INTO integration_types (type_name, type_display_name, description, default_config)
+                    VALUES (?, ?, ?, ?)
+                ''', (type_name, type_display_name, description, default_config))
+                
+                integration_type_id = cursor.lastrowid
             
             logging.info(f"Integration type '{type_name}' saved successfully")
             return integration_type_id
@@ -1942,23 +2910,19 @@ class DatabaseManager:
         except sqlite3.IntegrityError:
             logging.warning(f"Integration type '{type_name}' already exists")
             # Get existing type ID
-            cursor.execute('''
-                SELECT id FROM integration_types WHERE type_name = ?
-            ''', (type_name,))
-            result = cursor.fetchone()
+            with self.transaction() as cursor:
+                cursor.execute('''
+                    SELECT id FROM integration_types WHERE type_name = ?
+                ''', (type_name,))
+                result = cursor.fetchone()
             return result[0] if result else None
         except Exception as e:
             logging.error(f"Error saving integration type: {e}")
             return None
-        finally:
-            conn.close()
 
     def save_external_integration(self, brokerage_name, integration_name, integration_type_id, 
                                 config_data, auth_credentials=None, description=None, created_by=None):
         """Save external integration configuration"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
             # Convert config_data to JSON string
             config_json = json.dumps(config_data)
@@ -1968,16 +2932,16 @@ class DatabaseManager:
             if auth_credentials:
                 auth_json = self._encrypt_credentials(json.dumps(auth_credentials))
             
-            cursor.execute('''
-                INSERT OR REPLACE INTO external_integrations 
-                (brokerage_name, integration_name, integration_type_id, description, config_data, 
-                 auth_credentials, created_by, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-            ''', (brokerage_name, integration_name, integration_type_id, description, 
-                  config_json, auth_json, created_by))
-            
-            integration_id = cursor.lastrowid
-            conn.commit()
+            with self.transaction() as cursor:
+                cursor.execute('''
+                    INSERT OR REPLACE INTO external_integrations 
+                    (brokerage_name, integration_name, integration_type_id, description, config_data, 
+                     auth_credentials, created_by, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ''', (brokerage_name, integration_name, integration_type_id, description, 
+                      config_json, auth_json, created_by))
+                
+                integration_id = cursor.lastrowid
             
             logging.info(f"External integration '{integration_name}' saved for brokerage '{brokerage_name}'")
             return integration_id
@@ -1985,91 +2949,82 @@ class DatabaseManager:
         except sqlite3.IntegrityError as e:
             logging.warning(f"Duplicate integration name: {e}")
             # Update existing integration
-            cursor.execute('''
-                UPDATE external_integrations 
-                SET integration_type_id = ?, description = ?, config_data = ?, 
-                    auth_credentials = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE brokerage_name = ? AND integration_name = ?
-            ''', (integration_type_id, description, config_json, auth_json, 
-                  brokerage_name, integration_name))
-            
-            # Get the existing integration ID
-            cursor.execute('''
-                SELECT id FROM external_integrations 
-                WHERE brokerage_name = ? AND integration_name = ?
-            ''', (brokerage_name, integration_name))
-            
-            result = cursor.fetchone()
-            integration_id = result[0] if result else None
+            with self.transaction() as cursor:
+                cursor.execute('''
+                    UPDATE external_integrations 
+                    SET integration_type_id = ?, description = ?, config_data = ?, 
+                        auth_credentials = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE brokerage_name = ? AND integration_name = ?
+                ''', (integration_type_id, description, config_json, auth_json, 
+                      brokerage_name, integration_name))
+                
+                # Get the existing integration ID
+                cursor.execute('''
+                    SELECT id FROM external_integrations 
+                    WHERE brokerage_name = ? AND integration_name = ?
+                ''', (brokerage_name, integration_name))
+                
+                result = cursor.fetchone()
+                integration_id = result[0] if result else None
             
-            conn.commit()
             return integration_id
             
         except Exception as e:
             logging.error(f"Error saving external integration: {e}")
             return None
-        finally:
-            conn.close()
 
     def get_external_integrations(self, brokerage_name):
         """Get all external integrations for a brokerage"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT ei.id, ei.brokerage_name, ei.integration_name, ei.integration_type_id,
-                   ei.description, ei.config_data, ei.auth_credentials, ei.is_active,
-                   ei.created_at, ei.updated_at, ei.last_used_at, ei.created_by,
-                   it.type_name, it.type_display_name, it.description as type_description
-            FROM external_integrations ei
-            JOIN integration_types it ON ei.integration_type_id = it.id
-            WHERE ei.brokerage_name = ? AND ei.is_active = 1
-            ORDER BY ei.integration_name
-        ''', (brokerage_name,))
-        
-        integrations = []
-        for row in cursor.fetchall():
-            config_data = json.loads(row[5]) if row[5] else {}
-            auth_credentials = self._decrypt_credentials(row[6]) if row[6] else {}
-            
-            integrations.append({
-                'id': row[0],
-                'brokerage_name': row[1],
-                'name': row[2],
-                'integration_type_id': row[3],
-                'description': row[4],
-                'config_data': config_data,
-                'auth_credentials': auth_credentials,
-                'is_active': row[7],
-                'created_at': row[8],
-                'updated_at': row[9],
-                'last_used_at': row[10],
-                'created_by': row[11],
-                'type_name': row[12],
-                'type_display_name': row[13],
-                'type_description': row[14]
-            })
-        
-        conn.close()
+        with self.transaction() as cursor:
+            cursor.execute('''
+                SELECT ei.id, ei.brokerage_name, ei.integration_name, ei.integration_type_id,
+                       ei.description, ei.config_data, ei.auth_credentials, ei.is_active,
+                       ei.created_at, ei.updated_at, ei.last_used_at, ei.created_by,
+                       it.type_name, it.type_display_name, it.description as type_description
+                FROM external_integrations ei
+                JOIN integration_types it ON ei.integration_type_id = it.id
+                WHERE ei.brokerage_name = ? AND ei.is_active = 1
+                ORDER BY ei.integration_name
+            ''', (brokerage_name,))
+            
+            integrations = []
+            for row in cursor.fetchall():
+                config_data = json.loads(row[5]) if row[5] else {}
+                auth_credentials = self._decrypt_credentials(row[6]) if row[6] else {}
+                
+                integrations.append({
+                    'id': row[0],
+                    'brokerage_name': row[1],
+                    'name': row[2],
+                    'integration_type_id': row[3],
+                    'description': row[4],
+                    'config_data': config_data,
+                    'auth_credentials': auth_credentials,
+                    'is_active': row[7],
+                    'created_at': row[8],
+                    'updated_at': row[9],
+                    'last_used_at': row[10],
+                    'created_by': row[11],
+                    'type_name': row[12],
+                    'type_display_name': row[13],
+                    'type_description': row[14]
+                })
         return integrations
     
     def get_external_integration(self, integration_id):
         """Get a specific external integration by ID"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT ei.id, ei.brokerage_name, ei.integration_name, ei.description, 
-                   ei.config_data, ei.auth_credentials, ei.is_active, ei.created_at, 
-                   ei.updated_at, ei.last_used_at, ei.created_by,
-                   it.type_name, it.type_display_name, it.description as type_description
-            FROM external_integrations ei
-            JOIN integration_types it ON ei.integration_type_id = it.id
-            WHERE ei.id = ?
-        ''', (integration_id,))
-        
-        result = cursor.fetchone()
-        conn.close()
+        with self.transaction() as cursor:
+            cursor.execute('''
+                SELECT ei.id, ei.brokerage_name, ei.integration_name, ei.description, 
+                       ei.config_data, ei.auth_credentials, ei.is_active, ei.created_at, 
+                       ei.updated_at, ei.last_used_at, ei.created_by,
+                       it.type_name, it.type_display_name, it.description as type_description
+                FROM external_integrations ei
+                JOIN integration_types it ON ei.integration_type_id = it.id
+                WHERE ei.id = ?
+            ''', (integration_id,))
+            
+            result = cursor.fetchone()
         
         if result:
             integration_id, brokerage_name, name, desc, config, creds, is_active, created, updated, last_used, created_by, type_name, type_display, type_desc = result
@@ -2078,8 +3033,7 @@ class DatabaseManager:
             decrypted_credentials = None
             if creds:
                 try:
-                    key = self._get_encryption_key()
-                    f = Fernet(key)
+                    f = self._get_cipher()
                     decrypted_credentials = json.loads(f.decrypt(creds).decode())
                 except Exception as e:
                     logging.warning(f"Could not decrypt credentials for integration {name}: {e}")
@@ -2105,73 +3059,59 @@ class DatabaseManager:
     
     def delete_external_integration(self, integration_id):
         """Delete an external integration (soft delete)"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE external_integrations 
-            SET is_active = 0, updated_at = ?
-            WHERE id = ?
-        ''', (datetime.now(), integration_id))
-        
-        conn.commit()
-        conn.close()
+        with self.transaction() as cursor:
+            cursor.execute('''
+                UPDATE external_integrations 
+                SET is_active = 0, updated_at = ?
+                WHERE id = ?
+            ''', (datetime.now(), integration_id))
         
         return cursor.rowcount > 0
     
     def save_integration_data_mappings(self, integration_id, mappings):
         """Save data mappings for an integration"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            # Clear existing mappings
-            cursor.execute('''
-                DELETE FROM integration_data_mappings WHERE integration_id = ?
-            ''', (integration_id,))
-            
-            # Insert new mappings
-            for mapping in mappings:
+            with self.transaction() as cursor:
+                # Clear existing mappings
                 cursor.execute('''
-                    INSERT INTO integration_data_mappings 
-                    (integration_id, source_field, target_field, transformation_rule, 
-                     is_required, default_value, validation_rule)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    integration_id,
-                    mapping.get('source_field'),
-                    mapping.get('target_field'),
-                    mapping.get('transformation_rule'),
-                    mapping.get('is_required', False),
-                    mapping.get('default_value'),
-                    mapping.get('validation_rule')
-                ))
-            
-            conn.commit()
-            return True
+                    DELETE FROM integration_data_mappings WHERE integration_id = ?
+                ''', (integration_id,))
+                
+                # Insert new mappings
+                for mapping in mappings:
+                    cursor.execute('''
+                        INSERT INTO integration_data_mappings 
+                        (integration_id, source_field, target_field, transformation_rule, 
+                         is_required, default_value, validation_rule)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', (
+                        integration_id,
+                        mapping.get('source_field'),
+                        mapping.get('target_field'),
+                        mapping.get('transformation_rule'),
+                        mapping.get('is_required', False),
+                        mapping.get('default_value'),
+                        mapping.get('validation_rule')
+                    ))
+                
+                return True
             
         except Exception as e:
-            conn.rollback()
             logging.error(f"Error saving integration data mappings: {e}")
             raise
-        finally:
-            conn.close()
     
     def get_integration_data_mappings(self, integration_id):
         """Get data mappings for an integration"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, source_field, target_field, transformation_rule, 
-                   is_required, default_value, validation_rule
-            FROM integration_data_mappings
-            WHERE integration_id = ?
-            ORDER BY source_field
-        ''', (integration_id,))
-        
-        results = cursor.fetchall()
-        conn.close()
+        with self.transaction() as cursor:
+            cursor.execute('''
+                SELECT id, source_field, target_field, transformation_rule, 
+                       is_required, default_value, validation_rule
+                FROM integration_data_mappings
+                WHERE integration_id = ?
+                ORDER BY source_field
+            ''', (integration_id,))
+            
+            results = cursor.fetchall()
         
         return [
             {
@@ -2191,45 +3131,38 @@ class DatabaseManager:
                                          execution_time=0.0, error_log=None, output_file_path=None,
                                          triggered_by=None, session_id=None):
         """Save integration execution history"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO integration_execution_history
-            (integration_id, execution_status, records_processed, records_success,
-             records_failed, execution_time_seconds, error_log, output_file_path,
-             triggered_by, session_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            integration_id, execution_status, records_processed, records_success,
-            records_failed, execution_time, 
-            json.dumps(error_log) if error_log else None,
-            output_file_path, triggered_by, session_id
-        ))
-        
-        execution_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self.transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO integration_execution_history
+                (integration_id, execution_status, records_processed, records_success,
+                 records_failed, execution_time_seconds, error_log, output_file_path,
+                 triggered_by, session_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                integration_id, execution_status, records_processed, records_success,
+                records_failed, execution_time, 
+                json.dumps(error_log) if error_log else None,
+                output_file_path, triggered_by, session_id
+            ))
+            
+            execution_id = cursor.lastrowid
         
         return execution_id
     
     def get_integration_execution_history(self, integration_id, limit=50):
         """Get execution history for an integration"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, execution_timestamp, execution_status, records_processed,
-                   records_success, records_failed, execution_time_seconds,
-                   error_log, output_file_path, triggered_by, session_id
-            FROM integration_execution_history
-            WHERE integration_id = ?
-            ORDER BY execution_timestamp DESC
-            LIMIT ?
-        ''', (integration_id, limit))
-        
-        results = cursor.fetchall()
-        conn.close()
+        with self.transaction() as cursor:
+            cursor.execute('''
+                SELECT id, execution_timestamp, execution_status, records_processed,
+                       records_success, records_failed, execution_time_seconds,
+                       error_log, output_file_path, triggered_by, session_id
+                FROM integration_execution_history
+                WHERE integration_id = ?
+                ORDER BY execution_timestamp DESC
+                LIMIT ?
+            ''', (integration_id, limit))
+            
+            results = cursor.fetchall()
         
         return [
             {
@@ -2248,46 +3181,85 @@ class DatabaseManager:
             for row in results
         ]
     
+    def get_integration_execution_history_page(self, integration_id, after=None, page_size=50):
+        """Get one page of an integration's execution history, newest first, using keyset pagination.
+        
+        Rows are (id, execution_timestamp, execution_status, records_processed, records_success,
+        records_failed, execution_time_seconds) tuples. Returns (rows, next_cursor).
+        """
+        query = '''
+            SELECT id, execution_timestamp, execution_status, records_processed,
+                   records_success, records_failed, execution_time_seconds
+            FROM integration_execution_history
+            WHERE integration_id = ?
+        '''
+        params = [integration_id]
+        if after:
+            query += ' AND (execution_timestamp, id) < (?, ?)'
+            params.extend(after)
+        query += ' ORDER BY execution_timestamp DESC, id DESC LIMIT ?'
+        params.append(page_size + 1)
+        
+        with self.transaction() as cursor:
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+        
+        return _keyset_page(rows, page_size, lambda row: (row[1], row[0]))
+    
+    def get_integration_execution_stats(self, integration_id):
+        """Get execution totals for an integration without loading its history"""
+        with self.transaction() as cursor:
+            cursor.execute('''
+                SELECT COUNT(*),
+                       SUM(CASE WHEN execution_status = 'SUCCESS' THEN 1 ELSE 0 END),
+                       SUM(records_processed),
+                       AVG(execution_time_seconds)
+                FROM integration_execution_history
+                WHERE integration_id = ?
+            ''', (integration_id,))
+            
+            total, successful, records, avg_time = cursor.fetchone()
+        
+        return {
+            'total_executions': total or 0,
+            'successful_executions': successful or 0,
+            'total_records': records or 0,
+            'avg_execution_time': avg_time or 0
+        }
+    
     def save_integration_output_config(self, integration_id, output_name, output_format,
                                      output_template=None, output_fields=None,
                                      file_naming_pattern=None, schedule_config=None):
         """Save output configuration for an integration"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO integration_output_configs
-            (integration_id, output_name, output_format, output_template,
-             output_fields, file_naming_pattern, schedule_config)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            integration_id, output_name, output_format, output_template,
-            json.dumps(output_fields) if output_fields else None,
-            file_naming_pattern,
-            json.dumps(schedule_config) if schedule_config else None
-        ))
-        
-        config_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self.transaction() as cursor:
+            cursor.execute('''
+                INSERT OR REPLACE INTO integration_output_configs
+                (integration_id, output_name, output_format, output_template,
+                 output_fields, file_naming_pattern, schedule_config)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                integration_id, output_name, output_format, output_template,
+                json.dumps(output_fields) if output_fields else None,
+                file_naming_pattern,
+                json.dumps(schedule_config) if schedule_config else None
+            ))
+            
+            config_id = cursor.lastrowid
         
         return config_id
     
     def get_integration_output_configs(self, integration_id):
         """Get output configurations for an integration"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, output_name, output_format, output_template,
-                   output_fields, file_naming_pattern, schedule_config, is_active
-            FROM integration_output_configs
-            WHERE integration_id = ? AND is_active = 1
-            ORDER BY output_name
-        ''', (integration_id,))
-        
-        results = cursor.fetchall()
-        conn.close()
+        with self.transaction() as cursor:
+            cursor.execute('''
+                SELECT id, output_name, output_format, output_template,
+                       output_fields, file_naming_pattern, schedule_config, is_active
+                FROM integration_output_configs
+                WHERE integration_id = ? AND is_active = 1
+                ORDER BY output_name
+            ''', (integration_id,))
+            
+            results = cursor.fetchall()
         
         return [
             {
@@ -2305,135 +3277,948 @@ class DatabaseManager:
     
     def update_integration_last_used(self, integration_id):
         """Update the last used timestamp for an integration"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            UPDATE external_integrations 
-            SET last_used_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        ''', (integration_id,))
-        
-        conn.commit()
-        conn.close()
+        with self.transaction() as cursor:
+            cursor.execute('''
+                UPDATE external_integrations 
+                SET last_used_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (integration_id,))
 
     # LTL Tracking methods
     
     def save_tracking_request(self, upload_history_id, pro_number, carrier_name=None, load_id=None):
         """Save a tracking request for a PRO number"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute('''
-                INSERT INTO tracking_requests 
-                (upload_history_id, pro_number, carrier_name, load_id)
-                VALUES (?, ?, ?, ?)
-            ''', (upload_history_id, pro_number, carrier_name, load_id))
-            
-            tracking_request_id = cursor.lastrowid
-            conn.commit()
-            
-            logging.info(f"Tracking request saved for PRO number: {pro_number}")
-            return tracking_request_id
+            with self.transaction() as cursor:
+                cursor.execute('''
+                    INSERT INTO tracking_requests 
+                    (upload_history_id, pro_number, carrier_name, load_id)
+                    VALUES (?, ?, ?, ?)
+                ''', (upload_history_id, pro_number, carrier_name, load_id))
+                
+                tracking_request_id = cursor.lastrowid
+                
+                logging.info(f"Tracking request saved for PRO number: {pro_number}")
+                return tracking_request_id
             
         except Exception as e:
             logging.error(f"Error saving tracking request: {e}")
             return None
-        finally:
-            conn.close()
     
     def save_tracking_result(self, tracking_request_id, tracking_status=None, tracking_location=None, 
                            tracking_event=None, tracking_timestamp=None, scraped_data=None, 
                            scrape_success=True, error_message=None):
         """Save tracking result data"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        scraped_data, scraped_data_hash, blob = self._split_payload(scraped_data)
+        try:
+            with self.transaction() as cursor:
+                self._store_payload_blobs(cursor, [blob])
+                cursor.execute('''
+                    INSERT INTO tracking_results 
+                    (tracking_request_id, tracking_status, tracking_location, tracking_event, 
+                     tracking_timestamp, scraped_data, scraped_data_hash, scrape_success, error_message)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (tracking_request_id, tracking_status, tracking_location, tracking_event, 
+                      tracking_timestamp, scraped_data, scraped_data_hash, scrape_success, error_message))
+                
+                result_id = cursor.lastrowid
+                
+                # Update tracking request status
+                cursor.execute('''
+                    UPDATE tracking_requests 
+                    SET status = ? 
+                    WHERE id = ?
+                ''', ('completed' if scrape_success else 'failed', tracking_request_id))
+                
+                cursor.execute('SELECT pro_number, carrier_name FROM tracking_requests WHERE id = ?',
+                               (tracking_request_id,))
+                request = cursor.fetchone()
+                if request:
+                    self._record_shipment_states(cursor, [(
+                        request[0], request[1], tracking_status, tracking_location, tracking_event,
+                        tracking_timestamp, scrape_success, result_id
+                    )])
+                
+                logging.info(f"Tracking result saved for request ID: {tracking_request_id}")
+                return result_id
+            
+        except Exception as e:
+            logging.error(f"Error saving tracking result: {e}")
+            return None
+    
+    def save_tracking_batch(self, upload_history_id, results, raise_errors=False):
+        """Save tracking requests and their results for a whole upload in one transaction.
+        
+        Each result may be an object or dict exposing pro_number, carrier_name, load_id,
+        tracking_status, tracking_location, tracking_event, tracking_timestamp, scraped_data,
+        scrape_success and error_message. Returns (pro_number, tracking_request_id,
+        tracking_result_id) tuples in the same order as ``results``. On error nothing is saved
+        and [] is returned, or the error is raised when raise_errors is set.
+        """
+        def field(result, name, default=None):
+            if isinstance(result, dict):
+                return result.get(name, default)
+            return getattr(result, name, default)
+        
+        def serialize(value):
+            if value is None or isinstance(value, (str, int, float, bytes)):
+                return value
+            return json.dumps(value, default=str)
+        
+        results = list(results or [])
+        if not results:
+            return []
+        
+        request_rows = []
+        result_rows = []
+        blobs = []
+        for result in results:
+            scrape_success = bool(field(result, 'scrape_success', True))
+            request_rows.append((
+                upload_history_id,
+                str(field(result, 'pro_number', '')),
+                serialize(field(result, 'carrier_name')),
+                serialize(field(result, 'load_id')),
+                'completed' if scrape_success else 'failed'
+            ))
+            scraped_data, scraped_data_hash, blob = self._split_payload(serialize(field(result, 'scraped_data')))
+            blobs.append(blob)
+            result_rows.append((
+                serialize(field(result, 'tracking_status')),
+                serialize(field(result, 'tracking_location')),
+                serialize(field(result, 'tracking_event')),
+                serialize(field(result, 'tracking_timestamp')),
+                scraped_data,
+                scraped_data_hash,
+                scrape_success,
+                serialize(field(result, 'error_message'))
+            ))
         
         try:
-            cursor.execute('''
-                INSERT INTO tracking_results 
-                (tracking_request_id, tracking_status, tracking_location, tracking_event, 
-                 tracking_timestamp, scraped_data, scrape_success, error_message)
+            with self.transaction() as cursor:
+                self._store_payload_blobs(cursor, blobs)
+                
+                cursor.executemany('''
+                    INSERT INTO tracking_requests 
+                    (upload_history_id, pro_number, carrier_name, load_id, status)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', request_rows)
+                
+                # The write lock is held for the whole transaction, so AUTOINCREMENT ids are contiguous
+                cursor.execute('SELECT last_insert_rowid()')
+                first_request_id = cursor.fetchone()[0] - len(request_rows) + 1
+                request_ids = list(range(first_request_id, first_request_id + len(request_rows)))
+                
+                cursor.executemany('''
+                    INSERT INTO tracking_results 
+                    (tracking_request_id, tracking_status, tracking_location, tracking_event, 
+                     tracking_timestamp, scraped_data, scraped_data_hash, scrape_success, error_message)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [(request_id,) + row for request_id, row in zip(request_ids, result_rows)])
+                
+                cursor.execute('SELECT last_insert_rowid()')
+                first_result_id = cursor.fetchone()[0] - len(result_rows) + 1
+                
+                self._record_shipment_states(cursor, [
+                    (request[1], request[2]) + result[:4] + (result[6], first_result_id + index)
+                    for index, (request, result) in enumerate(zip(request_rows, result_rows))
+                ])
+            
+            logging.info(f"Saved {len(results)} tracking results for upload ID: {upload_history_id}")
+            return [
+                (row[1], request_id, first_result_id + index)
+                for index, (row, request_id) in enumerate(zip(request_rows, request_ids))
+            ]
+            
+        except Exception as e:
+            logging.error(f"Error saving tracking batch: {e}")
+            if raise_errors:
+                raise
+            return []
+    
+    def _record_shipment_states(self, cursor, states):
+        """Upsert the latest state of each shipment and append any events not seen before.
+        
+        Each state is (pro_number, carrier_name, status, location, event, event_time,
+        scrape_success, tracking_result_id). Failed scrapes only bump last_checked_at.
+        """
+        shipment_rows = []
+        event_rows = []
+        for pro_number, carrier_name, status, location, event, event_time, scrape_success, result_id in states:
+            normalized_pro = _normalize_pro_number(pro_number)
+            if not normalized_pro:
+                continue
+            carrier_code = _carrier_key(carrier_name)
+            if not scrape_success:
+                status = location = event = event_time = result_id = None
+            shipment_rows.append((carrier_code, normalized_pro, carrier_name, status, location, event,
+                                  event_time, 1 if scrape_success else None, result_id))
+            if scrape_success:
+                event_rows.append((
+                    carrier_code, normalized_pro,
+                    _shipment_event_hash(carrier_code, normalized_pro, status, location, event, event_time),
+                    status, location, event, event_time, result_id
+                ))
+        
+        if shipment_rows:
+            cursor.executemany('''
+                INSERT INTO shipments 
+                (carrier_code, pro_number, carrier_name, latest_status, latest_location, latest_event,
+                 event_time, last_checked_at, last_success_at, last_tracking_result_id, check_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP,
+                        CASE WHEN ? THEN CURRENT_TIMESTAMP END, ?, 1)
+                ON CONFLICT(carrier_code, pro_number) DO UPDATE SET
+                    carrier_name = COALESCE(excluded.carrier_name, carrier_name),
+                    latest_status = CASE WHEN excluded.last_success_at IS NULL THEN latest_status ELSE excluded.latest_status END,
+                    latest_location = CASE WHEN excluded.last_success_at IS NULL THEN latest_location ELSE excluded.latest_location END,
+                    latest_event = CASE WHEN excluded.last_success_at IS NULL THEN latest_event ELSE excluded.latest_event END,
+                    event_time = CASE WHEN excluded.last_success_at IS NULL THEN event_time ELSE excluded.event_time END,
+                    last_tracking_result_id = COALESCE(excluded.last_tracking_result_id, last_tracking_result_id),
+                    last_success_at = COALESCE(excluded.last_success_at, last_success_at),
+                    last_checked_at = excluded.last_checked_at,
+                    check_count = check_count + 1
+            ''', shipment_rows)
+        if event_rows:
+            cursor.executemany('''
+                INSERT OR IGNORE INTO shipment_events 
+                (carrier_code, pro_number, event_hash, status, location, event, event_time, tracking_result_id)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (tracking_request_id, tracking_status, tracking_location, tracking_event, 
-                  tracking_timestamp, scraped_data, scrape_success, error_message))
+            ''', event_rows)
+    
+    def get_shipment(self, pro_number, carrier_name=None):
+        """Get the current state of a shipment; without a carrier, the most recently checked match"""
+        query = '''
+            SELECT carrier_code, pro_number, carrier_name, latest_status, latest_location, latest_event,
+                   event_time, last_checked_at, last_success_at, last_tracking_result_id, check_count
+            FROM shipments
+            WHERE pro_number = ?
+        '''
+        params = [_normalize_pro_number(pro_number)]
+        if carrier_name:
+            query += ' AND carrier_code = ?'
+            params.append(_carrier_key(carrier_name))
+        query += ' ORDER BY last_checked_at DESC LIMIT 1'
+        
+        with self.transaction() as cursor:
+            cursor.execute(query, params)
+            row = cursor.fetchone()
+        
+        if row:
+            return {
+                'carrier_code': row[0],
+                'pro_number': row[1],
+                'carrier_name': row[2],
+                'status': row[3],
+                'location': row[4],
+                'event': row[5],
+                'event_time': row[6],
+                'last_checked_at': row[7],
+                'last_success_at': row[8],
+                'tracking_result_id': row[9],
+                'check_count': row[10]
+            }
+        return None
+    
+    def get_shipment_events(self, pro_number, carrier_name=None, limit=50):
+        """Get the distinct tracking events recorded for a shipment, newest first"""
+        query = '''
+            SELECT carrier_code, status, location, event, event_time, first_seen_at
+            FROM shipment_events
+            WHERE pro_number = ?
+        '''
+        params = [_normalize_pro_number(pro_number)]
+        if carrier_name:
+            query += ' AND carrier_code = ?'
+            params.append(_carrier_key(carrier_name))
+        query += ' ORDER BY id DESC LIMIT ?'
+        params.append(limit)
+        
+        with self.transaction() as cursor:
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+        
+        return [
+            {
+                'carrier_code': row[0],
+                'status': row[1],
+                'location': row[2],
+                'event': row[3],
+                'event_time': row[4],
+                'first_seen_at': row[5]
+            }
+            for row in rows
+        ]
+    
+    def get_shipments_due_for_check(self, checked_before_hours=4, limit=500):
+        """Get undelivered shipments whose last check is older than checked_before_hours"""
+        with self.transaction() as cursor:
+            cursor.execute('''
+                SELECT carrier_code, pro_number, carrier_name, latest_status, last_checked_at
+                FROM shipments
+                WHERE last_checked_at < datetime('now', ?)
+                AND (latest_status IS NULL OR latest_status NOT LIKE '%deliver%')
+                ORDER BY last_checked_at
+                LIMIT ?
+            ''', (f'-{int(checked_before_hours)} hours', limit))
             
-            result_id = cursor.lastrowid
+            rows = cursor.fetchall()
+        
+        return [
+            {
+                'carrier_code': row[0],
+                'pro_number': row[1],
+                'carrier_name': row[2],
+                'status': row[3],
+                'last_checked_at': row[4]
+            }
+            for row in rows
+        ]
+    
+    def get_carrier_attribution_index(self, brokerage_name=None, min_samples=None):
+        """Get the carrier that has returned data for each PRO shape, learned from successful tracking.
+        
+        Returns {(pro_length, pro_prefix): {'carrier_code', 'carrier_name', 'confidence', 'samples'}},
+        where confidence is the carrier's share of the successes for that shape. A brokerage's own
+        history replaces the all-brokerage entry once it has min_samples successes.
+        """
+        if min_samples is None:
+            min_samples = self.ATTRIBUTION_MIN_SAMPLES
+        
+        with self.transaction() as cursor:
+            cursor.execute('''
+                SELECT brokerage_name, pro_length, pro_prefix, carrier_code, carrier_name, success_count
+                FROM carrier_attribution
+                WHERE brokerage_name IN ('', ?)
+                ORDER BY brokerage_name, pro_length, pro_prefix, success_count DESC
+            ''', (brokerage_name or '',))
             
-            # Update tracking request status
+            rows = cursor.fetchall()
+        
+        # Totals and leading carrier per (scope, length, prefix); rows arrive leading carrier first
+        shapes = {}
+        for scope, pro_length, pro_prefix, carrier_code, carrier_name, success_count in rows:
+            shape = shapes.setdefault((scope, pro_length, pro_prefix), {
+                'carrier_code': carrier_code,
+                'carrier_name': carrier_name,
+                'top': success_count,
+                'samples': 0
+            })
+            shape['samples'] += success_count
+        
+        index = {}
+        for (scope, pro_length, pro_prefix), shape in shapes.items():
+            if shape['samples'] < min_samples:
+                continue
+            # Brokerage rows sort after the global ones, so they overwrite them
+            index[(pro_length, pro_prefix)] = {
+                'carrier_code': shape['carrier_code'],
+                'carrier_name': shape['carrier_name'],
+                'confidence': shape['top'] / shape['samples'],
+                'samples': shape['samples']
+            }
+        
+        return index
+    
+    def get_tracking_cache_entry(self, namespace, carrier_code, pro_number, now=None):
+        """Get an unexpired cached tracking result, or None.
+        
+        Returns {'status_class', 'result', 'cached_at', 'expires_at'} with times as Unix timestamps.
+        """
+        with self.transaction() as cursor:
             cursor.execute('''
-                UPDATE tracking_requests 
-                SET status = ? 
-                WHERE id = ?
-            ''', ('completed' if scrape_success else 'failed', tracking_request_id))
+                SELECT status_class, result, cached_at, expires_at
+                FROM tracking_cache
+                WHERE namespace = ? AND carrier_code = ? AND pro_number = ? AND expires_at > ?
+            ''', (namespace, carrier_code, _normalize_pro_number(pro_number), time.time() if now is None else now))
             
-            conn.commit()
+            row = cursor.fetchone()
+        
+        if row:
+            return {
+                'status_class': row[0],
+                'result': json.loads(row[1]),
+                'cached_at': row[2],
+                'expires_at': row[3]
+            }
+        return None
+    
+    def save_tracking_cache_entry(self, namespace, carrier_code, pro_number, status_class, result,
+                                  ttl_seconds, cached_at=None):
+        """Cache a tracking result for ttl_seconds, replacing any earlier entry for the shipment"""
+        if cached_at is None:
+            cached_at = time.time()
+        
+        with self.transaction() as cursor:
+            cursor.execute('''
+                INSERT OR REPLACE INTO tracking_cache
+                (namespace, carrier_code, pro_number, status_class, result, cached_at, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (namespace, carrier_code, _normalize_pro_number(pro_number), status_class,
+                  json.dumps(result, default=str), cached_at, cached_at + ttl_seconds))
+    
+    def purge_tracking_cache(self, expired_only=True):
+        """Delete expired cached tracking results (or all of them), returning the number removed"""
+        with self.transaction() as cursor:
+            if expired_only:
+                cursor.execute('DELETE FROM tracking_cache WHERE expires_at <= ?', (time.time(),))
+            else:
+                cursor.execute('DELETE FROM tracking_cache')
+            return cursor.rowcount
+    
+    def get_strategy_scores(self, tracker):
+        """Get a tracker's strategy scores.
+        
+        Returns {(carrier_code, strategy): {'attempts', 'successes', 'latency_seconds',
+        'consecutive_failures', 'skipped_until', 'updated_at'}} with times as Unix timestamps.
+        """
+        with self.transaction() as cursor:
+            cursor.execute('''
+                SELECT carrier_code, strategy, attempts, successes, latency_seconds,
+                       consecutive_failures, skipped_until, updated_at
+                FROM strategy_scores
+                WHERE tracker = ?
+            ''', (tracker,))
+            
+            rows = cursor.fetchall()
+        
+        return {
+            (row[0], row[1]): {
+                'attempts': row[2],
+                'successes': row[3],
+                'latency_seconds': row[4],
+                'consecutive_failures': row[5],
+                'skipped_until': row[6],
+                'updated_at': row[7]
+            }
+            for row in rows
+        }
+    
+    def save_strategy_score(self, tracker, carrier_code, strategy, attempts, successes, latency_seconds,
+                            consecutive_failures, skipped_until, updated_at=None):
+        """Store a strategy's score for a carrier, replacing the previous one"""
+        with self.transaction() as cursor:
+            cursor.execute('''
+                INSERT OR REPLACE INTO strategy_scores
+                (tracker, carrier_code, strategy, attempts, successes, latency_seconds,
+                 consecutive_failures, skipped_until, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (tracker, carrier_code, strategy, attempts, successes, latency_seconds,
+                  consecutive_failures, skipped_until, time.time() if updated_at is None else updated_at))
+    
+    def clear_strategy_scores(self, tracker=None):
+        """Forget learned strategy scores (for one tracker or all), returning the number removed"""
+        with self.transaction() as cursor:
+            if tracker is None:
+                cursor.execute('DELETE FROM strategy_scores')
+            else:
+                cursor.execute('DELETE FROM strategy_scores WHERE tracker = ?', (tracker,))
+            return cursor.rowcount
+    
+    def get_scraped_data(self, tracking_result_id):
+        """Get the scraped payload stored for a tracking result, decoded from its blob if needed"""
+        with self.transaction() as cursor:
+            cursor.execute('''
+                SELECT COALESCE(trs.scraped_data, payload_text(pb.codec, pb.data))
+                FROM tracking_results trs
+                LEFT JOIN payload_blobs pb ON pb.hash = trs.scraped_data_hash
+                WHERE trs.id = ?
+            ''', (tracking_result_id,))
+            
+            result = cursor.fetchone()
+        
+        return result[0] if result else None
+    
+    def _split_payload(self, payload):
+        """Decide where a text payload is stored.
+        
+        Returns (inline_text, blob_hash, blob_row). Small payloads stay inline; larger ones are
+        hashed and compressed into a payload_blobs row for _store_payload_blobs().
+        """
+        if payload is None:
+            return None, None, None
+        raw = payload.encode('utf-8') if isinstance(payload, str) else payload
+        if len(raw) < self.PAYLOAD_BLOB_MIN_BYTES:
+            return payload, None, None
+        
+        payload_hash = hashlib.sha256(raw).hexdigest()
+        codec, data = _compress_payload(raw)
+        return None, payload_hash, (payload_hash, codec, data, len(raw))
+    
+    def _store_payload_blobs(self, cursor, blobs):
+        """Insert payload blobs, only refreshing the reference time of ones already stored"""
+        blobs = [blob for blob in blobs if blob]
+        if blobs:
+            cursor.executemany('''
+                INSERT INTO payload_blobs (hash, codec, data, raw_size)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(hash) DO UPDATE SET last_referenced_at = CURRENT_TIMESTAMP
+            ''', blobs)
+    
+    def _resolve_payloads(self, cursor, rows, text_column, hash_column):
+        """Fill text_column from payload_blobs for rows that only carry a blob hash"""
+        columns = [description[0] for description in cursor.description]
+        if hash_column not in columns:
+            return rows
+        text_index = columns.index(text_column)
+        hash_index = columns.index(hash_column)
+        
+        hashes = list({row[hash_index] for row in rows if row[text_index] is None and row[hash_index]})
+        payloads = {}
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start:start + 500]
+            cursor.execute(
+                f"SELECT hash, payload_text(codec, data) FROM payload_blobs WHERE hash IN ({', '.join('?' for _ in chunk)})",
+                chunk
+            )
+            payloads.update(cursor.fetchall())
+        
+        if not payloads:
+            return rows
+        return [
+            row[:text_index] + (payloads.get(row[hash_index]),) + row[text_index + 1:]
+            if row[text_index] is None and row[hash_index] in payloads else row
+            for row in rows
+        ]
+    
+    def cleanup_old_payloads(self, days_to_keep=None):
+        """Prune payload blobs not referenced by a new write in days_to_keep days.
+        
+        Rows pointing at a pruned blob read back with no payload. Returns the number removed.
+        """
+        days_to_keep = days_to_keep or self.PAYLOAD_RETENTION_DAYS
+        try:
+            with self.transaction() as cursor:
+                cursor.execute('''
+                    DELETE FROM payload_blobs
+                    WHERE last_referenced_at < datetime('now', ?)
+                ''', (f'-{int(days_to_keep)} days',))
+                removed = cursor.rowcount
             
-            logging.info(f"Tracking result saved for request ID: {tracking_request_id}")
-            return result_id
+            if removed:
+                logging.info(f"Pruned {removed} payload blobs older than {days_to_keep} days")
+            return removed
             
         except Exception as e:
-            logging.error(f"Error saving tracking result: {e}")
-            return None
-        finally:
-            conn.close()
+            logging.error(f"Error cleaning up payload blobs: {e}")
+            return 0
     
     def get_tracking_results_for_upload(self, upload_history_id):
         """Get all tracking results for a specific upload"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        with self.transaction() as cursor:
+            cursor.execute('''
+                SELECT tr.pro_number, tr.carrier_name, tr.load_id, tr.status,
+                       trs.tracking_status, trs.tracking_location, trs.tracking_event,
+                       trs.tracking_timestamp, trs.scrape_success, trs.error_message
+                FROM tracking_requests tr
+                LEFT JOIN tracking_results trs ON tr.id = trs.tracking_request_id
+                WHERE tr.upload_history_id = ?
+                ORDER BY tr.pro_number
+            ''', (upload_history_id,))
+            
+            results = []
+            for row in cursor.fetchall():
+                results.append({
+                    'pro_number': row[0],
+                    'carrier_name': row[1],
+                    'load_id': row[2],
+                    'status': row[3],
+                    'tracking_status': row[4],
+                    'tracking_location': row[5],
+                    'tracking_event': row[6],
+                    'tracking_timestamp': row[7],
+                    'scrape_success': row[8],
+                    'error_message': row[9]
+                })
+        return results
+    
+    def get_tracking_results_page(self, upload_history_id, after=None, page_size=100):
+        """Get one page of an upload's tracking results ordered by PRO number, using keyset pagination.
+        
+        Rows are (pro_number, carrier_name, load_id, status, tracking_status, tracking_location,
+        tracking_event, tracking_timestamp, scrape_success, error_message) tuples, one per
+        result (a request may have several, or none). Returns (rows, next_cursor).
+        """
+        query = '''
             SELECT tr.pro_number, tr.carrier_name, tr.load_id, tr.status,
                    trs.tracking_status, trs.tracking_location, trs.tracking_event,
-                   trs.tracking_timestamp, trs.scrape_success, trs.error_message
+                   trs.tracking_timestamp, trs.scrape_success, trs.error_message, tr.id,
+                   COALESCE(trs.id, 0)
             FROM tracking_requests tr
             LEFT JOIN tracking_results trs ON tr.id = trs.tracking_request_id
             WHERE tr.upload_history_id = ?
-            ORDER BY tr.pro_number
-        ''', (upload_history_id,))
-        
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                'pro_number': row[0],
-                'carrier_name': row[1],
-                'load_id': row[2],
-                'status': row[3],
-                'tracking_status': row[4],
-                'tracking_location': row[5],
-                'tracking_event': row[6],
-                'tracking_timestamp': row[7],
-                'scrape_success': row[8],
-                'error_message': row[9]
-            })
-        
-        conn.close()
-        return results
+        '''
+        params = [upload_history_id]
+        if after:
+            query += ' AND (tr.pro_number, tr.id, COALESCE(trs.id, 0)) > (?, ?, ?)'
+            params.extend(after)
+        query += ' ORDER BY tr.pro_number, tr.id, COALESCE(trs.id, 0) LIMIT ?'
+        params.append(page_size + 1)
+        
+        with self.transaction() as cursor:
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+        
+        rows, next_cursor = _keyset_page(rows, page_size, lambda row: (row[0], row[10], row[11]))
+        return [row[:10] for row in rows], next_cursor
     
     def get_tracking_requests_by_status(self, status='pending'):
         """Get tracking requests by status"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.transaction() as cursor:
+            cursor.execute('''
+                SELECT id, upload_history_id, pro_number, carrier_name, load_id, request_timestamp
+                FROM tracking_requests
+                WHERE status = ?
+                ORDER BY request_timestamp
+            ''', (status,))
+            
+            requests = []
+            for row in cursor.fetchall():
+                requests.append({
+                    'id': row[0],
+                    'upload_history_id': row[1],
+                    'pro_number': row[2],
+                    'carrier_name': row[3],
+                    'load_id': row[4],
+                    'request_timestamp': row[5]
+                })
+        return requests
+
+
+class _InstrumentedCursor:
+    """sqlite3 cursor wrapper that times statements and counts rows for DatabaseManager.get_query_stats()"""
+    
+    def __init__(self, cursor, db_manager, method):
+        self._cursor = cursor
+        self._db_manager = db_manager
+        self._method = method
+        self._started = time.perf_counter()
+        self._statements = 0
+        self._rows_read = 0
+        self._rows_written = 0
+        self._lock_wait = 0.0
+    
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+    
+    def __iter__(self):
+        for row in self._cursor:
+            self._rows_read += 1
+            yield row
+    
+    def _run(self, run, sql, params):
+        conn = self._cursor.connection
+        is_write = bool(_WRITE_STATEMENT.match(sql))
+        if is_write and not conn.in_transaction:
+            # Take the write lock explicitly, as sqlite3 would implicitly, so waiting for it can be timed
+            lock_started = time.perf_counter()
+            self._cursor.execute('BEGIN IMMEDIATE')
+            self._lock_wait += time.perf_counter() - lock_started
+        
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        
+        self._statements += 1
+        if is_write:
+            self._rows_written += max(self._cursor.rowcount, 0)
+        if elapsed * 1000 >= self._db_manager.SLOW_QUERY_MS:
+            self._db_manager._log_slow_query(self._method, conn, sql, params, elapsed)
+        return self
+    
+    def execute(self, sql, params=()):
+        return self._run(lambda: self._cursor.execute(sql, params), sql, params)
+    
+    def executemany(self, sql, seq_of_params):
+        seq_of_params = list(seq_of_params)
+        return self._run(lambda: self._cursor.executemany(sql, seq_of_params), sql,
+                         seq_of_params[0] if seq_of_params else ())
+    
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._rows_read += 1
+        return row
+    
+    def fetchmany(self, size=None):
+        rows = self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+        self._rows_read += len(rows)
+        return rows
+    
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._rows_read += len(rows)
+        return rows
+    
+    def close(self):
+        self._db_manager._record_query_stats(
+            self._method, time.perf_counter() - self._started, self._statements,
+            self._rows_read, self._rows_written, self._lock_wait
+        )
+        self._cursor.close()
+
+
+class WriteBehindQueue:
+    """Batches DatabaseManager writes onto a single writer thread with group commits.
+    
+    Producers call submit() (or ``await submit_async()`` from coroutines) with the name of a
+    DatabaseManager write method and its arguments, and get a Future for its return value.
+    The writer drains up to ``batch_rows`` queued rows, or whatever arrived within
+    ``batch_delay_ms``, and applies them in one transaction. Consecutive save_tracking_batch
+    calls for the same upload are merged into one executemany. Producers block once
+    ``max_pending`` writes are waiting. Pending writes are flushed at interpreter exit.
+    """
+    
+    _STOP = object()
+    
+    def __init__(self, db_manager, batch_rows=500, batch_delay_ms=50, max_pending=10000):
+        self.db_manager = db_manager
+        self.batch_rows = batch_rows
+        self.batch_delay = batch_delay_ms / 1000
+        self.closed = False
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name='db-write-behind', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+    
+    def submit(self, method_name, *args, **kwargs):
+        """Queue a write, blocking while the queue is full, and return a Future for its result"""
+        if self.closed:
+            raise RuntimeError("Write-behind queue is closed")
+        future = Future()
+        self._queue.put((future, method_name, args, kwargs))
+        return future
+    
+    async def submit_async(self, method_name, *args, **kwargs):
+        """Queue a write without blocking the event loop and wait until it is committed"""
+        if self.closed:
+            raise RuntimeError("Write-behind queue is closed")
+        future = Future()
+        item = (future, method_name, args, kwargs)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # Back-pressure: wait for room off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, self._queue.put, item)
+        return await asyncio.wrap_future(future)
+    
+    def flush(self, timeout=None):
+        """Block until every write queued before this call has been committed"""
+        if self.closed:
+            return
+        marker = Future()
+        self._queue.put((marker, None, (), {}))
+        marker.result(timeout)
+    
+    def close(self, timeout=None):
+        """Flush pending writes and stop the writer thread"""
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+    
+    def _run(self):
+        """Writer thread: collect a batch, commit it, resolve its futures"""
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_delay
+            while len(batch) < self.batch_rows and batch[-1] is not self._STOP:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            if batch[-1] is self._STOP:
+                stopping = True
+                batch.pop()
+                # Drain anything that raced in ahead of the stop marker
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not self._STOP:
+                        batch.append(item)
+            
+            if not batch:
+                continue
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                # Keep the writer alive; nothing may be left waiting on this batch
+                logging.error(f"Write-behind writer failed on a batch of {len(batch)}: {e}")
+                for item in batch:
+                    if not item[0].done():
+                        self._resolve(item[0], None, e)
         
-        cursor.execute('''
-            SELECT id, upload_history_id, pro_number, carrier_name, load_id, request_timestamp
-            FROM tracking_requests
-            WHERE status = ?
-            ORDER BY request_timestamp
-        ''', (status,))
-        
-        requests = []
-        for row in cursor.fetchall():
-            requests.append({
-                'id': row[0],
-                'upload_history_id': row[1],
-                'pro_number': row[2],
-                'carrier_name': row[3],
-                'load_id': row[4],
-                'request_timestamp': row[5]
-            })
+        self.db_manager.close()
+    
+    def _write_batch(self, batch):
+        """Apply a batch in one transaction, each write in its own savepoint so a failing write fails alone"""
+        # Claim each future before writing; writes whose async caller already cancelled are dropped,
+        # and a claimed future can no longer be cancelled under us
+        batch = [item for item in batch if item[0].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        
+        outcomes = []
+        try:
+            with self.db_manager.transaction():
+                for group in self._group(batch):
+                    outcomes.extend(self._apply_isolated(group))
+        except Exception as e:
+            # The commit itself failed, so nothing in the batch was written
+            logging.error(f"Write-behind batch of {len(batch)} failed: {e}")
+            outcomes = [(item[0], None, e) for item in batch]
+        
+        for future, result, error in outcomes:
+            self._resolve(future, result, error)
+    
+    @staticmethod
+    def _resolve(future, result, error):
+        """Set a write's outcome on its future, never letting a bad outcome escape into the writer thread"""
+        try:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        except Exception as e:
+            logging.error(f"Could not resolve write-behind future: {e}")
+    
+    def _apply_isolated(self, group):
+        """Apply a group inside a savepoint, returning (future, result, error) per item.
         
-        conn.close()
-        return requests
\ No newline at end of file
+        If a merged group fails, its items are retried one by one so only the bad write fails.
+        """
+        try:
+            with self.db_manager.transaction():
+                results = self._apply(group)
+            return [(item[0], result, None) for item, result in zip(group['items'], results)]
+        except Exception as e:
+            if len(group['items']) == 1:
+                logging.error(f"Write-behind {group['method']} failed: {e}")
+                return [(group['items'][0][0], None, e)]
+            
+            outcomes = []
+            for item in group['items']:
+                outcomes.extend(self._apply_isolated(self._group([item])[0]))
+            return outcomes
+    
+    def _group(self, batch):
+        """Merge consecutive save_tracking_batch writes for the same upload into one call"""
+        groups = []
+        for item in batch:
+            future, method_name, args, kwargs = item
+            previous = groups[-1] if groups else None
+            if (method_name == 'save_tracking_batch' and not kwargs and previous and previous['sizes']
+                    and previous['method'] == method_name and previous['args'][0] == args[0]):
+                previous['items'].append(item)
+                previous['sizes'].append(len(args[1]))
+                previous['args'][1].extend(args[1])
+            elif method_name == 'save_tracking_batch' and not kwargs:
+                # Raise instead of returning [], so a failed save fails its futures rather than looking empty
+                groups.append({'method': method_name, 'args': [args[0], list(args[1])],
+                               'kwargs': {'raise_errors': True}, 'items': [item], 'sizes': [len(args[1])]})
+            else:
+                groups.append({'method': method_name, 'args': list(args), 'kwargs': kwargs,
+                               'items': [item], 'sizes': None})
+        return groups
+    
+    def _apply(self, group):
+        """Run one group's write and split its result back per submitted item"""
+        if group['method'] is None:
+            return [None]
+        result = getattr(self.db_manager, group['method'])(*group['args'], **group['kwargs'])
+        if group['sizes'] is None:
+            return [result]
+        
+        # save_tracking_batch returns one tuple per result
+        results = []
+        offset = 0
+        for size in group['sizes']:
+            results.append(result[offset:offset + size])
+            offset += size
+        return results
+
+
+class _HashingWriter:
+    """Binary file wrapper that feeds every written byte into a running hash"""
+    
+    def __init__(self, fileobj, hasher):
+        self._fileobj = fileobj
+        self._hasher = hasher
+    
+    def write(self, data):
+        self._hasher.update(data)
+        return self._fileobj.write(data)
+    
+    def flush(self):
+        self._fileobj.flush()
+    
+    def close(self):
+        # The underlying file is owned by the caller
+        self.flush()
+
+
+def _compress_payload(raw):
+    """Compress payload bytes with the best available codec, returning (codec, data)"""
+    if ZSTD_AVAILABLE:
+        return 'zstd', zstandard.ZstdCompressor().compress(raw)
+    return 'zlib', zlib.compress(raw)
+
+
+def _decompress_payload(codec, data):
+    """Decode a payload_blobs row back to text; registered as the payload_text() SQL function"""
+    if data is None:
+        return None
+    if codec == 'zstd':
+        raw = zstandard.ZstdDecompressor().decompress(data)
+    elif codec == 'zlib':
+        raw = zlib.decompress(data)
+    else:
+        raw = data
+    return raw.decode('utf-8')
+
+
+def _keyset_page(rows, page_size, cursor_of):
+    """Trim a page fetched with LIMIT page_size + 1 and derive the cursor for the next page"""
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, cursor_of(rows[-1])
+    return rows, None
+
+
+def _normalize_pro_number(pro_number):
+    """Canonical form of a PRO number: upper-case letters and digits only"""
+    if pro_number is None:
+        return ''
+    return re.sub(r'[^0-9A-Z]', '', str(pro_number).upper())
+
+
+def _carrier_key(carrier_name):
+    """Stable carrier code derived from a free-text carrier name"""
+    key = re.sub(r'[^a-z0-9]+', '_', str(carrier_name or '').lower()).strip('_')
+    return key or 'unknown'
+
+
+def _shipment_event_hash(carrier_code, pro_number, status, location, event, event_time):
+    """Identity of a tracking event, used to store each distinct event once"""
+    parts = [carrier_code, pro_number, status, location, event, event_time]
+    return hashlib.sha1('\x1f'.join('' if part is None else str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def _read_exactly(reader, size):
+    """Read size bytes from a (possibly decompressing) stream, or b'' at end of stream"""
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = reader.read(remaining)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
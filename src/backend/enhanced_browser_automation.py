@@ -48,6 +48,8 @@ import cloudscraper
 import httpx
 import aiohttp
 
+from .rate_limiter import install_rate_limiter, rate_limiter
+
 logger = logging.getLogger(__name__)
 
 class EnhancedBrowserAutomation:
@@ -189,7 +191,7 @@ class EnhancedBrowserAutomation:
     async def _create_requests_html_session(self, target: str) -> Dict[str, Any]:
         """Create requests-html session"""
         
-        session = HTMLSession()
+        session = install_rate_limiter(HTMLSession())
         session.headers.update(self._get_realistic_headers(target))
         
         return {
@@ -210,6 +212,7 @@ class EnhancedBrowserAutomation:
         )
         
         scraper.headers.update(self._get_realistic_headers(target))
+        install_rate_limiter(scraper)
         
         return {
             'type': 'cloudscraper',
@@ -325,8 +328,8 @@ class EnhancedBrowserAutomation:
         
         page = session['page']
         
-        # Random delay before navigation
-        await asyncio.sleep(random.uniform(1, 3))
+        # Pace navigation through the shared per-host limiter
+        await rate_limiter.wait(url)
         
         # Navigate with realistic timing
         await page.goto(url, wait_until='networkidle', timeout=30000)
@@ -350,8 +353,8 @@ class EnhancedBrowserAutomation:
         
         driver = session['driver']
         
-        # Random delay before navigation
-        time.sleep(random.uniform(1, 3))
+        # Pace navigation through the shared per-host limiter
+        await rate_limiter.wait(url)
         
         # Navigate
         driver.get(url)
@@ -377,9 +380,6 @@ class EnhancedBrowserAutomation:
         
         html_session = session['session']
         
-        # Random delay before navigation
-        await asyncio.sleep(random.uniform(1, 3))
-        
         # Get page
         response = html_session.get(url, timeout=30)
         
@@ -394,9 +394,6 @@ class EnhancedBrowserAutomation:
         
         scraper = session['session']
         
-        # Random delay before navigation
-        await asyncio.sleep(random.uniform(1, 3))
-        
         # Get page
         response = scraper.get(url, timeout=30)
         
@@ -293,9 +293,6 @@ class EnhancedHTTPScraper:
                                 if not form_action.startswith('http'):
                                     form_action = urljoin(url, form_action)
                                 
-                                # Shorter delay for faster execution
-                                await asyncio.sleep(random.uniform(0.5, 1.0))
-                                
                                 # Submit form with proper headers
                                 form_headers = headers.copy()
                                 form_headers.update({
@@ -476,7 +473,7 @@ class EnhancedHTTPScraper:
                 try:
                     # Try to parse as JSON
                     js_vars[var_name] = json.loads(var_value)
-                except:
+                except Exception:
                     # Store as string if not valid JSON
                     js_vars[var_name] = var_value
         
@@ -563,7 +560,7 @@ class EnhancedHTTPScraper:
                             result = self._parse_api_response(data, pro_number)
                             if result:
                                 return result
-                        except:
+                        except Exception:
                             # Try as text
                             text = await response.text()
                             if pro_number in text:
@@ -586,7 +583,7 @@ class EnhancedHTTPScraper:
                         result = self._parse_api_response(data, pro_number)
                         if result:
                             return result
-                    except:
+                    except Exception:
                         text = await response.text()
                         if pro_number in text:
                             return self._parse_text_response(text, pro_number, carrier)
@@ -840,7 +837,7 @@ class EnhancedHTTPScraper:
                 result = self._parse_api_response(data, pro_number)
                 if result:
                     return result
-        except:
+        except Exception:
             pass
         
         # HTML parsing
@@ -1006,7 +1003,7 @@ class EnhancedHTTPScraper:
             try:
                 data = json.loads(content)
                 return self._parse_api_response(data, pro_number)
-            except:
+            except Exception:
                 pass
         return None
     
@@ -20,7 +20,7 @@ from bs4 import BeautifulSoup
 # Import the anti-scraping bypass system
 from .anti_scraping_bypass import AntiScrapingBypass, BypassStrategy, BrowserFingerprint
 from .ltl_tracking_client import LTLTrackingClient, TrackingResult
-from .carrier_detection import detect_carrier_from_pro
+from .carrier_detection import detect_carrier_from_pro, validate_pro_for_tracking
 
 # Selenium imports
 try:
@@ -93,6 +93,16 @@ class EnhancedTrackingClient(LTLTrackingClient):
             TrackingResult with real tracking data
         """
         try:
+            # Reject provably invalid PROs before any request is made
+            is_valid, validation_error = validate_pro_for_tracking(pro_number)
+            if not is_valid:
+                return TrackingResult(
+                    pro_number=pro_number,
+                    carrier_name="Unknown",
+                    scrape_success=False,
+                    error_message=validation_error
+                )
+            
             # Detect carrier
             carrier_info = detect_carrier_from_pro(pro_number)
             if not carrier_info:
@@ -30,6 +30,8 @@ import requests
 from bs4 import BeautifulSoup
 import aiohttp
 
+from .rate_limiter import install_rate_limiter
+
 logger = logging.getLogger(__name__)
 
 class HumanBehaviorSimulator:
@@ -996,7 +998,7 @@ class SmartSessionManager:
     
     async def _create_warmed_session(self, carrier: str):
         """Create and warm up a new session"""
-        session = requests.Session()
+        session = install_rate_limiter(requests.Session())
         
         # Set session timeout
         session.timeout = 15
@@ -1012,10 +1014,6 @@ class SmartSessionManager:
                 # Extract and store session tokens/cookies
                 self._extract_session_tokens(response, carrier)
                 
-                # Human-like delay between requests
-                if i < len(warmup_urls) - 1:
-                    await asyncio.sleep(random.uniform(2.0, 5.0))
-                
             except Exception as e:
                 logger.debug(f"Warmup request failed for {url}: {e}")
                 continue
@@ -1261,10 +1259,6 @@ class ComprehensiveEnhancementSystem:
                 try:
                     logger.info(f"🎯 Trying endpoint: {endpoint}")
                     
-                    # Apply optimal timing
-                    optimal_delay = await self.behavior_simulator.calculate_optimal_request_time(carrier)
-                    await asyncio.sleep(optimal_delay)
-                    
                     # Make enhanced request
                     response = session.get(endpoint, timeout=15)
                     
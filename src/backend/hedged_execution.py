@@ -0,0 +1,140 @@
+"""
+Hedged Strategy Execution
+
+Runs alternative ways of getting the same answer (tracking strategies) so that a slow
+or stuck strategy does not hold up the ones behind it. Strategies start in priority
+order; the next one is started early ("hedged") once the newest has run past a delay,
+up to a parallelism cap, and every other strategy is cancelled as soon as one
+returns a validated result.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class HedgedExecutor:
+    """
+    Races prioritized strategies with bounded parallelism and cancels the losers.
+    """
+    
+    # Strategies running at once
+    MAX_PARALLEL = 2
+    
+    # Seconds the newest strategy runs alone before the next one is started beside it
+    HEDGE_DELAY_SECONDS = 5.0
+    
+    # Execution modes: (max_parallel, hedge_delay); None means the class default
+    MODES = {
+        'sequential': (1, float('inf')),
+        'hedged': (None, None),
+        'parallel': (None, 0.0),
+    }
+    
+    def __init__(self, max_parallel: Optional[int] = None, hedge_delay: Optional[float] = None):
+        self.max_parallel = max(1, max_parallel or self.MAX_PARALLEL)
+        self.hedge_delay = self.HEDGE_DELAY_SECONDS if hedge_delay is None else max(hedge_delay, 0.0)
+    
+    @classmethod
+    def for_mode(cls, mode: str, max_parallel: Optional[int] = None,
+                 hedge_delay: Optional[float] = None) -> 'HedgedExecutor':
+        """
+        Executor for an execution mode.
+        
+        'sequential' runs one strategy at a time, 'hedged' starts the next strategy after
+        the hedge delay, and 'parallel' starts the top max_parallel strategies at once.
+        """
+        if mode not in cls.MODES:
+            raise ValueError(f"Unknown execution mode '{mode}', expected one of {', '.join(cls.MODES)}")
+        
+        mode_parallel, mode_delay = cls.MODES[mode]
+        return cls(max_parallel=mode_parallel or max_parallel,
+                   hedge_delay=mode_delay if mode_delay is not None else hedge_delay)
+    
+    async def run(self, strategies: List[Tuple[str, Callable[[], Awaitable[Any]]]],
+                  is_success: Callable[[Any], bool],
+                  on_outcome: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Run strategies until one produces a result accepted by is_success.
+        
+        Args:
+            strategies: (name, coroutine function) pairs in priority order
+            is_success: Validates a strategy's result
+            on_outcome: Optional callback receiving each strategy's outcome as it is settled
+        
+        Returns:
+            Dict with the winning 'strategy' name (None if none succeeded), its 'result'
+            (or the last result seen), and 'attempts': one outcome per started strategy with
+            its 'strategy', 'outcome' ('success', 'failure', 'error' or 'cancelled') and 'elapsed' seconds
+        """
+        queue = deque(strategies)
+        running = {}
+        attempts = []
+        winner = None
+        result = None
+        
+        def settle(name: str, started: float, outcome: str) -> None:
+            attempt = {'strategy': name, 'outcome': outcome, 'elapsed': time.monotonic() - started}
+            attempts.append(attempt)
+            if on_outcome:
+                on_outcome(attempt)
+        
+        try:
+            while winner is None and (queue or running):
+                # Start the next strategy when nothing is running, or beside the others once
+                # the newest running one has gone past the hedge delay
+                now = time.monotonic()
+                while queue and len(running) < self.max_parallel and (
+                        not running or now - self._newest_start(running) >= self.hedge_delay):
+                    name, call = queue.popleft()
+                    running[asyncio.ensure_future(call())] = (len(strategies) - len(queue), name, now)
+                    if len(running) > 1:
+                        logger.debug(f"⏩ Hedging with {name} ({len(running)} strategies running)")
+                
+                wait_timeout = None
+                if queue and len(running) < self.max_parallel:
+                    wait_timeout = max(self._newest_start(running) + self.hedge_delay - now, 0.0)
+                
+                done, _ = await asyncio.wait(list(running), timeout=wait_timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                
+                # Settle in start order, so the higher-priority strategy wins a tie
+                for task in sorted(done, key=lambda finished: running[finished][0]):
+                    _, name, started = running.pop(task)
+                    if task.cancelled():
+                        outcome = 'cancelled'
+                    elif task.exception() is not None:
+                        logger.debug(f"Strategy {name} raised: {task.exception()}")
+                        outcome = 'error'
+                    elif is_success(task.result()):
+                        outcome = 'success'
+                        if winner is None:
+                            winner, result = name, task.result()
+                    else:
+                        outcome = 'failure'
+                        if winner is None:
+                            result = task.result()
+                    settle(name, started, outcome)
+        finally:
+            # Losers (or every strategy, if the caller was cancelled) must not keep running in the background
+            for task, (_, name, started) in running.items():
+                task.cancel()
+                task.add_done_callback(_discard_outcome)
+                settle(name, started, 'cancelled')
+        
+        return {'strategy': winner, 'result': result, 'attempts': attempts}
+    
+    @staticmethod
+    def _newest_start(running: Dict[asyncio.Future, Tuple[int, str, float]]) -> float:
+        """Start time of the most recently started strategy still running"""
+        return max(started for _, _, started in running.values())
+
+
+def _discard_outcome(task: asyncio.Future) -> None:
+    """Retrieve a cancelled loser's outcome so asyncio does not report it as never retrieved"""
+    if not task.cancelled():
+        task.exception()
@@ -0,0 +1,195 @@
+"""
+HTTP Session Pool
+
+Long-lived aiohttp sessions for carrier requests, so tracking reuses warm connections
+(keep-alive, cached DNS, resumed TLS) instead of paying connection setup on every
+request. aiohttp sessions belong to one event loop, so the pool keeps a set of named
+sessions per running loop and closes them when that loop shuts down.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Iterable, Optional
+
+import aiohttp
+
+from .rate_limiter import rate_limit_trace_config
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPSessionPool:
+    """
+    Named, per-event-loop pool of keep-alive aiohttp sessions with per-host connection limits.
+    """
+    
+    # Connections per session, in total and to any one host
+    CONNECTION_LIMIT = 100
+    LIMIT_PER_HOST = 8
+    
+    # Seconds resolved addresses and idle keep-alive connections are kept
+    DNS_CACHE_TTL = 300
+    KEEPALIVE_TIMEOUT = 30
+    
+    # Default request timeout for pooled sessions, in seconds
+    TOTAL_TIMEOUT = 30
+    CONNECT_TIMEOUT = 10
+    
+    def __init__(self):
+        # event loop -> {name: (session, created_at)}
+        self._sessions = {}
+        # event loop -> {name: asyncio.Lock}, so only one coroutine creates or rotates a session
+        self._name_locks = {}
+        # event loop -> {session replaced by rotation: task closing it once its in-flight requests are done}
+        self._retiring = {}
+        # event loop -> async generator that closes the loop's sessions at shutdown
+        self._shutdown_hooks = {}
+        self._lock = threading.Lock()
+    
+    async def get_session(self, name: str = 'default', headers: Optional[Dict[str, str]] = None,
+                          ssl: Any = None, cookie_jar: Optional[aiohttp.abc.AbstractCookieJar] = None,
+                          timeout: Optional[aiohttp.ClientTimeout] = None, limit_per_host: Optional[int] = None,
+                          max_age: Optional[float] = None, trust_env: bool = False) -> aiohttp.ClientSession:
+        """
+        Get the named session for the running event loop, creating it on first use.
+        
+        Args:
+            name: Pool slot; callers needing their own headers, TLS settings or cookies use their own name
+            headers, ssl, cookie_jar, timeout, limit_per_host, trust_env: Used only when the session is created
+            max_age: Replace the session once it is older than this many seconds (e.g. to rotate fingerprints)
+        
+        Returns:
+            A shared session; callers must not close it
+        """
+        loop = asyncio.get_running_loop()
+        await self._ensure_shutdown_hook(loop)
+        
+        session = self._current(loop, name, max_age)
+        if session is not None:
+            return session
+        
+        with self._lock:
+            name_lock = self._name_locks.setdefault(loop, {}).setdefault(name, asyncio.Lock())
+        
+        async with name_lock:
+            # Another coroutine may have created or rotated it while this one waited
+            session = self._current(loop, name, max_age)
+            if session is not None:
+                return session
+            return self._open(loop, name, headers, ssl, cookie_jar, timeout, limit_per_host, trust_env)
+    
+    def _current(self, loop: asyncio.AbstractEventLoop, name: str, max_age: Optional[float]) -> Optional[aiohttp.ClientSession]:
+        """The loop's open session for a name, or None if it is missing, closed or older than max_age"""
+        with self._lock:
+            session, created_at = self._sessions.get(loop, {}).get(name, (None, 0.0))
+        if session is None or session.closed:
+            return None
+        if max_age is not None and time.time() - created_at >= max_age:
+            return None
+        return session
+    
+    def _open(self, loop: asyncio.AbstractEventLoop, name: str, headers, ssl, cookie_jar, timeout,
+              limit_per_host, trust_env) -> aiohttp.ClientSession:
+        """Create a session and swap it in, retiring the one it replaces"""
+        connector = aiohttp.TCPConnector(
+            limit=self.CONNECTION_LIMIT,
+            limit_per_host=limit_per_host or self.LIMIT_PER_HOST,
+            ttl_dns_cache=self.DNS_CACHE_TTL,
+            use_dns_cache=True,
+            keepalive_timeout=self.KEEPALIVE_TIMEOUT,
+            enable_cleanup_closed=True,
+            ssl=ssl if ssl is not None else True
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            headers=headers,
+            timeout=timeout or aiohttp.ClientTimeout(total=self.TOTAL_TIMEOUT, connect=self.CONNECT_TIMEOUT),
+            cookie_jar=cookie_jar,
+            trust_env=trust_env,
+            trace_configs=[rate_limit_trace_config()]
+        )
+        
+        with self._lock:
+            sessions = self._sessions.setdefault(loop, {})
+            previous, _ = sessions.get(name, (None, 0.0))
+            sessions[name] = (session, time.time())
+        logger.debug(f"🔌 Opened pooled HTTP session '{name}'")
+        
+        if previous is not None and not previous.closed:
+            # Requests already using the old session keep it; it is closed after they have finished
+            retiring = self._retiring.setdefault(loop, {})
+            retiring[previous] = loop.create_task(self._retire(previous))
+            retiring[previous].add_done_callback(lambda _: retiring.pop(previous, None))
+        
+        return session
+    
+    async def _retire(self, session: aiohttp.ClientSession) -> None:
+        """Close a rotated-out session once requests already using it have had their full timeout to finish"""
+        try:
+            await asyncio.sleep(session.timeout.total or self.TOTAL_TIMEOUT)
+        finally:
+            if not session.closed:
+                await session.close()
+    
+    @asynccontextmanager
+    async def session(self, name: str = 'default', **session_options):
+        """
+        `async with pool.session() as session:` drop-in for a throwaway ClientSession.
+        
+        The session stays open for reuse when the block exits.
+        """
+        yield await self.get_session(name, **session_options)
+    
+    async def close(self, names: Optional[Iterable[str]] = None) -> None:
+        """Close the running loop's pooled sessions (all, or only the given names)"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            sessions = self._sessions.get(loop, {})
+            selected = list(sessions) if names is None else [name for name in names if name in sessions]
+            closing = [sessions.pop(name)[0] for name in selected]
+        
+        for session in closing:
+            if not session.closed:
+                await session.close()
+    
+    async def _ensure_shutdown_hook(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Close this loop's sessions when it shuts down.
+        
+        asyncio.run() finalizes every live async generator before closing its loop,
+        so a suspended generator whose finally block closes the sessions acts as a shutdown hook.
+        """
+        with self._lock:
+            # Forget loops that were closed without an orderly shutdown
+            for stale in [other for other in self._sessions if other.is_closed()]:
+                self._sessions.pop(stale, None)
+                self._retiring.pop(stale, None)
+                self._name_locks.pop(stale, None)
+                self._shutdown_hooks.pop(stale, None)
+            if loop in self._shutdown_hooks:
+                return
+            hook = self._shutdown_hooks[loop] = self._close_at_shutdown(loop)
+        
+        await hook.__anext__()
+    
+    async def _close_at_shutdown(self, loop: asyncio.AbstractEventLoop):
+        try:
+            yield
+        finally:
+            with self._lock:
+                sessions = self._sessions.pop(loop, {})
+                retiring = self._retiring.pop(loop, {})
+                self._name_locks.pop(loop, None)
+                self._shutdown_hooks.pop(loop, None)
+            for session in [session for session, _ in sessions.values()] + list(retiring):
+                if not session.closed:
+                    await session.close()
+            if sessions:
+                logger.debug(f"🔌 Closed {len(sessions)} pooled HTTP sessions at event loop shutdown")
+
+
+# Shared by every tracker in the process
+http_session_pool = HTTPSessionPool()
@@ -23,6 +23,8 @@ from dataclasses import dataclass
 from enum import Enum
 import urllib.parse
 
+from .rate_limiter import rate_limit_trace_config
+
 logger = logging.getLogger(__name__)
 
 class ProxyType(Enum):
@@ -478,7 +480,8 @@ class ProxyIntegrationManager:
         session = aiohttp.ClientSession(
             connector=connector,
             timeout=timeout,
-            trust_env=True
+            trust_env=True,
+            trace_configs=[rate_limit_trace_config()]
         )
         
         # Store proxy URL for use in requests
@@ -671,7 +671,7 @@ class PureWebScraper:
                     data = json.loads(json_str)
                     if isinstance(data, dict) and self._has_tracking_indicators(data):
                         return data
-                except:
+                except Exception:
                     continue
         
         return None
@@ -0,0 +1,193 @@
+"""
+Host Rate Limiter
+
+Process-wide pacing for outbound carrier requests. Every tracker shares one
+limiter keyed by target host, so concurrent requests to the same carrier site
+are spaced politely no matter which tracker class issues them.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+try:
+    from requests.adapters import BaseAdapter
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    BaseAdapter = object
+    REQUESTS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class HostRateLimiter:
+    """
+    Token-bucket rate limiter with one bucket per target host.
+    
+    Each host allows `burst` back-to-back requests, then `rate` requests per second,
+    and never starts two requests less than `min_interval` seconds apart.
+    """
+    
+    # Requests per second per host once the burst is spent
+    DEFAULT_RATE = 1.0
+    
+    # Requests a host accepts back-to-back after a quiet period
+    DEFAULT_BURST = 3
+    
+    # Minimum seconds between two requests to the same host
+    DEFAULT_MIN_INTERVAL = 0.25
+    
+    # Per-host overrides; a key also covers its subdomains
+    HOST_LIMITS = {
+        'estes-express.com': {'rate': 0.5, 'burst': 2},
+        'rlcarriers.com': {'rate': 0.5, 'burst': 2},
+    }
+    
+    def __init__(self, rate: Optional[float] = None, burst: Optional[int] = None,
+                 min_interval: Optional[float] = None):
+        self.rate = rate or self.DEFAULT_RATE
+        self.burst = burst or self.DEFAULT_BURST
+        self.min_interval = self.DEFAULT_MIN_INTERVAL if min_interval is None else min_interval
+        self.host_limits = {host: dict(limits) for host, limits in self.HOST_LIMITS.items()}
+        
+        # host -> (theoretical arrival time, last scheduled start)
+        self._state = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def host_key(url: str) -> str:
+        """Bucket key for a URL: its lowercase hostname without a leading 'www.'"""
+        host = (urlsplit(url).hostname or url or '').lower()
+        return host[4:] if host.startswith('www.') else host
+    
+    def configure_host(self, host: str, rate: Optional[float] = None, burst: Optional[int] = None,
+                       min_interval: Optional[float] = None) -> None:
+        """Override the limits for a host and its subdomains"""
+        limits = self.host_limits.setdefault(self.host_key(host), {})
+        if rate is not None:
+            limits['rate'] = rate
+        if burst is not None:
+            limits['burst'] = burst
+        if min_interval is not None:
+            limits['min_interval'] = min_interval
+    
+    def limits_for(self, host: str) -> Dict[str, float]:
+        """Effective rate, burst and min_interval for a host key"""
+        limits = {'rate': self.rate, 'burst': self.burst, 'min_interval': self.min_interval}
+        
+        # Most specific configured domain wins
+        matches = [configured for configured in self.host_limits
+                   if host == configured or host.endswith('.' + configured)]
+        if matches:
+            limits.update(self.host_limits[max(matches, key=len)])
+        
+        return limits
+    
+    def reserve(self, url: str) -> float:
+        """
+        Reserve the next request slot for the URL's host.
+        
+        Returns:
+            Seconds the caller must wait before sending the request
+        """
+        host = self.host_key(url)
+        limits = self.limits_for(host)
+        interval = 1.0 / max(limits['rate'], 1e-6)
+        tolerance = (max(int(limits['burst']), 1) - 1) * interval
+        
+        with self._lock:
+            now = time.monotonic()
+            arrival, last_start = self._state.get(host, (now, float('-inf')))
+            arrival = max(arrival, now)
+            
+            start = max(now, arrival - tolerance, last_start + limits['min_interval'])
+            self._state[host] = (max(arrival, start) + interval, start)
+        
+        return start - now
+    
+    async def wait(self, url: str) -> None:
+        """Wait for the next request slot for the URL's host (asyncio)"""
+        delay = self.reserve(url)
+        if delay > 0:
+            logger.debug(f"⏳ Rate limiting {self.host_key(url)}: waiting {delay:.2f}s")
+            await asyncio.sleep(delay)
+    
+    def wait_sync(self, url: str) -> None:
+        """Wait for the next request slot for the URL's host (blocking)"""
+        delay = self.reserve(url)
+        if delay > 0:
+            logger.debug(f"⏳ Rate limiting {self.host_key(url)}: waiting {delay:.2f}s")
+            time.sleep(delay)
+    
+    def reset(self) -> None:
+        """Forget all request history"""
+        with self._lock:
+            self._state.clear()
+
+
+class RateLimitedAdapter(BaseAdapter):
+    """
+    requests transport adapter that waits for the shared limiter before sending.
+    
+    Wraps the adapter already mounted on a session, so custom TLS adapters
+    (e.g. cloudscraper's) keep working unchanged.
+    """
+    
+    def __init__(self, adapter, limiter: Optional[HostRateLimiter] = None):
+        super().__init__()
+        self.adapter = adapter
+        self.limiter = limiter or rate_limiter
+    
+    def send(self, request, **kwargs):
+        self.limiter.wait_sync(request.url)
+        return self.adapter.send(request, **kwargs)
+    
+    def close(self):
+        self.adapter.close()
+    
+    def __getattr__(self, name):
+        if name == 'adapter':
+            raise AttributeError(name)
+        return getattr(self.adapter, name)
+
+
+def install_rate_limiter(session, limiter: Optional[HostRateLimiter] = None):
+    """
+    Route every request made through a requests (or cloudscraper) session via the limiter.
+    
+    Returns:
+        The same session, for chaining
+    """
+    for prefix, adapter in list(session.adapters.items()):
+        if not isinstance(adapter, RateLimitedAdapter):
+            session.adapters[prefix] = RateLimitedAdapter(adapter, limiter)
+    return session
+
+
+def rate_limit_trace_config(limiter: Optional[HostRateLimiter] = None):
+    """
+    aiohttp TraceConfig that waits for the limiter before each request.
+    
+    Pass as ClientSession(trace_configs=[rate_limit_trace_config()]).
+    """
+    limiter = limiter or rate_limiter
+    
+    async def on_request_start(session, trace_config_ctx, params):
+        await limiter.wait(str(params.url))
+    
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    return trace_config
+
+
+# Shared by every tracker in the process
+rate_limiter = HostRateLimiter()
@@ -222,7 +222,7 @@ class RealDataExtractor:
                     data = json.loads(json_str)
                     if isinstance(data, dict) and self._has_tracking_data(data):
                         return data
-                except:
+                except Exception:
                     continue
         
         return None
@@ -0,0 +1,91 @@
+"""
+Single-Flight Request Coalescing
+
+Concurrent calls for the same key share one execution: the first caller runs it and
+every caller that arrives while it is in flight receives a copy of its result. Works
+across event loops and threads, so overlapping Streamlit sessions coalesce too.
+"""
+
+import asyncio
+import concurrent.futures
+import copy
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class _FlightAbandoned(Exception):
+    """The leading call was cancelled before finishing; waiting callers must run it themselves"""
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent async calls that share a key into one in-flight execution.
+    """
+    
+    def __init__(self):
+        self.stats = {'executions': 0, 'coalesced': 0}
+        
+        # key -> concurrent.futures.Future of the in-flight call, shareable across event loops
+        self._flights = {}
+        self._lock = threading.Lock()
+    
+    def in_flight(self, key: Hashable) -> bool:
+        """Whether a call for the key is currently running"""
+        with self._lock:
+            return key in self._flights
+    
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run call() unless a call with the same key is already in flight, in which case wait for it.
+        
+        Args:
+            key: Identity of the work, e.g. (tracker, carrier code, normalized PRO)
+            call: Coroutine function doing the work
+        
+        Returns:
+            The call's result; callers that joined an in-flight call get their own deep copy
+        """
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                if flight is None:
+                    flight = self._flights[key] = concurrent.futures.Future()
+                    self.stats['executions'] += 1
+                    break
+                self.stats['coalesced'] += 1
+            
+            logger.debug(f"🔗 Joining in-flight call for {key}")
+            try:
+                # Shielded so a cancelled waiter does not cancel the shared call
+                return copy.deepcopy(await asyncio.shield(asyncio.wrap_future(flight)))
+            except _FlightAbandoned:
+                continue
+        
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            self._land(key, flight)
+            flight.set_exception(_FlightAbandoned())
+            raise
+        except BaseException as e:
+            self._land(key, flight)
+            flight.set_exception(e)
+            raise
+        
+        self._land(key, flight)
+        # Waiters copy from a private snapshot, so the leader's caller may mutate its result freely
+        flight.set_result(copy.deepcopy(result))
+        return result
+    
+    def _land(self, key: Hashable, flight: concurrent.futures.Future) -> None:
+        """Stop routing new callers to a finished flight"""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+
+# Tracking calls in flight across every tracker and session in the process
+tracking_flights = SingleFlight()
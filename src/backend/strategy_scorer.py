@@ -0,0 +1,206 @@
+"""
+Strategy Scorer
+
+Learns which tracking strategies work for which carrier. Every attempt updates a
+time-decayed success rate and latency per (tracker, carrier, strategy); trackers ask
+for their strategies ordered by expected payoff, with strategies that keep failing
+left out for a cooldown. A small exploration budget still probes skipped strategies
+so a carrier site that starts answering again is noticed. Scores persist in SQLite.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+
+class StrategyScorer:
+    """
+    Decayed success/latency scores per tracker, carrier and strategy, used to order and skip strategies.
+    """
+    
+    # Observations lose half their weight after this many seconds
+    HALF_LIFE_SECONDS = 3 * 24 * 3600
+    
+    # Untried strategies score as if they had PRIOR_ATTEMPTS attempts at PRIOR_SUCCESS_RATE
+    PRIOR_ATTEMPTS = 2.0
+    PRIOR_SUCCESS_RATE = 0.5
+    
+    # A strategy's score is halved when its typical latency reaches this many seconds
+    LATENCY_SCALE_SECONDS = 10.0
+    
+    # Weight of the newest attempt in the latency moving average
+    LATENCY_SMOOTHING = 0.3
+    
+    # Consecutive failures after which a strategy is skipped, and for how long
+    SKIP_AFTER_FAILURES = 5
+    SKIP_SECONDS = 30 * 60
+    
+    # Share of orderings that try one skipped strategy first, to notice recoveries
+    EXPLORATION_RATE = 0.05
+    
+    def __init__(self, db_manager: Optional[DatabaseManager] = None, persistent: bool = True):
+        self.persistent = persistent
+        
+        self._db_manager = db_manager
+        # tracker -> {(carrier_code, strategy): stats}
+        self._scores = {}
+        self._lock = threading.Lock()
+    
+    def configure(self, db_manager: Optional[DatabaseManager] = None, persistent: Optional[bool] = None) -> None:
+        """Use a specific database (e.g. the app's DatabaseManager) and/or turn persistence on or off"""
+        with self._lock:
+            if db_manager is not None:
+                self._db_manager = db_manager
+            if persistent is not None:
+                self.persistent = persistent
+            # Reload from the newly configured database on next use
+            self._scores.clear()
+    
+    def _get_db(self) -> Optional[DatabaseManager]:
+        """The backing DatabaseManager, opened on first use; None if persistence is off or unavailable"""
+        if not self.persistent:
+            return None
+        if self._db_manager is None:
+            try:
+                self._db_manager = DatabaseManager()
+            except Exception as e:
+                logger.warning(f"Strategy score persistence disabled, database unavailable: {e}")
+                self.persistent = False
+                return None
+        return self._db_manager
+    
+    def _tracker_scores(self, tracker: str) -> Dict[tuple, Dict[str, Any]]:
+        """A tracker's scores, loaded from SQLite on first use; call with the lock held"""
+        scores = self._scores.get(tracker)
+        if scores is None:
+            scores = {}
+            db_manager = self._get_db()
+            if db_manager is not None:
+                try:
+                    scores = db_manager.get_strategy_scores(tracker)
+                except Exception as e:
+                    logger.warning(f"Could not load strategy scores for {tracker}: {e}")
+            self._scores[tracker] = scores
+        return scores
+    
+    def _decayed(self, stats: Dict[str, Any], now: float) -> Dict[str, Any]:
+        """Stats with attempt and success weights decayed to now"""
+        factor = 0.5 ** (max(now - stats['updated_at'], 0.0) / self.HALF_LIFE_SECONDS)
+        decayed = dict(stats)
+        decayed['attempts'] = stats['attempts'] * factor
+        decayed['successes'] = stats['successes'] * factor
+        return decayed
+    
+    def score(self, stats: Optional[Dict[str, Any]], now: Optional[float] = None) -> float:
+        """Expected payoff of a strategy: smoothed success rate, discounted by its latency"""
+        if not stats:
+            return self.PRIOR_SUCCESS_RATE
+        
+        stats = self._decayed(stats, time.time() if now is None else now)
+        success_rate = ((stats['successes'] + self.PRIOR_ATTEMPTS * self.PRIOR_SUCCESS_RATE)
+                        / (stats['attempts'] + self.PRIOR_ATTEMPTS))
+        latency = stats['latency_seconds'] or 0.0
+        return success_rate / (1.0 + latency / self.LATENCY_SCALE_SECONDS)
+    
+    def order(self, tracker: str, carrier_code: str, strategies: List[str]) -> List[str]:
+        """
+        Strategies to try for a carrier, best first.
+        
+        Strategies without history keep their given order relative to each other. Strategies
+        in a failure cooldown are left out, except that one of them occasionally leads the list
+        as an exploration probe; if every strategy is cooling down, all of them are returned.
+        """
+        now = time.time()
+        with self._lock:
+            scores = self._tracker_scores(tracker)
+            stats = {strategy: scores.get((carrier_code, strategy)) for strategy in strategies}
+        
+        ranked = sorted(strategies, key=lambda strategy: -self.score(stats[strategy], now))
+        skipped = [strategy for strategy in ranked
+                   if stats[strategy] and stats[strategy]['skipped_until'] > now]
+        active = [strategy for strategy in ranked if strategy not in skipped]
+        
+        if not active:
+            return ranked
+        if skipped and random.random() < self.EXPLORATION_RATE:
+            probe = random.choice(skipped)
+            logger.debug(f"🔭 Probing skipped strategy {probe} for {carrier_code}")
+            return [probe] + active
+        if skipped:
+            logger.debug(f"⏭️ Skipping {', '.join(skipped)} for {carrier_code} after repeated failures")
+        return active
+    
+    def record(self, tracker: str, carrier_code: str, strategy: str, success: bool,
+               elapsed: Optional[float] = None) -> None:
+        """Fold one attempt's outcome (and how long it took) into the strategy's score"""
+        now = time.time()
+        with self._lock:
+            scores = self._tracker_scores(tracker)
+            previous = scores.get((carrier_code, strategy))
+            if previous:
+                stats = self._decayed(previous, now)
+            else:
+                stats = {'attempts': 0.0, 'successes': 0.0, 'latency_seconds': None,
+                         'consecutive_failures': 0, 'skipped_until': 0.0}
+            
+            stats['attempts'] += 1
+            if elapsed is not None:
+                stats['latency_seconds'] = elapsed if stats['latency_seconds'] is None else (
+                    self.LATENCY_SMOOTHING * elapsed + (1 - self.LATENCY_SMOOTHING) * stats['latency_seconds'])
+            
+            if success:
+                stats['successes'] += 1
+                stats['consecutive_failures'] = 0
+                stats['skipped_until'] = 0.0
+            else:
+                stats['consecutive_failures'] += 1
+                if stats['consecutive_failures'] >= self.SKIP_AFTER_FAILURES:
+                    stats['skipped_until'] = now + self.SKIP_SECONDS
+            
+            stats['updated_at'] = now
+            scores[(carrier_code, strategy)] = stats
+        
+        db_manager = self._get_db()
+        if db_manager is not None:
+            try:
+                db_manager.get_write_queue().submit(
+                    'save_strategy_score', tracker, carrier_code, strategy, stats['attempts'],
+                    stats['successes'], stats['latency_seconds'], stats['consecutive_failures'],
+                    stats['skipped_until'], updated_at=now
+                )
+            except Exception as e:
+                logger.warning(f"Could not store strategy score for {strategy} on {carrier_code}: {e}")
+    
+    def record_attempt(self, tracker: str, carrier_code: str, attempt: Dict[str, Any]) -> None:
+        """Record a HedgedExecutor attempt outcome; cancelled attempts say nothing about the strategy"""
+        if attempt['outcome'] == 'cancelled':
+            return
+        self.record(tracker, carrier_code, attempt['strategy'], attempt['outcome'] == 'success', attempt['elapsed'])
+    
+    def get_scores(self, tracker: str) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Current scores for a tracker, as {carrier_code: {strategy: {'score', 'success_rate', ...}}}"""
+        now = time.time()
+        with self._lock:
+            scores = dict(self._tracker_scores(tracker))
+        
+        report = {}
+        for (carrier_code, strategy), stats in scores.items():
+            decayed = self._decayed(stats, now)
+            report.setdefault(carrier_code, {})[strategy] = {
+                'score': round(self.score(stats, now), 3),
+                'success_rate': round(decayed['successes'] / decayed['attempts'], 3) if decayed['attempts'] else None,
+                'attempts': round(decayed['attempts'], 1),
+                'latency_seconds': stats['latency_seconds'],
+                'skipped': stats['skipped_until'] > now
+            }
+        return report
+
+
+# Shared by every tracker in the process
+strategy_scorer = StrategyScorer()
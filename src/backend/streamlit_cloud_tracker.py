@@ -34,6 +34,12 @@ from .status_event_extractor import StatusEventExtractor
 
 # Import cloud-native tracker
 from .cloud_native_tracker import CloudNativeTracker
+from .carrier_detection import validate_pro_for_tracking
+from .tracking_scheduler import TrackingScheduler
+from .http_session_pool import http_session_pool
+from .rate_limiter import rate_limiter
+from .strategy_scorer import strategy_scorer
+from .tracking_cache import cached_tracking
 
 # Import diagnostic systems (with fallback)
 try:
@@ -272,34 +278,6 @@ class HumanBehaviorSimulator:
         self.session_start_time = time.time()
         self.request_count = 0
         
-    def get_human_delay(self, carrier: str = None) -> float:
-        """Get human-like delay between requests"""
-        # Base delay ranges
-        current_hour = datetime.now().hour
-        
-        if 9 <= current_hour <= 17:  # Business hours
-            base_delay = random.uniform(2.5, 6.0)
-        elif 17 <= current_hour <= 22:  # Evening
-            base_delay = random.uniform(1.8, 4.5)
-        else:  # Night/early morning
-            base_delay = random.uniform(1.2, 3.0)
-        
-        # Carrier-specific adjustments
-        carrier_multipliers = {
-            'fedex': 1.2,  # FedEx is more protected
-            'estes': 1.3,  # Estes has strong protection
-            'peninsula': 1.0,  # Peninsula is moderate
-            'rl': 1.1  # R&L has moderate protection
-        }
-        
-        multiplier = carrier_multipliers.get(carrier, 1.0)
-        final_delay = base_delay * multiplier
-        
-        # Add randomness to avoid patterns
-        final_delay *= random.uniform(0.7, 1.3)
-        
-        return final_delay
-    
     def should_warm_session(self, carrier: str) -> bool:
         """Determine if session should be warmed"""
         # Warm session for new carriers or after long breaks
@@ -309,10 +287,6 @@ class HumanBehaviorSimulator:
         # Warm if first request or >5 minutes since last
         return time_since_last > 300 or last_request == 0
     
-    def get_page_interaction_delay(self) -> float:
-        """Get delay for page interaction simulation"""
-        return random.uniform(0.5, 2.0)
-    
     def simulate_typing_delay(self, text: str) -> float:
         """Simulate human typing delay"""
         # Average typing speed: 40 WPM = 200 characters per minute
@@ -354,52 +328,32 @@ class AdvancedSessionManager:
         return context
     
     async def get_session(self, carrier: str, profile: Dict[str, Any]) -> aiohttp.ClientSession:
-        """Get or create persistent session for carrier"""
+        """Get or create persistent session for carrier from the shared session pool"""
         session_key = f"{carrier}_{profile['user_agent'][:50]}"
         
-        if session_key not in self.sessions or self.sessions[session_key].closed:
-            # Create SSL context
-            ssl_context = self.create_ssl_context(profile)
-            
-            # Create connection pool
-            connector = aiohttp.TCPConnector(
-                ssl=ssl_context,
-                limit=10,
-                limit_per_host=3,
-                ttl_dns_cache=300,
-                use_dns_cache=True,
-                keepalive_timeout=30,
-                enable_cleanup_closed=True
-            )
-            
-            # Create session with advanced settings
-            timeout = aiohttp.ClientTimeout(
-                total=30,
-                connect=10,
-                sock_read=15
-            )
-            
-            session = aiohttp.ClientSession(
-                connector=connector,
-                timeout=timeout,
-                headers={'User-Agent': profile['user_agent']},
-                cookie_jar=aiohttp.CookieJar(unsafe=True),
-                trust_env=True
-            )
-            
-            self.sessions[session_key] = session
+        if session_key not in self.sessions:
+            self.sessions[session_key] = f"advanced:{session_key}"
+            self.ssl_contexts[session_key] = self.create_ssl_context(profile)
             self.session_cookies[session_key] = {}
         
-        return self.sessions[session_key]
+        # Keep-alive connections with browser-like TLS settings and a persistent cookie jar
+        return await http_session_pool.get_session(
+            self.sessions[session_key],
+            headers={'User-Agent': profile['user_agent']},
+            ssl=self.ssl_contexts[session_key],
+            cookie_jar=aiohttp.CookieJar(unsafe=True),
+            timeout=aiohttp.ClientTimeout(total=30, connect=10, sock_read=15),
+            limit_per_host=3,
+            trust_env=True
+        )
     
     async def close_all_sessions(self):
         """Close all active sessions"""
-        for session in self.sessions.values():
-            if not session.closed:
-                await session.close()
+        await http_session_pool.close(self.sessions.values())
         
         self.sessions.clear()
         self.session_cookies.clear()
+        self.ssl_contexts.clear()
 
 class EnhancedStreamlitCloudTracker:
     """
@@ -561,8 +515,8 @@ class EnhancedStreamlitCloudTracker:
                     # Fallback to direct connection if proxy fails
                     logger.debug(f"Proxy request failed for {carrier}, falling back to direct connection")
             
-            # Direct connection fallback
-            async with aiohttp.ClientSession() as session:
+            # Direct connection fallback over a pooled keep-alive session
+            async with http_session_pool.session() as session:
                 async with session.request(method, url, headers=headers, **kwargs) as response:
                     request_metadata['response_time'] = time.time() - start_time
                     request_metadata['status_code'] = response.status
@@ -591,6 +545,7 @@ class EnhancedStreamlitCloudTracker:
             logger.debug(f"Enhanced request failed for {url}: {e}")
             return None, request_metadata
     
+    @cached_tracking
     async def track_shipment(self, tracking_number: str, carrier: str) -> Dict[str, Any]:
         """
         Enhanced tracking using cloud-native HTTP methods
@@ -749,8 +704,6 @@ class EnhancedStreamlitCloudTracker:
             
             async with session.get(warming_url, headers=headers) as response:
                 if response.status == 200:
-                    # Simulate page interaction
-                    await asyncio.sleep(self.behavior_simulator.get_page_interaction_delay())
                     logger.debug(f"Session warmed for {carrier}")
                     
         except Exception as e:
@@ -1061,15 +1014,7 @@ class EnhancedStreamlitCloudTracker:
                 if i > 0:  # Skip first URL if already warmed
                     headers = self.browser_fingerprinter.get_headers(url, profile, pattern_urls[i-1])
                     
-                    response, metadata = await self.make_enhanced_request('GET', url, carrier, headers)
-                    
-                    if response and response.status == 200:
-                        # Simulate page interaction
-                        await asyncio.sleep(self.behavior_simulator.get_page_interaction_delay())
-                
-                # Human-like delay between page visits
-                if i < len(pattern_urls) - 1:
-                    await asyncio.sleep(random.uniform(0.5, 1.5))
+                    await self.make_enhanced_request('GET', url, carrier, headers)
             
             # Now perform actual tracking with proxy
             if pattern_urls:
@@ -1318,14 +1263,8 @@ class EnhancedStreamlitCloudTracker:
         
         logger.info(f"🚀 Starting enhanced bulk tracking for {len(tracking_data)} shipments")
         
-        # Create tasks for concurrent tracking
-        tasks = []
-        for tracking_number, carrier in tracking_data:
-            task = asyncio.create_task(self.track_shipment(tracking_number, carrier))
-            tasks.append(task)
-        
-        # Wait for all tasks to complete
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Track concurrently, capped overall and per carrier so no carrier is flooded
+        results = await TrackingScheduler().run(tracking_data, self.track_shipment)
         
         # Process results
         successful_tracks = 0
@@ -1658,10 +1597,6 @@ class StreamlitCloudTracker:
             'enhanced_api_discovery': self.try_enhanced_api_discovery
         }
         
-        # Rate limiting for cloud deployment
-        self.last_request_time = {}
-        self.min_request_interval = 1.5  # Reduced from 2.0 for better performance
-        
         # Initialize diagnostic systems
         self.content_analyzer = ContentAnalyzer() if DIAGNOSTICS_AVAILABLE and ContentAnalyzer else None
         self.failure_analyzer = FailureAnalyzer() if DIAGNOSTICS_AVAILABLE and FailureAnalyzer else None
@@ -1765,36 +1700,6 @@ class StreamlitCloudTracker:
         
         return carrier_headers
     
-    async def apply_human_like_timing(self, carrier: str):
-        """Apply human-like delays based on time of day"""
-        if not self.simplified_enhancements_available:
-            await asyncio.sleep(1.0)  # Basic delay
-            return
-        
-        try:
-            import random
-            from datetime import datetime
-            
-            current_hour = datetime.now().hour
-            
-            # Adjust request patterns based on time of day
-            if 8 <= current_hour <= 17:  # Business hours
-                # Slower, more deliberate requests (employees checking shipments)
-                delay = random.uniform(2.0, 5.0)
-            elif 17 <= current_hour <= 22:  # Evening hours
-                # Moderate speed (people checking personal packages)
-                delay = random.uniform(1.5, 4.0)
-            else:  # After hours/early morning
-                # Faster, more urgent requests (drivers/logistics)
-                delay = random.uniform(1.0, 3.0)
-            
-            logger.debug(f"Applying human-like delay: {delay:.2f}s for {carrier}")
-            await asyncio.sleep(delay)
-            
-        except Exception as e:
-            logger.debug(f"Error applying human-like timing: {e}")
-            await asyncio.sleep(1.0)  # Fallback delay
-    
     async def warm_session_for_carrier(self, carrier: str, session):
         """Visit carrier homepage to establish session context"""
         if not self.simplified_enhancements_available:
@@ -1877,6 +1782,7 @@ class StreamlitCloudTracker:
         
         return list(set(variations))  # Remove duplicates
     
+    @cached_tracking
     async def track_shipment(self, tracking_number: str, carrier: str) -> Dict[str, Any]:
         """
         Main tracking method that uses cloud-native tracking for improved success rates
@@ -1893,6 +1799,18 @@ class StreamlitCloudTracker:
         
         logger.info(f"🌐 Enhanced Cloud tracking: {carrier} - {tracking_number}")
         
+        # Reject provably invalid PROs before any request is made
+        is_valid, validation_error = validate_pro_for_tracking(tracking_number, carrier)
+        if not is_valid:
+            return {
+                'success': False,
+                'tracking_number': tracking_number,
+                'carrier': carrier,
+                'error': validation_error,
+                'processing_time': time.time() - start_time,
+                'method': 'pro_validation'
+            }
+        
         # Try cloud-native tracker first if available
         if self.cloud_native_available:
             try:
@@ -1927,22 +1845,19 @@ class StreamlitCloudTracker:
                 logger.error(f"❌ Cloud-native tracking error for {carrier} - {tracking_number}: {e}")
         
         # Fallback to legacy methods if cloud-native fails
-        # Apply rate limiting first
-        await self.apply_rate_limiting(carrier_lower)
         
-        # Apply human-like timing if available
-        if self.simplified_enhancements_available:
-            await self.apply_human_like_timing(carrier_lower)
-        
-        # Try enhanced cloud-native methods in order (using simplified enhancements)
-        for method_name, method_func in self.tracking_methods.items():
+        # Try enhanced cloud-native methods, best first for this carrier (using simplified enhancements)
+        tracker_name = type(self).__name__
+        for method_name in strategy_scorer.order(tracker_name, carrier_lower, list(self.tracking_methods)):
+            method_func = self.tracking_methods[method_name]
+            method_start = time.time()
             try:
                 logger.info(f"🔧 Trying {method_name} for {carrier}")
                 
                 # Create session with realistic headers
                 import aiohttp
                 timeout = aiohttp.ClientTimeout(total=15)
-                async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with http_session_pool.session('fallback_methods', timeout=timeout) as session:
                     # Warm session if enhancements available
                     if self.simplified_enhancements_available:
                         await self.warm_session_for_carrier(carrier_lower, session)
@@ -1972,6 +1887,8 @@ class StreamlitCloudTracker:
                             enhanced_result['enhancements_applied'] = self._get_applied_enhancements()
                             enhanced_result['system_used'] = 'Enhanced Streamlit Cloud Tracker'
                             
+                            strategy_scorer.record(tracker_name, carrier_lower, method_name, True,
+                                                   time.time() - method_start)
                             return enhanced_result
                         else:
                             logger.debug(f"❌ {method_name} failed event extraction for {carrier}")
@@ -1980,7 +1897,8 @@ class StreamlitCloudTracker:
                 
             except Exception as e:
                 logger.debug(f"❌ {method_name} error for {carrier}: {e}")
-                continue
+            
+            strategy_scorer.record(tracker_name, carrier_lower, method_name, False, time.time() - method_start)
         
         # All methods failed - analyze and return informative failure
         logger.warning(f"❌ All enhanced methods failed for {carrier} - {tracking_number}")
@@ -2003,17 +1921,6 @@ class StreamlitCloudTracker:
         
         return self.create_informative_failure(tracking_number, carrier, start_time, failure_result)
     
-    async def apply_rate_limiting(self, carrier: str) -> None:
-        """Apply rate limiting to prevent overwhelming carrier websites"""
-        current_time = time.time()
-        last_request = self.last_request_time.get(carrier, 0)
-        
-        if current_time - last_request < self.min_request_interval:
-            wait_time = self.min_request_interval - (current_time - last_request)
-            await asyncio.sleep(wait_time)
-        
-        self.last_request_time[carrier] = time.time()
-    
     async def try_enhanced_mobile_endpoints(self, tracking_number: str, carrier: str) -> Optional[Dict[str, Any]]:
         """Try mobile-optimized endpoints that often bypass main site protection"""
         mobile_urls = {
@@ -2043,7 +1950,7 @@ class StreamlitCloudTracker:
         
         for url in urls:
             try:
-                async with aiohttp.ClientSession() as session:
+                async with http_session_pool.session() as session:
                     headers = self.get_realistic_headers(carrier)
                     
                     async with session.get(url, headers=headers) as response:
@@ -2102,7 +2009,7 @@ class StreamlitCloudTracker:
             return None
         
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_session_pool.session() as session:
                 headers = self.get_realistic_headers(carrier)
                 
                 if config['method'] == 'POST':
@@ -2153,7 +2060,7 @@ class StreamlitCloudTracker:
         
         for url in urls:
             try:
-                async with aiohttp.ClientSession() as session:
+                async with http_session_pool.session() as session:
                     headers = self.get_realistic_headers(carrier)
                     
                     async with session.get(url, headers=headers) as response:
@@ -2191,7 +2098,7 @@ class StreamlitCloudTracker:
             return None
         
         try:
-            async with aiohttp.ClientSession() as session:
+            async with http_session_pool.session() as session:
                 headers = self.get_realistic_headers(carrier)
                 
                 async with session.get(url, headers=headers) as response:
@@ -2236,7 +2143,7 @@ class StreamlitCloudTracker:
         
         for endpoint in endpoints:
             try:
-                async with aiohttp.ClientSession() as session:
+                async with http_session_pool.session() as session:
                     headers = self.get_realistic_headers(carrier)
                     
                     async with session.get(endpoint, headers=headers) as response:
@@ -2430,14 +2337,8 @@ class StreamlitCloudTracker:
         
         logger.info(f"🚛 Starting bulk tracking for {len(tracking_data)} shipments")
         
-        # Create tasks for concurrent tracking
-        tasks = []
-        for tracking_number, carrier in tracking_data:
-            task = asyncio.create_task(self.track_shipment(tracking_number, carrier))
-            tasks.append(task)
-        
-        # Wait for all tasks to complete
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Track concurrently, capped overall and per carrier so no carrier is flooded
+        results = await TrackingScheduler().run(tracking_data, self.track_shipment)
         
         # Process results
         successful_tracks = 0
@@ -2551,7 +2452,8 @@ class StreamlitCloudTracker:
                 'overall': '15-25% (enhanced vs previous 0%)'
             },
             'tracking_methods': list(self.tracking_methods.keys()),
-            'rate_limiting': f'{self.min_request_interval}s between requests',
+            'strategy_scores': strategy_scorer.get_scores(type(self).__name__),
+            'rate_limiting': f'{rate_limiter.rate:g} req/s per host (burst {rate_limiter.burst})',
             'timeout_settings': '10-15s per request',
             'diagnostic_capabilities': DIAGNOSTICS_AVAILABLE,
             'enhancements_applied': self._get_applied_enhancements() if hasattr(self, '_get_applied_enhancements') else []
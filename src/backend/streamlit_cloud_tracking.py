@@ -5,18 +5,19 @@ Optimized for Streamlit Cloud environment using only HTTP methods
 Achieves 75-85% success rates without browser automation
 """
 
-import asyncio
 import requests
 import time
 import logging
 import re
 import json
-import random
 import hashlib
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 from urllib.parse import urljoin, urlparse, quote
 
+from .rate_limiter import install_rate_limiter
+from .tracking_cache import cached_tracking
+
 # Handle optional dependencies gracefully
 try:
     import aiohttp
@@ -78,7 +79,7 @@ class CloudSessionManager:
         
     def create_mobile_session(self, carrier: str) -> requests.Session:
         """Create mobile-optimized session for specific carrier"""
-        session = requests.Session()
+        session = install_rate_limiter(requests.Session())
         
         session.headers.update({
             'User-Agent': self.get_user_agent(carrier),
@@ -97,7 +98,7 @@ class CloudSessionManager:
     
     def create_api_session(self, carrier: str) -> requests.Session:
         """Create API-optimized session for specific carrier"""
-        session = requests.Session()
+        session = install_rate_limiter(requests.Session())
         
         session.headers.update({
             'User-Agent': self.get_user_agent(carrier),
@@ -112,26 +113,6 @@ class CloudSessionManager:
         
         return session
 
-class CloudRateLimiter:
-    """Rate limiting optimized for cloud environments"""
-    
-    def __init__(self):
-        self.request_times = {}
-        self.min_delay = 1.0  # Minimum delay between requests
-        self.max_delay = 3.0  # Maximum delay for randomization
-        
-    async def wait_if_needed(self, carrier: str):
-        """Wait if needed to respect rate limits"""
-        now = time.time()
-        last_request = self.request_times.get(carrier, 0)
-        
-        time_since_last = now - last_request
-        if time_since_last < self.min_delay:
-            delay = random.uniform(self.min_delay, self.max_delay)
-            await asyncio.sleep(delay)
-        
-        self.request_times[carrier] = time.time()
-
 class StreamlitCloudFedExTracker:
     """Cloud-native FedEx tracking using mobile APIs and HTTP methods"""
     
@@ -233,8 +214,6 @@ class StreamlitCloudFedExTracker:
                                 html_info = self._parse_fedex_html(response.text, tracking_number)
                                 if html_info:
                                     return html_info
-                        
-                        await asyncio.sleep(0.5)  # Small delay between attempts
                 
                 except Exception as e:
                     logger.debug(f"Mobile API endpoint failed: {endpoint} - {e}")
@@ -970,9 +949,6 @@ class StreamlitCloudRLTracker:
             response = self.mobile_session.get(main_url, timeout=15)
             
             if response.status_code == 200:
-                # Wait to simulate human behavior
-                await asyncio.sleep(random.uniform(1, 3))
-                
                 # Visit tracking page
                 tracking_url = "https://www.rlcarriers.com/tracking/"
                 response = self.mobile_session.get(tracking_url, timeout=15)
@@ -1170,7 +1146,6 @@ class StreamlitCloudTrackingSystem:
     
     def __init__(self):
         self.session_manager = CloudSessionManager()
-        self.rate_limiter = CloudRateLimiter()
         
         # Initialize cloud-native trackers
         self.trackers = {
@@ -1184,15 +1159,13 @@ class StreamlitCloudTrackingSystem:
         logger.info("📊 Target success rates: FedEx 70-80%, Peninsula 60-70%, R&L 65-75%")
         logger.info(f"🔧 Dependencies: BeautifulSoup={BEAUTIFULSOUP_AVAILABLE}, FakeUserAgent={FAKE_USERAGENT_AVAILABLE}")
     
+    @cached_tracking
     async def track_shipment(self, tracking_number: str, carrier: str) -> Dict[str, Any]:
         """
         Main tracking method optimized for Streamlit Cloud
         """
         logger.info(f"🌐 Cloud tracking: {carrier} - {tracking_number}")
         
-        # Apply rate limiting
-        await self.rate_limiter.wait_if_needed(carrier.lower())
-        
         # Route to appropriate tracker
         carrier_lower = carrier.lower()
         
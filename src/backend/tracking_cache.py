@@ -0,0 +1,265 @@
+"""
+Tracking Result Cache
+
+Caches tracking results per (carrier, normalized PRO) so the same shipment tracked
+again by another user or upload is served without re-running the tracking cascade.
+Entries live in an in-memory LRU in front of the SQLite tracking_cache table, and
+expire after a TTL chosen by the shipment's status: delivered shipments no longer
+change, in-transit ones do, and failures are retried soon.
+"""
+
+import asyncio
+import contextvars
+import copy
+import functools
+import inspect
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .carrier_detection import carrier_detector
+from .database import DatabaseManager
+from .single_flight import tracking_flights
+
+logger = logging.getLogger(__name__)
+
+# Set while a cached entry point runs, so trackers it calls internally do not cache again
+_in_cached_call = contextvars.ContextVar('in_cached_tracking_call', default=False)
+
+
+class TrackingResultCache:
+    """
+    Two-level (memory LRU, then SQLite) cache of tracking results with status-dependent TTLs.
+    """
+    
+    # Seconds a result stays fresh, by status class
+    TTL_SECONDS = {
+        'delivered': 7 * 24 * 3600,
+        'in_transit': 30 * 60,
+        'failure': 2 * 60,
+    }
+    
+    # Entries kept in the in-memory LRU
+    MEMORY_SIZE = 4096
+    
+    # Expired rows are purged from SQLite at most this often
+    PURGE_INTERVAL_SECONDS = 3600
+    
+    # Keys added to every result returned through the cache
+    CACHE_FIELDS = ('from_cache', 'cache_age_seconds', 'cache_status_class')
+    
+    def __init__(self, db_manager: Optional[DatabaseManager] = None, memory_size: Optional[int] = None,
+                 persistent: bool = True):
+        self.memory_size = memory_size or self.MEMORY_SIZE
+        self.persistent = persistent
+        self.stats = {'memory_hits': 0, 'db_hits': 0, 'misses': 0, 'stores': 0}
+        
+        self._db_manager = db_manager
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+    
+    def configure(self, db_manager: Optional[DatabaseManager] = None, persistent: Optional[bool] = None) -> None:
+        """Use a specific database (e.g. the app's DatabaseManager) and/or turn persistence on or off"""
+        if db_manager is not None:
+            self._db_manager = db_manager
+        if persistent is not None:
+            self.persistent = persistent
+    
+    def _get_db(self) -> Optional[DatabaseManager]:
+        """The backing DatabaseManager, opened on first use; None if persistence is off or unavailable"""
+        if not self.persistent:
+            return None
+        if self._db_manager is None:
+            try:
+                self._db_manager = DatabaseManager()
+            except Exception as e:
+                logger.warning(f"Tracking cache persistence disabled, database unavailable: {e}")
+                self.persistent = False
+                return None
+        return self._db_manager
+    
+    @staticmethod
+    def cache_key(namespace: str, tracking_number: str, carrier: Optional[str] = None) -> Tuple[str, str, str]:
+        """(namespace, carrier code, normalized PRO) identifying a cached result"""
+        pro_number = re.sub(r'[^0-9A-Z]', '', str(tracking_number or '').upper())
+        return namespace, carrier_detector.carrier_code_for(str(tracking_number or ''), carrier), pro_number
+    
+    @staticmethod
+    def status_class(result: Any) -> str:
+        """Classify a tracking result as 'delivered', 'in_transit' or 'failure' to pick its TTL"""
+        if not isinstance(result, dict):
+            return 'failure'
+        if result.get('success') is False or result.get('status') in ('error', 'failed'):
+            return 'failure'
+        
+        status_text = ' '.join(
+            str(result.get(field) or '') for field in ('tracking_status', 'status', 'status_description')
+        ).lower()
+        if result.get('is_delivered') or (re.search(r'\bdelivered\b', status_text)
+                                          and not re.search(r'\bnot delivered\b', status_text)):
+            return 'delivered'
+        return 'in_transit'
+    
+    async def get(self, namespace: str, tracking_number: str, carrier: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Fresh cached result for a shipment, or None; the SQLite lookup runs off the event loop.
+        
+        Returns:
+            A copy of the cached result with from_cache=True and its cache_age_seconds
+        """
+        key = self.cache_key(namespace, tracking_number, carrier)
+        now = time.time()
+        
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry['expires_at'] > now:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return self._hit(entry, tracking_number, now)
+            if entry:
+                del self._memory[key]
+        
+        db_manager = self._get_db()
+        if db_manager is not None:
+            try:
+                entry = await asyncio.get_running_loop().run_in_executor(
+                    None, functools.partial(db_manager.get_tracking_cache_entry, *key, now=now)
+                )
+            except Exception as e:
+                logger.warning(f"Tracking cache lookup failed for {tracking_number}: {e}")
+                entry = None
+            
+            if entry:
+                self._remember(key, entry)
+                self.stats['db_hits'] += 1
+                return self._hit(entry, tracking_number, now)
+        
+        self.stats['misses'] += 1
+        return None
+    
+    async def put(self, namespace: str, tracking_number: str, carrier: Optional[str], result: Any) -> Any:
+        """
+        Cache a freshly tracked result for its status class TTL; SQLite writes go through the write-behind queue.
+        
+        Returns:
+            The result, marked from_cache=False with a cache_age_seconds of 0
+        """
+        if not isinstance(result, dict):
+            return result
+        
+        key = self.cache_key(namespace, tracking_number, carrier)
+        status_class = self.status_class(result)
+        ttl_seconds = self.TTL_SECONDS[status_class]
+        now = time.time()
+        
+        stored = {name: value for name, value in result.items() if name not in self.CACHE_FIELDS}
+        entry = {'status_class': status_class, 'result': copy.deepcopy(stored),
+                 'cached_at': now, 'expires_at': now + ttl_seconds}
+        self._remember(key, entry)
+        self.stats['stores'] += 1
+        
+        db_manager = self._get_db()
+        if db_manager is not None:
+            try:
+                write_queue = db_manager.get_write_queue()
+                await write_queue.submit_async('save_tracking_cache_entry', *key, status_class, stored,
+                                               ttl_seconds, cached_at=now)
+                if now - self._last_purge > self.PURGE_INTERVAL_SECONDS:
+                    self._last_purge = now
+                    await write_queue.submit_async('purge_tracking_cache')
+            except Exception as e:
+                logger.warning(f"Tracking cache store failed for {tracking_number}: {e}")
+        
+        return self._annotate(result, False, 0.0, status_class)
+    
+    def invalidate(self, namespace: Optional[str] = None) -> None:
+        """Drop cached results from memory (all, or one namespace) and, for all, from SQLite too"""
+        with self._lock:
+            for key in list(self._memory):
+                if namespace is None or key[0] == namespace:
+                    del self._memory[key]
+        
+        db_manager = self._get_db()
+        if namespace is None and db_manager is not None:
+            db_manager.purge_tracking_cache(expired_only=False)
+    
+    def _remember(self, key: Tuple[str, str, str], entry: Dict[str, Any]) -> None:
+        """Store an entry in the memory LRU, evicting the least recently used ones"""
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+    
+    def _hit(self, entry: Dict[str, Any], tracking_number: str, now: float) -> Dict[str, Any]:
+        """Copy of a cached result, marked with its age"""
+        result = self.echo_pro_number(copy.deepcopy(entry['result']), tracking_number)
+        return self._annotate(result, True, now - entry['cached_at'], entry['status_class'])
+    
+    @staticmethod
+    def echo_pro_number(result: Any, tracking_number: str) -> Any:
+        """Report a shared result under the PRO number as the caller wrote it"""
+        if isinstance(result, dict):
+            for field in ('tracking_number', 'pro_number'):
+                if field in result:
+                    result[field] = tracking_number
+        return result
+    
+    @staticmethod
+    def _annotate(result: Dict[str, Any], from_cache: bool, age_seconds: float, status_class: str) -> Dict[str, Any]:
+        """Mark a result with where it came from and how old it is"""
+        result['from_cache'] = from_cache
+        result['cache_age_seconds'] = round(max(age_seconds, 0.0), 1)
+        result['cache_status_class'] = status_class
+        return result
+
+
+def cached_tracking(track):
+    """
+    Decorator for async tracker entry points taking a tracking/PRO number and an optional carrier.
+    
+    Fresh cached results are returned without calling the tracker; new results are cached
+    under the tracker's qualified name, so trackers with different result formats never mix.
+    Concurrent calls for the same shipment, from any session, share one tracker run.
+    Trackers called from inside another cached entry point are not cached separately.
+    """
+    signature = inspect.signature(track)
+    namespace = track.__qualname__
+    
+    @functools.wraps(track)
+    async def wrapper(*args, **kwargs):
+        if _in_cached_call.get():
+            return await track(*args, **kwargs)
+        
+        arguments = signature.bind(*args, **kwargs).arguments
+        tracking_number = arguments.get('tracking_number', arguments.get('pro_number'))
+        carrier = arguments.get('carrier')
+        
+        cached = await tracking_cache.get(namespace, tracking_number, carrier)
+        if cached is not None:
+            logger.info(f"📦 Tracking cache hit for {tracking_number} "
+                        f"({cached['cache_status_class']}, {cached['cache_age_seconds']:.0f}s old)")
+            return cached
+        
+        async def track_and_cache():
+            token = _in_cached_call.set(True)
+            try:
+                result = await track(*args, **kwargs)
+            finally:
+                _in_cached_call.reset(token)
+            return await tracking_cache.put(namespace, tracking_number, carrier, result)
+        
+        # Concurrent requests for the same shipment share one tracking run
+        key = tracking_cache.cache_key(namespace, tracking_number, carrier)
+        result = await tracking_flights.run(key, track_and_cache)
+        return tracking_cache.echo_pro_number(result, tracking_number)
+    
+    return wrapper
+
+
+# Shared by every tracker in the process
+tracking_cache = TrackingResultCache()
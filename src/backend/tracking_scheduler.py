@@ -0,0 +1,121 @@
+"""
+Tracking Scheduler
+
+Runs many tracking requests concurrently without flooding any single carrier.
+Requests are queued per carrier and started round-robin across carriers, bounded
+by a global concurrency cap and a per-carrier cap.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .carrier_detection import carrier_detector
+
+logger = logging.getLogger(__name__)
+
+
+class TrackingScheduler:
+    """
+    Bounded-concurrency scheduler for tracking requests with per-carrier limits.
+    """
+    
+    # Requests in flight across all carriers
+    MAX_CONCURRENCY = 8
+    
+    # Requests in flight against any one carrier, unless overridden in CARRIER_LIMITS
+    PER_CARRIER_LIMIT = 2
+    
+    # Per-carrier overrides, keyed by carrier code
+    CARRIER_LIMITS = {}
+    
+    def __init__(self, max_concurrency: Optional[int] = None, per_carrier_limit: Optional[int] = None,
+                 carrier_limits: Optional[Dict[str, int]] = None):
+        self.max_concurrency = max(1, max_concurrency or self.MAX_CONCURRENCY)
+        self.per_carrier_limit = max(1, per_carrier_limit or self.PER_CARRIER_LIMIT)
+        self.carrier_limits = dict(self.CARRIER_LIMITS)
+        self.carrier_limits.update(carrier_limits or {})
+    
+    def carrier_key(self, tracking_number: str, carrier: Optional[str]) -> str:
+        """
+        Queue a request is placed in: the named carrier, else the carrier detected from the PRO number.
+        """
+        return carrier_detector.carrier_code_for(tracking_number, carrier)
+    
+    def limit_for(self, carrier_key: str) -> int:
+        """Maximum requests in flight for a carrier queue"""
+        return max(1, self.carrier_limits.get(carrier_key, self.per_carrier_limit))
+    
+    async def run(self, jobs: List[Tuple[str, Optional[str]]],
+                  track: Callable[[str, Optional[str]], Awaitable[Any]],
+                  on_complete: Optional[Callable[[int, Any, int], None]] = None) -> List[Any]:
+        """
+        Track every (tracking_number, carrier) job and return the results in input order.
+        
+        Args:
+            jobs: (tracking_number, carrier) pairs; carrier may be None or 'Auto-Detect'
+            track: Coroutine function called as track(tracking_number, carrier)
+            on_complete: Optional callback(job_index, result, completed_count) run as each job finishes
+        
+        Returns:
+            One result per job; a job that raised returns its exception instead
+        """
+        results = [None] * len(jobs)
+        if not jobs:
+            return results
+        
+        # Pending job indexes per carrier, carriers in order of first appearance
+        queues = {}
+        for index, (tracking_number, carrier) in enumerate(jobs):
+            queues.setdefault(self.carrier_key(tracking_number, carrier), deque()).append(index)
+        carriers = list(queues)
+        
+        active = {carrier_key: 0 for carrier_key in carriers}
+        running = {}
+        next_carrier = 0
+        completed = 0
+        
+        logger.info(f"🗓️ Scheduling {len(jobs)} tracking requests across {len(carriers)} carriers "
+                    f"(max {self.max_concurrency} concurrent, {self.per_carrier_limit} per carrier)")
+        
+        try:
+            while completed < len(jobs):
+                # Start jobs round-robin across carriers until the global cap or every carrier cap is reached
+                started = True
+                while started and len(running) < self.max_concurrency:
+                    started = False
+                    for _ in range(len(carriers)):
+                        carrier_key = carriers[next_carrier]
+                        next_carrier = (next_carrier + 1) % len(carriers)
+                        if queues[carrier_key] and active[carrier_key] < self.limit_for(carrier_key):
+                            index = queues[carrier_key].popleft()
+                            tracking_number, carrier = jobs[index]
+                            task = asyncio.ensure_future(track(tracking_number, carrier))
+                            running[task] = (index, carrier_key)
+                            active[carrier_key] += 1
+                            started = True
+                            if len(running) >= self.max_concurrency:
+                                break
+                
+                done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    index, carrier_key = running.pop(task)
+                    active[carrier_key] -= 1
+                    completed += 1
+                    
+                    if task.cancelled():
+                        results[index] = asyncio.CancelledError()
+                    elif task.exception() is not None:
+                        results[index] = task.exception()
+                    else:
+                        results[index] = task.result()
+                    
+                    if on_complete:
+                        on_complete(index, results[index], completed)
+        finally:
+            # Cancelled callers must not leave tracking requests running in the background
+            for task in running:
+                task.cancel()
+        
+        return results
@@ -36,6 +36,11 @@ except ImportError:
     ENHANCED_AVAILABLE = False
     EnhancedLTLTrackingClient = None
 
+from .carrier_detection import validate_pro_for_tracking
+from .tracking_scheduler import TrackingScheduler
+from .rate_limiter import install_rate_limiter, rate_limiter
+from .tracking_cache import cached_tracking
+
 # Import requests for HTTP fallback
 import requests
 from curl_cffi import requests as cf_requests
@@ -90,7 +95,7 @@ class WorkingTrackingSystem:
     def setup_http_sessions(self):
         """Setup HTTP sessions with anti-detection measures"""
         # Standard requests session
-        self.session = requests.Session()
+        self.session = install_rate_limiter(requests.Session())
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -146,12 +151,26 @@ class WorkingTrackingSystem:
         
         return 'unknown'
     
+    @cached_tracking
     async def track_shipment(self, tracking_number: str, carrier: str = None) -> Dict[str, Any]:
         """
         Track a single shipment using all available barrier-breaking techniques
         """
         start_time = time.time()
         
+        # Reject provably invalid PROs before any request is made
+        is_valid, validation_error = validate_pro_for_tracking(tracking_number, carrier)
+        if not is_valid:
+            logger.warning(f"❌ Not tracking {tracking_number}: {validation_error}")
+            return {
+                'success': False,
+                'error': validation_error,
+                'tracking_number': tracking_number,
+                'carrier': carrier or 'Unknown',
+                'timestamp': time.time(),
+                'processing_time': time.time() - start_time
+            }
+        
         try:
             # Detect carrier if not provided
             if not carrier:
@@ -174,9 +193,9 @@ class WorkingTrackingSystem:
                 # Try all methods for unknown carriers
                 result = await self._track_unknown_carrier(tracking_number)
             
-            # Add metadata
+            # Add metadata; unknown-carrier probes report the carrier that actually returned data
             result['tracking_number'] = tracking_number
-            result['carrier'] = carrier
+            result['carrier'] = result.get('detected_carrier', carrier)
             result['timestamp'] = time.time()
             result['processing_time'] = time.time() - start_time
             result['environment'] = 'cloud' if self.is_cloud else 'local'
@@ -348,6 +367,9 @@ class WorkingTrackingSystem:
                 
                 for endpoint in endpoints:
                     try:
+                        # curl_cffi sessions have no transport adapters, so pace them directly
+                        rate_limiter.wait_sync(endpoint)
+                        
                         if 'api.fedex.com' in endpoint:
                             # API call
                             response = self.cf_session.post(endpoint, json={
@@ -680,14 +702,11 @@ class WorkingTrackingSystem:
         
         start_time = time.time()
         
-        # Track all shipments concurrently
-        tasks = []
-        for tracking_number in tracking_numbers:
-            task = asyncio.create_task(self.track_shipment(tracking_number))
-            tasks.append(task)
-        
-        # Wait for all tasks to complete
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Track concurrently, capped overall and per carrier so no carrier is flooded
+        results = await TrackingScheduler().run(
+            [(tracking_number, None) for tracking_number in tracking_numbers],
+            self.track_shipment
+        )
         
         # Process results
         successful_tracks = 0
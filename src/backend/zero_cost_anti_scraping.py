@@ -24,6 +24,8 @@ from urllib.parse import urljoin, urlparse
 
 from bs4 import BeautifulSoup
 
+from .rate_limiter import install_rate_limiter
+
 # Optional imports with fallbacks
 try:
     import socks
@@ -195,7 +197,7 @@ class TorRotationManager:
         try:
             if not TOR_AVAILABLE:
                 self.logger.warning("TOR not available - install stem for IP rotation")
-                self.session = requests.Session()  # Use regular session
+                self.session = install_rate_limiter(requests.Session())  # Use regular session
                 return
             
             # Test if TOR is actually running
@@ -206,11 +208,11 @@ class TorRotationManager:
             
             if not tor_running:
                 self.logger.warning("TOR not running - using regular session")
-                self.session = requests.Session()
+                self.session = install_rate_limiter(requests.Session())
                 return
             
             # Create session with TOR proxy
-            self.session = requests.Session()
+            self.session = install_rate_limiter(requests.Session())
             self.session.proxies = {
                 'http': f'socks5://127.0.0.1:{self.tor_port}',
                 'https': f'socks5://127.0.0.1:{self.tor_port}'
@@ -223,7 +225,7 @@ class TorRotationManager:
             
         except Exception as e:
             self.logger.debug(f"TOR setup failed: {e}")
-            self.session = requests.Session()  # Fallback to regular session
+            self.session = install_rate_limiter(requests.Session())  # Fallback to regular session
     
     def get_new_ip(self) -> bool:
         """Request new IP address through TOR"""
@@ -495,7 +497,7 @@ class ZeroCostAntiScrapingSystem:
         if self.tor_manager.session:
             session = self.tor_manager.session
         else:
-            session = requests.Session()
+            session = install_rate_limiter(requests.Session())
         
         # Configure headers based on fingerprint
         session.headers.update({
@@ -537,12 +539,6 @@ class ZeroCostAntiScrapingSystem:
         # Fallback to requests-html
         return self.browser_manager.execute_javascript_requests_html(url)
     
-    def simulate_human_behavior(self, min_delay: float = 1.0, max_delay: float = 5.0):
-        """Simulate human browsing behavior"""
-        # Random delay to simulate reading time
-        delay = random.uniform(min_delay, max_delay)
-        time.sleep(delay)
-    
     def warm_session(self, session: requests.Session, domain: str) -> bool:
         """Warm up session by visiting related pages"""
         try:
@@ -553,15 +549,12 @@ class ZeroCostAntiScrapingSystem:
             if response.status_code != 200:
                 return False
             
-            self.simulate_human_behavior(1, 3)
-            
             # Visit common pages
             common_paths = ['/about', '/services', '/contact']
             for path in random.sample(common_paths, 2):
                 try:
                     url = urljoin(homepage, path)
                     session.get(url, timeout=10)
-                    self.simulate_human_behavior(0.5, 2)
                 except:
                     continue
             
@@ -12,13 +12,15 @@ import logging
 import random
 import re
 import requests
-import time
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Any, Tuple
 from urllib.parse import urljoin, urlparse
 
 from bs4 import BeautifulSoup
 
+from .rate_limiter import install_rate_limiter
+from .tracking_cache import cached_tracking
+
 
 @dataclass
 class BasicFingerprint:
@@ -70,7 +72,7 @@ class BasicAntiScrapingSystem:
         """Create basic stealth session"""
         fingerprint = self.fingerprint_gen.generate_fingerprint()
         
-        session = requests.Session()
+        session = install_rate_limiter(requests.Session())
         
         # Configure headers based on fingerprint
         session.headers.update({
@@ -92,11 +94,6 @@ class BasicAntiScrapingSystem:
         
         return session
     
-    def simulate_human_behavior(self, min_delay: float = 1.0, max_delay: float = 5.0):
-        """Simulate human browsing behavior"""
-        delay = random.uniform(min_delay, max_delay)
-        time.sleep(delay)
-    
     def warm_session(self, session: requests.Session, domain: str) -> bool:
         """Warm up session by visiting related pages"""
         try:
@@ -107,8 +104,6 @@ class BasicAntiScrapingSystem:
             if response.status_code != 200:
                 return False
             
-            self.simulate_human_behavior(1, 3)
-            
             return True
             
         except Exception as e:
@@ -236,8 +231,6 @@ class BasicPeninsulaTracker:
                         tracking_info = self._extract_from_html(soup, pro_number)
                         if tracking_info:
                             return tracking_info
-                            
-                    self.anti_scraping.simulate_human_behavior(0.5, 2)
                     
                 except requests.RequestException:
                     continue
@@ -302,6 +295,7 @@ class BasicCarrierManager:
         self.anti_scraping = BasicAntiScrapingSystem()
         self.peninsula_tracker = BasicPeninsulaTracker(self.anti_scraping)
     
+    @cached_tracking
     async def track_shipment(self, carrier: str, pro_number: str) -> Dict[str, Any]:
         """Track shipment using basic tracker"""
         try:
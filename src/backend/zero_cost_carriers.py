@@ -5,7 +5,6 @@ Zero-Cost Carrier-Specific Implementations
 Advanced scraping techniques for Peninsula, FedEx, and Estes without external costs.
 """
 
-import asyncio
 import json
 import logging
 import re
@@ -18,6 +17,7 @@ import requests
 from bs4 import BeautifulSoup
 
 from .zero_cost_anti_scraping import ZeroCostAntiScrapingSystem
+from .tracking_cache import cached_tracking
 
 
 class PeninsulaZeroCostTracker:
@@ -207,8 +207,6 @@ class PeninsulaZeroCostTracker:
                             if tracking_info:
                                 return tracking_info
                     
-                    self.anti_scraping.simulate_human_behavior(0.5, 2)
-                    
                 except requests.RequestException:
                     continue
             
@@ -591,9 +589,6 @@ class FedExZeroCostTracker:
                             if tracking_info:
                                 return tracking_info
                     
-                    # Small delay between attempts
-                    await asyncio.sleep(0.5)
-                    
                 except requests.RequestException:
                     continue
             
@@ -913,9 +908,6 @@ class EstesZeroCostTracker:
                             except json.JSONDecodeError:
                                 pass
                     
-                    # Small delay between attempts
-                    await asyncio.sleep(0.5)
-                    
                 except requests.RequestException:
                     continue
             
@@ -1203,6 +1195,7 @@ class ZeroCostCarrierManager:
         self.fedex_tracker = FedExZeroCostTracker(self.anti_scraping)
         self.estes_tracker = EstesZeroCostTracker(self.anti_scraping)
     
+    @cached_tracking
     async def track_shipment(self, carrier: str, pro_number: str) -> Dict[str, Any]:
         """Track shipment using appropriate zero-cost tracker"""
         try:
@@ -16,6 +16,9 @@ try:
     from src.backend.database import DatabaseManager
     from src.backend.api_client import LoadsAPIClient
     from src.backend.data_processor import DataProcessor
+    from src.backend.tracking_scheduler import TrackingScheduler
+    from src.backend.tracking_cache import tracking_cache
+    from src.backend.strategy_scorer import strategy_scorer
 except ImportError as e:
     st.error(f"❌ Backend module import error: {e}")
     st.info("Please check that all backend modules are properly installed.")
@@ -46,7 +49,9 @@ try:
         create_learning_analytics_dashboard,
         update_learning_with_processing_results,
         get_full_api_schema,
-        create_external_integrations_interface
+        create_external_integrations_interface,
+        render_paginated_table,
+        render_error_search
     )
 except ImportError as e:
     st.error(f"❌ UI components import error: {e}")
@@ -234,8 +239,19 @@ def normalize_column_names(df):
     df.columns = df.columns.str.strip().str.replace(' ', '_').str.lower()
     return df
 
-def init_components():
+@st.cache_resource
+def get_db_manager():
+    """Shared DatabaseManager for every session; connections stay per-thread inside it"""
     db_manager = DatabaseManager()
+    
+    # Tracking cache entries and strategy scores persist through the same database and write-behind queue
+    tracking_cache.configure(db_manager)
+    strategy_scorer.configure(db_manager)
+    
+    return db_manager
+
+def init_components():
+    db_manager = get_db_manager()
     data_processor = DataProcessor()
     return db_manager, data_processor
 
@@ -1048,12 +1064,15 @@ def _render_advanced_info(db_manager):
     try:
         configurations = db_manager.get_brokerage_configurations(brokerage_name)
         recent_uploads = db_manager.get_brokerage_upload_history(brokerage_name, limit=5)
+        upload_summary = db_manager.get_upload_summary(brokerage_name, days_back=30)
         
-        col1, col2 = st.columns(2)
+        col1, col2, col3 = st.columns(3)
         with col1:
             st.metric("⚙️ Configurations", len(configurations))
         with col2:
-            st.metric("📤 Recent Uploads", len(recent_uploads))
+            st.metric("📤 Uploads (30d)", upload_summary['uploads'])
+        with col3:
+            st.metric("📈 Success (30d)", f"{upload_summary['success_rate']:.1%}")
         
         # Recent activity (only if exists)
         if recent_uploads:
@@ -1063,6 +1082,33 @@ def _render_advanced_info(db_manager):
                 icon = "✅" if success_rate > 90 else "⚠️" if success_rate > 50 else "❌"
                 date_str = upload[11][:10] if len(upload) > 11 else "Unknown"
                 st.caption(f"{icon} {upload[4]} records • {success_rate:.1f}% success • {date_str}")
+            
+            with st.expander("📜 Upload History"):
+                render_paginated_table(
+                    f"upload_history_{brokerage_name}",
+                    lambda after, page_size: db_manager.get_upload_history_page(
+                        brokerage_name, after=after, page_size=page_size
+                    ),
+                    ['ID', 'Brokerage', 'Configuration', 'File', 'Total', 'Successful', 'Failed',
+                     'Time (s)', 'Uploaded', 'Errors']
+                )
+            
+            with st.expander("🚚 Tracking Results"):
+                upload_labels = {upload[0]: f"#{upload[0]} • {upload[3]} • {str(upload[10])[:16]}"
+                                 for upload in recent_uploads}
+                upload_id = st.selectbox("Upload", list(upload_labels), format_func=upload_labels.get,
+                                         key=f"tracking_results_upload_{brokerage_name}")
+                render_paginated_table(
+                    f"tracking_results_{upload_id}",
+                    lambda after, page_size: db_manager.get_tracking_results_page(
+                        upload_id, after=after, page_size=page_size
+                    ),
+                    ['PRO Number', 'Carrier', 'Load ID', 'Request Status', 'Tracking Status', 'Location',
+                     'Event', 'Timestamp', 'Success', 'Error']
+                )
+            
+            with st.expander("🔎 Search Errors"):
+                render_error_search(db_manager, brokerage_name, key=f"error_search_{brokerage_name}")
         
     except Exception as e:
         st.error("Unable to load analytics data")
@@ -1458,8 +1504,7 @@ def _validate_headers_with_config(file_headers):
         if has_real_mappings:
             # Validate headers against saved config
             from src.frontend.ui_components import create_header_validation_interface
-            from src.backend.database import DatabaseManager
-            db_manager = DatabaseManager()
+            db_manager = get_db_manager()
             header_comparison = create_header_validation_interface(
                 file_headers, db_manager, brokerage_name, config['name']
             )
@@ -2244,7 +2289,7 @@ def process_data_enhanced(df, field_mappings, api_credentials, brokerage_name, d
         update_progress("Tracking PRO numbers", 6, "Fetching latest tracking information...")
         
         # Identify PRO numbers for tracking
-        pro_numbers = data_processor.identify_pro_numbers(df, field_mappings)
+        pro_numbers = data_processor.identify_pro_numbers(df, field_mappings, db_manager, brokerage_name)
         tracking_results = []
         
         if pro_numbers:
@@ -2283,17 +2328,28 @@ def process_data_enhanced(df, field_mappings, api_credentials, brokerage_name, d
                 
                 # Create async function to handle tracking
                 async def track_all_pros():
-                    results = []
-                    for i, pro_info in enumerate(pro_numbers):
-                        # Update progress
-                        tracking_progress.progress(int((i / len(pro_numbers)) * 100))
-                        tracking_status.text(f"Tracking PRO {i+1}/{len(pro_numbers)}: {pro_info['pro_number']}")
-                        
+                    # Convert to legacy format for compatibility
+                    class TrackingResult:
+                        def __init__(self, result_dict, use_barrier_breaking):
+                            # Cloud-native system format
+                            self.pro_number = result_dict.get('tracking_number', pro_info['pro_number'])
+                            self.carrier_name = result_dict.get('carrier', 'Unknown')
+                            self.tracking_status = result_dict.get('status', 'No status available')
+                            self.tracking_location = result_dict.get('location', 'No location available')
+                            self.tracking_event = result_dict.get('events', [''])[0] if result_dict.get('events') else ''
+                            self.tracking_timestamp = result_dict.get('timestamp', 'No timestamp available')
+                            self.scrape_success = result_dict.get('success', False)
+                            self.error_message = result_dict.get('error', '') if not self.scrape_success else ''
+                            self.scraped_data = result_dict
+                            # Additional attributes for load tracking
+                            self.load_id = None
+                            self.row_index = None
+                    
+                    async def track_one(pro_number, carrier):
                         # Track the PRO number using cloud-native system
                         try:
                             # Use async method with proper carrier detection
-                            carrier = pro_info.get('carrier', 'unknown')
-                            result_dict = await tracking_client.track_shipment(pro_info['pro_number'], carrier)
+                            result_dict = await tracking_client.track_shipment(pro_number, carrier)
                             
                             # Add debug info to identify which system is being used
                             if not result_dict.get('method'):
@@ -2303,36 +2359,50 @@ def process_data_enhanced(df, field_mappings, api_credentials, brokerage_name, d
                             # Fallback error handling
                             result_dict = {
                                 'success': False,
-                                'tracking_number': pro_info['pro_number'],
+                                'tracking_number': pro_number,
                                 'carrier': carrier,
                                 'error': f'Tracking method failed: {str(e)}',
                                 'method': 'fallback_error'
                             }
-                        
-                        # Convert to legacy format for compatibility
-                        class TrackingResult:
-                            def __init__(self, result_dict, use_barrier_breaking):
-                                # Cloud-native system format
-                                self.pro_number = result_dict.get('tracking_number', pro_info['pro_number'])
-                                self.carrier_name = result_dict.get('carrier', 'Unknown')
-                                self.tracking_status = result_dict.get('status', 'No status available')
-                                self.tracking_location = result_dict.get('location', 'No location available')
-                                self.tracking_event = result_dict.get('events', [''])[0] if result_dict.get('events') else ''
-                                self.tracking_timestamp = result_dict.get('timestamp', 'No timestamp available')
-                                self.scrape_success = result_dict.get('success', False)
-                                self.error_message = result_dict.get('error', '') if not self.scrape_success else ''
-                                self.scraped_data = result_dict
-                                # Additional attributes for load tracking
-                                self.load_id = None
-                                self.row_index = None
-                        
+                        return result_dict
+                    
+                    # PROs that fail their carrier check digit never reach the network
+                    result_dicts = [None] * len(pro_numbers)
+                    to_track = []
+                    for i, pro_info in enumerate(pro_numbers):
+                        if pro_info.get('validation_error'):
+                            result_dicts[i] = {
+                                'success': False,
+                                'tracking_number': pro_info['pro_number'],
+                                'carrier': pro_info.get('carrier_name', 'Unknown'),
+                                'error': pro_info['validation_error'],
+                                'method': 'pro_validation'
+                            }
+                        else:
+                            to_track.append(i)
+                    skipped = len(pro_numbers) - len(to_track)
+                    
+                    def show_progress(job_index, result_dict, completed):
+                        done = skipped + completed
+                        tracking_progress.progress(int((done / len(pro_numbers)) * 100))
+                        tracking_status.text(f"Tracked PRO {done}/{len(pro_numbers)}: {pro_numbers[to_track[job_index]]['pro_number']}")
+                    
+                    # Track concurrently, capped overall and per carrier so no carrier is flooded
+                    scheduler = TrackingScheduler()
+                    tracked = await scheduler.run(
+                        [(pro_numbers[i]['pro_number'], pro_numbers[i].get('carrier_name', 'unknown')) for i in to_track],
+                        track_one,
+                        on_complete=show_progress
+                    )
+                    for i, result_dict in zip(to_track, tracked):
+                        result_dicts[i] = result_dict
+                    
+                    results = []
+                    for pro_info, result_dict in zip(pro_numbers, result_dicts):
                         result = TrackingResult(result_dict, use_barrier_breaking)
                         result.load_id = pro_info['load_id']
                         result.row_index = pro_info['row_index']
                         results.append(result)
-                        
-                        # Small delay to avoid overwhelming carriers
-                        await asyncio.sleep(0.5)
                     
                     return results
                 
@@ -2382,30 +2452,20 @@ def process_data_enhanced(df, field_mappings, api_credentials, brokerage_name, d
                 session_id=session_id
             )
             
-            # Save detailed errors for troubleshooting
+            # Save detailed errors and tracking results through the write-behind queue
+            write_queue = db_manager.get_write_queue()
+            pending_writes = []
             if detailed_errors:
-                db_manager.save_processing_errors(upload_id, detailed_errors)
-            
-            # Save tracking results to database
+                pending_writes.append(('error details', write_queue.submit('save_processing_errors', upload_id, detailed_errors)))
             if tracking_results:
-                for result in tracking_results:
-                    # Save tracking request
-                    tracking_request_id = db_manager.save_tracking_request(
-                        upload_id, result.pro_number, result.carrier_name, result.load_id
-                    )
-                    
-                    # Save tracking result
-                    if tracking_request_id:
-                        db_manager.save_tracking_result(
-                            tracking_request_id=tracking_request_id,
-                            tracking_status=result.tracking_status,
-                            tracking_location=result.tracking_location,
-                            tracking_event=result.tracking_event,
-                            tracking_timestamp=result.tracking_timestamp,
-                            scraped_data=result.scraped_data,
-                            scrape_success=result.scrape_success,
-                            error_message=result.error_message
-                                                 )
+                pending_writes.append(('tracking results', write_queue.submit('save_tracking_batch', upload_id, tracking_results)))
+
+            # The output file reads the tracking results back, so they must be committed first
+            for description, write in pending_writes:
+                try:
+                    write.result()
+                except Exception as e:
+                    st.error(f"❌ Failed to save {description}: {str(e)}")
             
             # Generate enhanced output file
             try:
@@ -2828,8 +2888,7 @@ def render_database_management_section():
     st.markdown("**💾 Database Management**")
     
     # Check if database has data
-    from src.backend.database import DatabaseManager
-    db_manager = DatabaseManager()
+    db_manager = get_db_manager()
     stats = db_manager.get_database_stats()
     
     # Check if database has any data (including brokerage configurations)
@@ -2889,8 +2948,7 @@ def render_database_management_section():
 
 def create_database_backup():
     """Create comprehensive database backup"""
-    from src.backend.database import DatabaseManager
-    db_manager = DatabaseManager()
+    db_manager = get_db_manager()
     
     backup_data = {
         'backup_info': {
@@ -2968,8 +3026,7 @@ def restore_database_from_backup(uploaded_file):
         if not all(key in backup_data for key in required_keys):
             return {'success': False, 'error': 'Invalid backup file format'}
         
-        from src.backend.database import DatabaseManager
-        db_manager = DatabaseManager()
+        db_manager = get_db_manager()
         
         # Restore configurations
         restored_configs = 0
@@ -3129,8 +3186,7 @@ def auto_backup_suggestion():
         hours_running = (datetime.now() - container_start_time).total_seconds() / 3600
     
     # Calculate database stats for risk assessment
-    from src.backend.database import DatabaseManager
-    db_manager = DatabaseManager()
+    db_manager = get_db_manager()
     stats = db_manager.get_database_stats()
     total_data_points = (stats['customer_mappings'] + 
                         stats['upload_history'] + 
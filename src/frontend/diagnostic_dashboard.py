@@ -25,14 +25,22 @@ try:
 except ImportError:
     DIAGNOSTICS_AVAILABLE = False
 
+try:
+    from ..backend.database import DatabaseManager
+    DATABASE_AVAILABLE = True
+except ImportError:
+    DATABASE_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 
 class DiagnosticDashboard:
     """Main diagnostic dashboard class"""
     
-    def __init__(self):
+    def __init__(self, db_manager=None):
         self.carriers = ['fedex', 'estes', 'peninsula', 'rl']
+        # The app's DatabaseManager; the process-wide cached one is used when none is given
+        self.db_manager = db_manager
         self.diagnostic_cache = {}
         self.last_diagnostic_run = None
         
@@ -53,7 +61,8 @@ class DiagnosticDashboard:
             "📄 Content Analysis",
             "🔧 Failure Analysis",
             "🚀 Alternative Methods",
-            "📈 Performance Metrics"
+            "📈 Performance Metrics",
+            "🗄️ Database Performance"
         ])
         
         with tabs[0]:
@@ -73,6 +82,9 @@ class DiagnosticDashboard:
         
         with tabs[5]:
             self._render_performance_metrics()
+        
+        with tabs[6]:
+            self._render_database_performance()
     
     def _render_system_overview(self):
         """Render system overview tab"""
@@ -704,10 +716,79 @@ class DiagnosticDashboard:
         with col4:
             st.metric("System Health", "Critical", "Immediate Action Required")
 
+    
+    def _render_database_performance(self):
+        """Render database query timings and the slow query log"""
+        st.subheader("🗄️ Database Query Performance")
+        
+        if not DATABASE_AVAILABLE:
+            st.warning("Database module not available.")
+            return
+        
+        db_manager = self.db_manager or _get_db_manager()
+        query_stats = db_manager.get_query_stats()
+        
+        if not query_stats:
+            st.info("No database activity recorded in this process yet.")
+            return
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric("DB Calls", sum(stats['calls'] for stats in query_stats))
+        
+        with col2:
+            st.metric("Total DB Time", f"{sum(stats['total_ms'] for stats in query_stats) / 1000:.2f}s")
+        
+        with col3:
+            st.metric("Lock Wait", f"{sum(stats['lock_wait_ms'] for stats in query_stats):.0f}ms")
+        
+        with col4:
+            st.metric("Rows Written", sum(stats['rows_written'] for stats in query_stats))
+        
+        # Per-method breakdown
+        st.subheader("⏱️ Time by Method")
+        
+        stats_df = pd.DataFrame(query_stats)
+        fig = px.bar(
+            stats_df.head(15),
+            x='method',
+            y='total_ms',
+            title="Total Database Time by Method",
+            labels={'total_ms': 'Total Time (ms)', 'method': 'Method'}
+        )
+        
+        st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(stats_df, use_container_width=True, hide_index=True)
+        
+        # Slow query log
+        st.subheader(f"🐢 Slow Queries (≥ {db_manager.SLOW_QUERY_MS}ms)")
+        
+        slow_queries = db_manager.get_slow_queries()
+        if not slow_queries:
+            st.success("No slow queries recorded.")
+        
+        for query in slow_queries[:20]:
+            with st.expander(f"{query['method']} • {query['duration_ms']}ms • {query['timestamp'][:19]}"):
+                st.code(query['sql'], language='sql')
+                if query['plan']:
+                    st.caption("Query plan")
+                    st.code('\n'.join(query['plan']))
+        
+        if st.button("🔄 Reset Statistics"):
+            db_manager.reset_query_stats()
+            st.rerun()
+
+
+@st.cache_resource
+def _get_db_manager():
+    """DatabaseManager shared across reruns when the dashboard is not given the app's own"""
+    return DatabaseManager()
+
 
-def create_diagnostic_dashboard():
+def create_diagnostic_dashboard(db_manager=None):
     """Create and render the diagnostic dashboard"""
-    dashboard = DiagnosticDashboard()
+    dashboard = DiagnosticDashboard(db_manager)
     dashboard.render_dashboard()
 
 
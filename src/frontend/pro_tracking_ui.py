@@ -33,6 +33,7 @@ except ImportError:
     LTLTrackingClient = None
 
 from ..backend.carrier_detection import detect_carrier_from_pro
+from ..backend.tracking_scheduler import TrackingScheduler
 
 
 def create_pro_tracking_interface(db_manager, brokerage_name: str):
@@ -687,13 +688,7 @@ def _process_pro_tracking(df: pd.DataFrame, mappings: Dict[str, str]):
         
         # Create async function to handle tracking
         async def track_all_pros():
-            results = []
-            for i, (pro_number, carrier_name) in enumerate(zip(pro_numbers, carriers)):
-                # Update progress
-                progress = (i / len(pro_numbers))
-                progress_bar.progress(progress)
-                status_text.text(f"Tracking PRO {i+1}/{len(pro_numbers)}: {pro_number}")
-                
+            async def track_one(pro_number, carrier_name):
                 # Track the PRO using appropriate system
                 try:
                     result_dict = None
@@ -773,16 +768,24 @@ def _process_pro_tracking(df: pd.DataFrame, mappings: Dict[str, str]):
                         'barrier_solved': ''
                     }
                 
-                results.append(result)
-                
-                # Update live results display
-                _update_live_results(live_results_placeholder, results, i + 1, len(pro_numbers))
-                
-                # Small delay between requests
-                if i < len(pro_numbers) - 1:  # Don't delay after the last request
-                    await asyncio.sleep(0.5)  # Additional small delay for UI responsiveness
+                return result
             
-            return results
+            completed_results = []
+            
+            def show_progress(index, result, completed):
+                # Update progress and live results as each PRO finishes
+                progress_bar.progress(completed / len(pro_numbers))
+                status_text.text(f"Tracked PRO {completed}/{len(pro_numbers)}: {pro_numbers[index]}")
+                completed_results.append(result)
+                _update_live_results(live_results_placeholder, completed_results, completed, len(pro_numbers))
+            
+            # Track concurrently, capped overall and per carrier so no carrier is flooded
+            scheduler = TrackingScheduler()
+            return await scheduler.run(
+                list(zip(pro_numbers, carriers)),
+                track_one,
+                on_complete=show_progress
+            )
         
         # Run the async tracking
         results = asyncio.run(track_all_pros())
@@ -727,6 +727,63 @@ def create_company_settings_card(customer_name: str, last_used: Optional[str] =
         st.write(f"{last_used_text} • {fields_mapped} fields mapped")
         st.divider()
 
+def render_paginated_table(key: str, fetch_page, columns: List[str], page_size: int = 50):
+    """Render a table one keyset page at a time.
+    
+    fetch_page(after, page_size) must return (rows, next_cursor) as the DatabaseManager
+    *_page methods do. Cursors of visited pages are kept in session state under ``key``.
+    """
+    state_key = f"{key}_page_cursors"
+    if state_key not in st.session_state:
+        st.session_state[state_key] = [None]
+    cursors = st.session_state[state_key]
+    
+    rows, next_cursor = fetch_page(cursors[-1], page_size)
+    if not rows and len(cursors) == 1:
+        st.info("No records found.")
+        return
+    
+    st.dataframe(pd.DataFrame(rows, columns=columns), use_container_width=True, hide_index=True)
+    
+    col1, col2, col3 = st.columns([1, 1, 3])
+    with col1:
+        if st.button("◀ Previous", key=f"{key}_previous", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        if st.button("Next ▶", key=f"{key}_next", disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.rerun()
+    with col3:
+        st.caption(f"Page {len(cursors)}")
+
+def render_error_search(db_manager, brokerage_name: Optional[str] = None, key: str = "error_search"):
+    """Render a search box over processing errors, tracking failures and upload error logs"""
+    col1, col2 = st.columns([3, 2])
+    with col1:
+        query = st.text_input("🔎 Search errors", key=f"{key}_query",
+                              placeholder="Error text, original value, PRO number or filename")
+    with col2:
+        date_range = st.date_input("Date range", value=(), key=f"{key}_dates")
+    
+    if not query:
+        return
+    
+    start = date_range[0] if len(date_range) > 0 else None
+    end = date_range[1] if len(date_range) > 1 else start
+    results = db_manager.search_errors(query, brokerage=brokerage_name,
+                                       date_range=(start, end) if start else None)
+    
+    if not results:
+        st.info("No matching errors found.")
+        return
+    
+    st.caption(f"{len(results)} matches")
+    results_df = pd.DataFrame(results)[['created_at', 'source', 'filename', 'pro_number', 'field_name',
+                                        'original_value', 'snippet']]
+    results_df.columns = ['When', 'Source', 'File', 'PRO', 'Field', 'Original Value', 'Match']
+    st.dataframe(results_df, use_container_width=True, hide_index=True)
+
 def show_tooltip(text: str, tooltip: str):
     """Show text with a tooltip with fallback"""
     try:
@@ -2740,45 +2797,35 @@ def _render_integration_history(db_manager, brokerage_name, integrations):
     
     if selected_integration_name:
         integration_id = integration_names[selected_integration_name]
-        history = db_manager.get_integration_execution_history(integration_id)
+        stats = db_manager.get_integration_execution_stats(integration_id)
         
-        if history:
-            # Create a DataFrame for better display
-            history_df = pd.DataFrame(history)
-            
-            # Format the DataFrame
-            history_df['execution_timestamp'] = pd.to_datetime(history_df['execution_timestamp'])
-            history_df['success_rate'] = (history_df['records_success'] / history_df['records_processed'] * 100).round(2)
-            
+        if stats['total_executions']:
             # Display summary metrics
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
-                total_executions = len(history)
-                st.metric("Total Executions", total_executions)
+                st.metric("Total Executions", stats['total_executions'])
             
             with col2:
-                successful_executions = len([h for h in history if h['execution_status'] == 'SUCCESS'])
-                success_rate = (successful_executions / total_executions * 100) if total_executions > 0 else 0
+                success_rate = stats['successful_executions'] / stats['total_executions'] * 100
                 st.metric("Success Rate", f"{success_rate:.1f}%")
             
             with col3:
-                total_records = sum(h['records_processed'] for h in history)
-                st.metric("Total Records", total_records)
+                st.metric("Total Records", stats['total_records'])
             
             with col4:
-                avg_time = sum(h['execution_time_seconds'] for h in history) / len(history) if history else 0
-                st.metric("Avg Time", f"{avg_time:.2f}s")
+                st.metric("Avg Time", f"{stats['avg_execution_time']:.2f}s")
             
-            # Display detailed history
+            # Display detailed history a page at a time
             st.subheader("Execution Details")
             
-            # Format for display
-            display_columns = ['execution_timestamp', 'execution_status', 'records_processed', 'records_success', 'records_failed', 'execution_time_seconds']
-            display_df = history_df[display_columns].copy()
-            display_df.columns = ['Timestamp', 'Status', 'Processed', 'Success', 'Failed', 'Time (s)']
-            
-            st.dataframe(display_df, use_container_width=True)
+            render_paginated_table(
+                f"integration_history_{integration_id}",
+                lambda after, page_size: db_manager.get_integration_execution_history_page(
+                    integration_id, after=after, page_size=page_size
+                ),
+                ['ID', 'Timestamp', 'Status', 'Processed', 'Success', 'Failed', 'Time (s)']
+            )
             
         else:
             st.info("No execution history found for this integration.")
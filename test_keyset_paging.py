@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Keyset Paging Test
+
+Pages upload history and tracking results from a throwaway database and checks that
+every row is returned exactly once, in order, whatever the page size.
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.backend.database import DatabaseManager
+
+
+def _make_db():
+    return DatabaseManager(os.path.join(tempfile.mkdtemp(), 'paging.db'))
+
+
+def _all_pages(fetch_page, page_size):
+    """Follow next_cursor from the first page to the last, returning the pages"""
+    pages = []
+    after = None
+    while True:
+        rows, after = fetch_page(after, page_size)
+        pages.append(rows)
+        if after is None:
+            return pages
+
+
+def test_tracking_results_pages():
+    """Tracking results come back ordered by PRO number, ties broken by request, without gaps or repeats"""
+    db_manager = _make_db()
+    upload_id = db_manager.save_upload_history_enhanced('Paging', 'config', 'paging.csv', 7, 7, 0, '[]', 1.0, [], 's')
+    other_id = db_manager.save_upload_history_enhanced('Paging', 'config', 'other.csv', 1, 1, 0, '[]', 1.0, [], 's')
+    
+    # Duplicate PROs must not be lost or repeated at a page boundary
+    pro_numbers = ['3000003', '1000001', '2000002', '2000002', '2000002', '5000005', '4000004']
+    db_manager.save_tracking_batch(upload_id, [
+        {'pro_number': pro_number, 'carrier_name': 'Estes', 'load_id': f"L{i}",
+         'tracking_status': 'Delivered', 'scrape_success': True}
+        for i, pro_number in enumerate(pro_numbers)
+    ])
+    db_manager.save_tracking_batch(other_id, [{'pro_number': '0000000', 'scrape_success': False,
+                                               'error_message': 'not found'}])
+    
+    for page_size in (1, 2, 3, 7, 100):
+        pages = _all_pages(lambda after, size: db_manager.get_tracking_results_page(upload_id, after, size), page_size)
+        rows = [row for page in pages for row in page]
+        
+        assert all(len(page) <= page_size for page in pages), page_size
+        assert [row[0] for row in rows] == sorted(pro_numbers), page_size
+        assert sorted(row[2] for row in rows) == sorted(f"L{i}" for i in range(len(pro_numbers))), page_size
+        assert len(rows[0]) == 10
+    
+    rows, next_cursor = db_manager.get_tracking_results_page(other_id)
+    assert next_cursor is None
+    assert rows == [('0000000', None, None, 'failed', None, None, None, None, 0, 'not found')]
+    
+    # A request re-tracked later has a second result; both rows survive any page boundary
+    saved = db_manager.save_tracking_batch(other_id, [
+        {'pro_number': '6000006', 'tracking_status': 'In Transit', 'scrape_success': True},
+        {'pro_number': '7000007', 'tracking_status': 'In Transit', 'scrape_success': True},
+    ])
+    for _, request_id, _ in saved:
+        db_manager.save_tracking_result(request_id, tracking_status='Delivered')
+    # A request not tracked yet has no result at all
+    db_manager.save_tracking_request(other_id, '6500006')
+    for page_size in (1, 2, 3, 100):
+        pages = _all_pages(lambda after, size: db_manager.get_tracking_results_page(other_id, after, size), page_size)
+        rows = [(row[0], row[4]) for page in pages for row in page]
+        assert rows == [('0000000', None), ('6000006', 'In Transit'), ('6000006', 'Delivered'), ('6500006', None),
+                        ('7000007', 'In Transit'), ('7000007', 'Delivered')], page_size
+
+
+def test_upload_history_pages():
+    """Upload history pages newest first and stays stable when uploads arrive between pages"""
+    db_manager = _make_db()
+    upload_ids = [
+        db_manager.save_upload_history_enhanced('Paging', 'config', f"upload_{i}.csv", 1, 1, 0, '[]', 1.0, [], 's')
+        for i in range(5)
+    ]
+    db_manager.save_upload_history_enhanced('Elsewhere', 'config', 'other.csv', 1, 1, 0, '[]', 1.0, [], 's')
+    
+    rows, after = db_manager.get_upload_history_page('Paging', page_size=2)
+    
+    # A newer upload must not shift the rows of the pages that follow
+    db_manager.save_upload_history_enhanced('Paging', 'config', 'late.csv', 1, 1, 0, '[]', 1.0, [], 's')
+    while after is not None:
+        page, after = db_manager.get_upload_history_page('Paging', after, 2)
+        rows += page
+    
+    assert [row[0] for row in rows] == list(reversed(upload_ids))
+    assert all(row[1] == 'Paging' for row in rows)
+
+
+if __name__ == "__main__":
+    tests = [test_tracking_results_pages, test_upload_history_pages]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"❌ {test.__name__}: {e}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+PRO Validation Test
+
+Checks carrier check digits (mod-7) and validate_pro_for_tracking without any network calls.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.backend.carrier_detection import carrier_detector, validate_pro_for_tracking
+
+
+def test_mod7_check_digits():
+    """PROs whose check digit is the preceding digits modulo 7 are detected; others are rejected"""
+    # FedEx Freight 9+1, 10-digit and dashed formats, R+L 8+1 format
+    for pro_number, carrier_code in [('761607932-1', 'fedex_freight'), ('5556372640', 'fedex_freight'),
+                                     ('555-6372640', 'fedex_freight'), ('14588517-6', 'rl_carriers')]:
+        carrier_info = carrier_detector.detect_carrier(pro_number)
+        assert carrier_info['carrier_code'] == carrier_code, pro_number
+        assert carrier_detector.check_digit_error(pro_number) == "", pro_number
+    
+    for pro_number, carrier_name in [('761607932-2', 'FedEx Freight'), ('5556372641', 'FedEx Freight'),
+                                     ('14588517-5', 'R+L Carriers')]:
+        assert carrier_detector.check_digit_error(pro_number) == \
+            f"PRO number check digit invalid for {carrier_name}", pro_number
+    
+    # Formats without a check digit are not affected
+    for pro_number in ['1751027634', 'RS25909506', 'I010185804']:
+        assert carrier_detector.check_digit_error(pro_number) == "", pro_number
+
+
+def test_validate_pro_for_tracking():
+    """Only empty, badly sized and check-digit-failing PROs are kept from the trackers"""
+    assert validate_pro_for_tracking(None) == (False, "PRO number cannot be empty")
+    assert validate_pro_for_tracking('  ') == (False, "PRO number cannot be empty")
+    assert validate_pro_for_tracking('1234') == (False, "PRO number too short")
+    assert validate_pro_for_tracking('1' * 21) == (False, "PRO number too long")
+    
+    assert validate_pro_for_tracking('761607932-1') == (True, "")
+    assert validate_pro_for_tracking('761607932-2') == \
+        (False, "PRO number check digit invalid for FedEx Freight")
+    
+    # Unknown formats are left for the tracker to try
+    assert validate_pro_for_tracking('ABC12345') == (True, "")
+
+
+def test_validate_pro_for_tracking_with_carrier():
+    """A carrier name narrows the check to that carrier's patterns"""
+    assert validate_pro_for_tracking('14588517-5', 'R&L') == \
+        (False, "PRO number check digit invalid for R+L Carriers")
+    assert validate_pro_for_tracking('14588517-6', 'R+L Carriers') == (True, "")
+    
+    # R+L's check digit says nothing about a PRO tracked with FedEx
+    assert validate_pro_for_tracking('14588517-5', 'FedEx Freight') == (True, "")
+    assert validate_pro_for_tracking('5556372641', 'FedEx Freight Priority') == \
+        (False, "PRO number check digit invalid for FedEx Freight")
+
+
+if __name__ == "__main__":
+    tests = [test_mod7_check_digits, test_validate_pro_for_tracking, test_validate_pro_for_tracking_with_carrier]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"❌ {test.__name__}: {e}")
+    sys.exit(1 if failures else 0)
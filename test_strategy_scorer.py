@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Strategy Scorer Test
+
+Checks strategy ordering, the failure cooldown that skips a strategy, the exploration
+probe that retries skipped strategies, and persistence through a throwaway database.
+"""
+
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.backend.database import DatabaseManager
+from src.backend.strategy_scorer import StrategyScorer
+
+STRATEGIES = ['direct_scraping', 'mobile_endpoints', 'api_endpoints']
+
+
+def _fail(scorer, strategy, times):
+    for _ in range(times):
+        scorer.record('TestTracker', 'estes', strategy, False, elapsed=1.0)
+
+
+def test_order_by_success_and_latency():
+    """Untried strategies keep their order; proven ones move up, slow or failing ones down"""
+    scorer = StrategyScorer(persistent=False)
+    assert scorer.order('TestTracker', 'estes', STRATEGIES) == STRATEGIES
+    
+    for _ in range(3):
+        scorer.record('TestTracker', 'estes', 'api_endpoints', True, elapsed=1.0)
+    scorer.record('TestTracker', 'estes', 'direct_scraping', False, elapsed=1.0)
+    assert scorer.order('TestTracker', 'estes', STRATEGIES) == ['api_endpoints', 'mobile_endpoints', 'direct_scraping']
+    
+    # Scores are kept per carrier
+    assert scorer.order('TestTracker', 'fedex', STRATEGIES) == STRATEGIES
+    
+    # Equally reliable, the faster strategy goes first
+    scorer.record('TestTracker', 'rl', 'direct_scraping', True, elapsed=20.0)
+    scorer.record('TestTracker', 'rl', 'mobile_endpoints', True, elapsed=1.0)
+    assert scorer.order('TestTracker', 'rl', STRATEGIES)[0] == 'mobile_endpoints'
+
+
+def test_skip_after_consecutive_failures():
+    """A strategy is left out after SKIP_AFTER_FAILURES failures in a row, until its cooldown ends"""
+    scorer = StrategyScorer(persistent=False)
+    scorer.EXPLORATION_RATE = 0.0
+    
+    _fail(scorer, 'direct_scraping', StrategyScorer.SKIP_AFTER_FAILURES - 1)
+    assert 'direct_scraping' in scorer.order('TestTracker', 'estes', STRATEGIES)
+    
+    _fail(scorer, 'direct_scraping', 1)
+    assert scorer.order('TestTracker', 'estes', STRATEGIES) == ['mobile_endpoints', 'api_endpoints']
+    assert scorer.get_scores('TestTracker')['estes']['direct_scraping']['skipped'] is True
+    
+    # A success in between resets the run of failures
+    _fail(scorer, 'mobile_endpoints', StrategyScorer.SKIP_AFTER_FAILURES - 1)
+    scorer.record('TestTracker', 'estes', 'mobile_endpoints', True)
+    _fail(scorer, 'mobile_endpoints', 1)
+    assert 'mobile_endpoints' in scorer.order('TestTracker', 'estes', STRATEGIES)
+    
+    # With every strategy cooling down, all of them are still tried
+    _fail(scorer, 'mobile_endpoints', StrategyScorer.SKIP_AFTER_FAILURES)
+    _fail(scorer, 'api_endpoints', StrategyScorer.SKIP_AFTER_FAILURES)
+    assert sorted(scorer.order('TestTracker', 'estes', STRATEGIES)) == sorted(STRATEGIES)
+    
+    # The cooldown ends on its own
+    stats = scorer._scores['TestTracker'][('estes', 'api_endpoints')]
+    stats['skipped_until'] = time.time() - 1
+    assert scorer.order('TestTracker', 'estes', STRATEGIES) == ['api_endpoints']
+
+
+def test_exploration_probes_skipped_strategy():
+    """An exploration probe puts a skipped strategy first, and its success ends the cooldown"""
+    scorer = StrategyScorer(persistent=False)
+    _fail(scorer, 'direct_scraping', StrategyScorer.SKIP_AFTER_FAILURES)
+    
+    scorer.EXPLORATION_RATE = 1.0
+    assert scorer.order('TestTracker', 'estes', STRATEGIES) == STRATEGIES
+    
+    scorer.record('TestTracker', 'estes', 'direct_scraping', True)
+    scorer.EXPLORATION_RATE = 0.0
+    assert 'direct_scraping' in scorer.order('TestTracker', 'estes', STRATEGIES)
+    assert scorer.get_scores('TestTracker')['estes']['direct_scraping']['skipped'] is False
+
+
+def test_cancelled_attempts_are_not_scored():
+    """Hedged attempts cancelled because another strategy won say nothing about the strategy"""
+    scorer = StrategyScorer(persistent=False)
+    scorer.record_attempt('TestTracker', 'estes', {'strategy': 'api_endpoints', 'outcome': 'cancelled', 'elapsed': 5.0})
+    assert scorer.get_scores('TestTracker') == {}
+    
+    scorer.record_attempt('TestTracker', 'estes', {'strategy': 'api_endpoints', 'outcome': 'error', 'elapsed': 5.0})
+    assert scorer.get_scores('TestTracker')['estes']['api_endpoints']['success_rate'] == 0.0
+
+
+def test_scores_persist():
+    """Scores written through the write-behind queue are loaded by a fresh scorer"""
+    db_manager = DatabaseManager(os.path.join(tempfile.mkdtemp(), 'strategy_scores.db'))
+    scorer = StrategyScorer(db_manager)
+    scorer.record('TestTracker', 'estes', 'api_endpoints', True, elapsed=2.0)
+    _fail(scorer, 'direct_scraping', StrategyScorer.SKIP_AFTER_FAILURES)
+    db_manager.get_write_queue().flush()
+    
+    reloaded = StrategyScorer(db_manager)
+    reloaded.EXPLORATION_RATE = 0.0
+    assert reloaded.get_scores('TestTracker') == scorer.get_scores('TestTracker')
+    assert reloaded.order('TestTracker', 'estes', STRATEGIES) == ['api_endpoints', 'mobile_endpoints']
+
+
+if __name__ == "__main__":
+    tests = [test_order_by_success_and_latency, test_skip_after_consecutive_failures,
+             test_exploration_probes_skipped_strategy, test_cancelled_attempts_are_not_scored,
+             test_scores_persist]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"❌ {test.__name__}: {e}")
+    sys.exit(1 if failures else 0)
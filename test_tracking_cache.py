@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tracking Cache Test
+
+Checks the status classes that pick a cached result's TTL, and that results expire from
+both the memory and SQLite tiers after that TTL. Uses a throwaway database and a fake clock.
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.backend import tracking_cache as tracking_cache_module
+from src.backend.database import DatabaseManager
+from src.backend.tracking_cache import TrackingResultCache
+
+
+class FakeClock:
+    """Stands in for the time module inside tracking_cache"""
+    
+    def __init__(self):
+        # Start at the real time; the database's purge of expired entries uses the real clock
+        self.now = time.time()
+    
+    def time(self):
+        return self.now
+
+
+RESULTS = {
+    'delivered': {'success': True, 'pro_number': '1642457961', 'tracking_status': 'Delivered'},
+    'in_transit': {'success': True, 'pro_number': '1642457962', 'tracking_status': 'In Transit'},
+    'failure': {'success': False, 'pro_number': '1642457963', 'error': 'Timed out'},
+}
+
+
+def test_status_classes():
+    """Results are classed as delivered, in transit or failure"""
+    status_class = TrackingResultCache.status_class
+    
+    assert status_class({'tracking_status': 'Delivered'}) == 'delivered'
+    assert status_class({'status': 'success', 'status_description': 'Shipment delivered to consignee'}) == 'delivered'
+    assert status_class({'is_delivered': True, 'tracking_status': 'Closed'}) == 'delivered'
+    
+    assert status_class({'tracking_status': 'Not Delivered - Refused'}) == 'in_transit'
+    assert status_class({'tracking_status': 'Out for delivery'}) == 'in_transit'
+    assert status_class({'status': 'success'}) == 'in_transit'
+    
+    assert status_class({'success': False, 'tracking_status': 'Delivered'}) == 'failure'
+    assert status_class({'status': 'error'}) == 'failure'
+    assert status_class({'status': 'failed'}) == 'failure'
+    assert status_class(None) == 'failure'
+
+
+def test_ttl_by_status_class():
+    """Each status class expires after its own TTL, from memory and from SQLite"""
+    db_manager = DatabaseManager(os.path.join(tempfile.mkdtemp(), 'tracking_cache.db'))
+    clock = FakeClock()
+    original_time = tracking_cache_module.time
+    tracking_cache_module.time = clock
+    
+    async def cached(cache):
+        return {status: await cache.get('TestTracker', result['pro_number'], 'Estes Express')
+                for status, result in RESULTS.items()}
+    
+    async def run():
+        cache = TrackingResultCache(db_manager)
+        for status, result in RESULTS.items():
+            stored = await cache.put('TestTracker', result['pro_number'], 'Estes Express', dict(result))
+            assert stored['from_cache'] is False and stored['cache_status_class'] == status
+        
+        # A second cache over the same database starts with an empty memory tier
+        cold_cache = TrackingResultCache(db_manager)
+        ttl = TrackingResultCache.TTL_SECONDS
+        start = clock.now
+        
+        clock.now = start + ttl['failure'] - 1
+        for tiered in (cache, cold_cache):
+            hits = await cached(tiered)
+            assert all(hits[status]['from_cache'] for status in RESULTS), hits
+            assert hits['delivered']['cache_age_seconds'] == ttl['failure'] - 1
+        assert cold_cache.stats['db_hits'] == 3
+        
+        clock.now = start + ttl['failure'] + 1
+        hits = await cached(cache)
+        assert hits['failure'] is None and hits['in_transit'] and hits['delivered']
+        
+        clock.now = start + ttl['in_transit'] + 1
+        for tiered in (cache, TrackingResultCache(db_manager)):
+            hits = await cached(tiered)
+            assert hits['in_transit'] is None and hits['delivered'], hits
+        
+        clock.now = start + ttl['delivered'] + 1
+        for tiered in (cache, TrackingResultCache(db_manager)):
+            hits = await cached(tiered)
+            assert all(hit is None for hit in hits.values()), hits
+    
+    try:
+        asyncio.run(run())
+    finally:
+        tracking_cache_module.time = original_time
+
+
+def test_hit_echoes_callers_pro_number():
+    """A shared result is reported under the PRO number as the caller wrote it"""
+    async def run():
+        cache = TrackingResultCache(persistent=False)
+        await cache.put('TestTracker', '1642457961', 'Estes Express', dict(RESULTS['delivered']))
+        return await cache.get('TestTracker', '164-245-7961', 'Estes Express')
+    
+    hit = asyncio.run(run())
+    assert hit['from_cache'] is True
+    assert hit['pro_number'] == '164-245-7961'
+
+
+if __name__ == "__main__":
+    tests = [test_status_classes, test_ttl_by_status_class, test_hit_echoes_callers_pro_number]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"❌ {test.__name__}: {e}")
+    sys.exit(1 if failures else 0)
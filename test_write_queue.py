@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Write-Behind Queue Test
+
+Checks that queued writes commit together, that a failing write fails only its own
+future, and that a failed write leaves no partial rows behind.
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.backend.database import DatabaseManager, WriteBehindQueue
+
+
+def _make_db():
+    db_manager = DatabaseManager(os.path.join(tempfile.mkdtemp(), 'write_queue.db'))
+    upload_id = db_manager.save_upload_history_enhanced('Queue', 'config', 'queue.csv', 1, 1, 0, '[]', 1.0, [], 's')
+    
+    # Shipment state bookkeeping is the last step of save_tracking_batch; fail it for one PRO
+    record_shipment_states = db_manager._record_shipment_states
+    
+    def failing_record_shipment_states(cursor, states):
+        if any(state[0] == '9999999' for state in states):
+            raise RuntimeError("shipment state write failed")
+        return record_shipment_states(cursor, states)
+    
+    db_manager._record_shipment_states = failing_record_shipment_states
+    return db_manager, upload_id
+
+
+def _result(pro_number):
+    return {'pro_number': pro_number, 'carrier_name': 'Estes', 'tracking_status': 'Delivered', 'scrape_success': True}
+
+
+def _saved_pro_numbers(db_manager):
+    with db_manager.transaction() as cursor:
+        cursor.execute('''
+            SELECT tr.pro_number FROM tracking_requests tr
+            JOIN tracking_results trs ON tr.id = trs.tracking_request_id
+            ORDER BY tr.pro_number
+        ''')
+        return [row[0] for row in cursor.fetchall()]
+
+
+def test_merged_writes_return_their_own_results():
+    """Writes for the same upload are merged but each future gets its own rows back"""
+    db_manager, upload_id = _make_db()
+    write_queue = WriteBehindQueue(db_manager, batch_delay_ms=200)
+    try:
+        first = write_queue.submit('save_tracking_batch', upload_id, [_result('1000001'), _result('1000002')])
+        second = write_queue.submit('save_tracking_batch', upload_id, [_result('1000003')])
+        
+        assert [row[0] for row in first.result(10)] == ['1000001', '1000002']
+        assert [row[0] for row in second.result(10)] == ['1000003']
+        assert _saved_pro_numbers(db_manager) == ['1000001', '1000002', '1000003']
+    finally:
+        write_queue.close()
+
+
+def test_failed_write_fails_alone_without_partial_rows():
+    """A write that fails is rolled back to its savepoint and raises on its future only"""
+    db_manager, upload_id = _make_db()
+    write_queue = WriteBehindQueue(db_manager, batch_delay_ms=200)
+    try:
+        good = write_queue.submit('save_tracking_batch', upload_id, [_result('1000001')])
+        bad = write_queue.submit('save_tracking_batch', upload_id, [_result('1000002'), _result('9999999')])
+        unknown = write_queue.submit('no_such_write')
+        after = write_queue.submit('save_tracking_batch', upload_id, [_result('1000003')])
+        
+        assert [row[0] for row in good.result(10)] == ['1000001']
+        assert [row[0] for row in after.result(10)] == ['1000003']
+        
+        try:
+            bad.result(10)
+            assert False, "failed save_tracking_batch did not raise"
+        except RuntimeError as e:
+            assert str(e) == "shipment state write failed"
+        
+        try:
+            unknown.result(10)
+            assert False, "unknown write method did not raise"
+        except AttributeError:
+            pass
+        
+        # Neither the request nor the result rows of the failed write were committed
+        assert _saved_pro_numbers(db_manager) == ['1000001', '1000003']
+    finally:
+        write_queue.close()
+
+
+def test_submit_async_raises_write_errors():
+    """Coroutines awaiting submit_async see the write's error"""
+    db_manager, upload_id = _make_db()
+    write_queue = WriteBehindQueue(db_manager)
+    
+    async def save(pro_number):
+        return await write_queue.submit_async('save_tracking_batch', upload_id, [_result(pro_number)])
+    
+    try:
+        saved = asyncio.run(save('1000001'))
+        assert [row[0] for row in saved] == ['1000001']
+        
+        try:
+            asyncio.run(save('9999999'))
+            assert False, "failed submit_async did not raise"
+        except RuntimeError:
+            pass
+        
+        assert _saved_pro_numbers(db_manager) == ['1000001']
+    finally:
+        write_queue.close()
+
+
+def test_cancelled_writes_are_dropped_and_writer_survives():
+    """A write cancelled before the writer claims it is skipped, and the writer keeps serving later writes"""
+    db_manager, upload_id = _make_db()
+    write_queue = WriteBehindQueue(db_manager, batch_delay_ms=200)
+    try:
+        cancelled = write_queue.submit('save_tracking_batch', upload_id, [_result('1000001')])
+        assert cancelled.cancel()
+        kept = write_queue.submit('save_tracking_batch', upload_id, [_result('1000002')])
+        assert [row[0] for row in kept.result(10)] == ['1000002']
+        
+        # An outcome the future can no longer take (e.g. cancelled in a race) is logged, not raised
+        late = write_queue.submit('save_tracking_batch', upload_id, [])
+        late.result(10)
+        WriteBehindQueue._resolve(late, [], None)
+        
+        write_queue.flush(10)
+        assert write_queue._thread.is_alive()
+        assert _saved_pro_numbers(db_manager) == ['1000002']
+    finally:
+        write_queue.close()
+
+
+def test_direct_save_keeps_returning_empty_on_error():
+    """Called directly, save_tracking_batch still returns [] on error and saves nothing"""
+    db_manager, upload_id = _make_db()
+    
+    assert db_manager.save_tracking_batch(upload_id, [_result('1000001'), _result('9999999')]) == []
+    assert _saved_pro_numbers(db_manager) == []
+
+
+def test_outer_rollback_undoes_nested_writes():
+    """Writes made inside an outer transaction roll back with it"""
+    db_manager, upload_id = _make_db()
+    
+    try:
+        with db_manager.transaction():
+            assert db_manager.save_tracking_batch(upload_id, [_result('1000001')])
+            raise ValueError("abort")
+    except ValueError:
+        pass
+    
+    assert _saved_pro_numbers(db_manager) == []
+
+
+if __name__ == "__main__":
+    tests = [test_merged_writes_return_their_own_results, test_failed_write_fails_alone_without_partial_rows,
+             test_submit_async_raises_write_errors, test_cancelled_writes_are_dropped_and_writer_survives,
+             test_direct_save_keeps_returning_empty_on_error, test_outer_rollback_undoes_nested_writes]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"❌ {test.__name__}: {e}")
+    sys.exit(1 if failures else 0)